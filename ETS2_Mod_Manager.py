@@ -4,17 +4,44 @@ ETS2 Mod Manager - USER VERSION
 Automatically installs mod collection with enhanced GUI
 """
 
+import asyncio
 import os
 import sys
 import json
-import shutil
 import subprocess
 import getpass
-import re
+import functools
+import fnmatch
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Optional, Tuple
+
+from sii import (
+    HEAD_SIZE, SiiPatchError, detect_sii_format, patch_active_mods,
+    quote_sii_string, read_profile_fields,
+)
+from sii_binary import SiiDecodeError
+from profile_cache import ProfileCache
+from instrumentation import NULL_TRACER, Tracer, traced
+from load_order import LoadOrder, LoadOrderError
+from mod_index import ModIndex
+from mod_store import DEFAULT_HASH_WORKERS, ModStore, SyncResult, build_manifest_mods, sync_mods
+from mod_diff import ModListDiff, apply_diff, diff_mod_lists
+from mod_conflicts import ConflictReport, analyze_conflicts, conflict_records, parse_mod_entry
+from fs_walk import FsWalker, atomic_writer
+from save_analyzer import DEFAULT_SAVE_WORKERS, SaveBreakage, SaveIndex
+from async_api import DONE, FAILED, PROGRESS, AsyncModManager
+from profile_watch import DEFAULT_DEBOUNCE, ChangeSource, debounced, open_change_source
+from profile_snapshots import DEFAULT_BUDGET, DEFAULT_KEEP, Snapshot, SnapshotStore, store_key
+
+# Profile reads are I/O bound (cloud-synced folders), so threads help
+DEFAULT_SCAN_WORKERS = 8
+DEFAULT_INSTALL_WORKERS = 4
+DEFAULT_INDEX_WORKERS = 8
 
 @dataclass
 class ETS2Profile:
@@ -28,73 +55,389 @@ class ETS2Profile:
     last_save: datetime
     storage_type: str
     company_name: str = ""  # Add company name field
+    money: int = 0
+
+class LazyProfile:
+    """Profile listed from its folder name and stat alone
+
+    The expensive fields (XP, company, mod counts) come from parsing
+    profile.sii; that happens once, on first access or in the background
+    after prefetch(), and the result is memoized.
+    """
+    DETAIL_FIELDS = ('level', 'xp', 'mods', 'workshop_mods', 'local_mods', 'company_name', 'money')
+
+    def __init__(self, name: str, path: str, storage_type: str, last_save: datetime,
+                 loader: Callable[[], Optional[ETS2Profile]]):
+        self.path = path
+        self.storage_type = storage_type
+        self.last_save = last_save
+        self._name = name
+        self._loader = loader
+        self._details: Optional[ETS2Profile] = None
+        self._loaded = False
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        """Name from profile.sii once parsed, the decoded folder name until then"""
+        if self._loaded and self._details is not None:
+            return self._details.name
+        return self._name
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def _load(self) -> Optional[ETS2Profile]:
+        with self._lock:
+            if not self._loaded:
+                self._details = self._loader()
+                self._loaded = True
+        return self._details
+
+    def prefetch(self, executor) -> Future:
+        """Start parsing on `executor` without waiting for it"""
+        if self._future is None and not self._loaded:
+            self._future = executor.submit(self._load)
+        return self._future
+
+    def details(self) -> Optional[ETS2Profile]:
+        """The fully parsed profile (None if unreadable), parsing it now if needed"""
+        if self._loaded:
+            return self._details
+        if self._future is not None:
+            return self._future.result()
+        return self._load()
+
+    def __getattr__(self, attr: str):
+        if attr in LazyProfile.DETAIL_FIELDS:
+            details = self.details()
+            if details is None:
+                return 1 if attr == 'level' else "" if attr == 'company_name' else 0
+            return getattr(details, attr)
+        raise AttributeError(attr)
+
+@dataclass
+class ProfileRefresh:
+    """Profiles re-read after a batch of changes on disk"""
+    updated: List[ETS2Profile]
+    added: List[ETS2Profile]
+    removed: List[str]
+    seconds: float
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.updated or self.added or self.removed)
+
+class InstallStageError(RuntimeError):
+    """An install step failed; `stage` is "backup", "write" or "verify"
+
+    Before "verify", profile.sii has not been replaced. `snapshot` is the
+    snapshot taken by the backup step, if it got that far.
+    """
+
+    def __init__(self, stage: str, message: str, snapshot=None):
+        super().__init__(message)
+        self.stage = stage
+        self.snapshot = snapshot
+
+@dataclass
+class InstallResult:
+    """Outcome of installing the collection to one profile"""
+    profile: str
+    path: str
+    success: bool
+    method: str
+    seconds: float
+    error: str = ""
 
 class ETS2ModManager:
-    def __init__(self):
+    def __init__(self, scan_workers: int = DEFAULT_SCAN_WORKERS, use_cache: bool = True,
+                 verbosity: int = 1, log_stream=None, load_order_file: Optional[str] = None,
+                 game_dirs: Optional[List[str]] = None, steam_path: Optional[str] = None,
+                 tracer: Optional[Tracer] = None):
+        self.tracer = tracer or NULL_TRACER
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
-        self.load_order_file = os.path.join(self.base_dir, "load_order.json")
+        self.load_order_file = load_order_file or os.path.join(self.base_dir, "load_order.json")
         self.manifest_file = os.path.join(self.base_dir, "manifest_cache.json")
+        self.profile_cache_file = os.path.join(self.base_dir, "profile_cache.json")
+        self.mod_index_file = os.path.join(self.base_dir, "mod_index.json")
+        self.mod_store_dir = os.path.join(self.base_dir, "mod_store")
+        self.save_index_file = os.path.join(self.base_dir, "save_index.json")
+        self.snapshot_dir = os.path.join(self.base_dir, "snapshots")
+        self.snapshot_keep = DEFAULT_KEEP
+        self.snapshot_budget: Optional[int] = DEFAULT_BUDGET
         
-        self.mod_list = []
+        self.load_order = LoadOrder()
         self.profiles = []
         self.selected_profile = None
+        self.scan_workers = scan_workers
+        self.profile_cache = ProfileCache(self.profile_cache_file).load() if use_cache else None
+        self.fs = FsWalker()
+        self.last_scan_syscalls = {}
+        self._last_listing: Tuple[List[str], List[str]] = ([], [])
+        
+        # "Euro Truck Simulator 2" document folders and Steam install to search;
+        # None means the usual Windows locations and the registry
+        self.game_dirs = game_dirs
+        self.steam_path = steam_path
+        
+        # 0 = silent, 1 = status messages, 2 = diagnostics
+        self.verbosity = verbosity
+        self.log_stream = log_stream
         
         self.load_configuration()
 
+    def _log(self, message: str, level: int = 1):
+        """Print a status (level 1) or diagnostic (level 2) message if verbose enough"""
+        if self.verbosity >= level:
+            print(message, file=self.log_stream or sys.stdout)
+
+    @property
+    def mod_list(self) -> List[str]:
+        """The load order as "package_id|Display Name" active_mods entries"""
+        return self.load_order.entries()
+
+    @traced()
     def load_configuration(self):
         """Load mod configuration"""
-        print("📝 Loading mod configuration...")
-        print(f"🔍 Base dir: {self.base_dir}")
-        print(f"🔍 Load order file: {self.load_order_file}")
-        print(f"🔍 File exists: {os.path.exists(self.load_order_file)}")
+        self._log("📝 Loading mod configuration...")
+        self._log(f"🔍 Load order file: {self.load_order_file}", 2)
         
-        if os.path.exists(self.load_order_file):
-            print("📂 Opening file...")
-            try:
-                with open(self.load_order_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    print(f"📄 File size: {len(content)} chars")
-                    print(f"📄 First 50 chars: {repr(content[:50])}")
-                    print(f"📄 Last 50 chars: {repr(content[-50:])}")
-                    
-                # Parse JSON
-                print("🔧 Parsing JSON...")
-                with open(self.load_order_file, 'r', encoding='utf-8') as f:
-                    self.mod_list = json.load(f)
-                    
-            except Exception as e:
-                print(f"❌ Error loading JSON: {e}")
-                raise
+        try:
+            self.load_order = LoadOrder.load(self.load_order_file)
+        except FileNotFoundError:
+            self._log(f"⚠️  Load order file not found: {self.load_order_file}", 2)
+        except LoadOrderError as e:
+            self._log(f"❌ Invalid load order: {e}", 0)
+            raise
         
-        print(f"✅ Loaded {len(self.mod_list)} mods")
+        self._log(f"✅ Loaded {len(self.load_order)} mods "
+                  f"({len(self.load_order.workshop)} Workshop + {len(self.load_order.local)} Local)")
 
-    def scan_profiles(self):
+    @traced()
+    def scan_profiles(self, locations: Optional[List[str]] = None):
         """Scan for ETS2 profiles"""
-        print("🔍 Scanning for ETS2 profiles...")
+        self._log("🔍 Scanning for ETS2 profiles...")
         
-        self.profiles = []
-        current_user = getpass.getuser()
+        listing = self.list_profiles(locations)
+        self.load_details(listing)
         
-        locations = [
-            f"C:/Users/{current_user}/Documents/Euro Truck Simulator 2/profiles",
-            f"C:/Users/{current_user}/OneDrive/Documents/Euro Truck Simulator 2/profiles",
-            f"C:/Users/{current_user}/OneDrive/Documentos/Euro Truck Simulator 2/profiles",
-        ]
+        self.profiles = [p.details() for p in listing if p.details()]
+        self.profiles.sort(key=lambda p: p.mods, reverse=True)
         
-        # Add Steam locations
-        steam_locations = self._find_steam_locations()
-        locations.extend(steam_locations)
+        self._log(f"🔍 Filesystem calls: {self.last_scan_syscalls}", 2)
+        self._log(f"✅ Found {len(self.profiles)} profiles")
+
+    @traced()
+    def list_profiles(self, locations: Optional[List[str]] = None) -> List[LazyProfile]:
+        """Phase one of a scan: profiles from folder names and stat alone
+
+        Nothing is parsed here; see load_details() and LazyProfile.
+        """
+        self.fs.counter.reset()
+        if locations is None:
+            locations = self._default_locations()
         
+        candidates = []
+        scanned = []
         for location in locations:
-            if os.path.exists(location):
-                self._scan_location(location)
+            found = self._scan_location(location)
+            if found is not None:
+                candidates.extend(found)
+                scanned.append(location)
+        self._last_listing = (scanned, [path for path, _, _ in candidates])
         
-        self.profiles.sort(key=lambda p: p.mods, reverse=True)
-        print(f"✅ Found {len(self.profiles)} profiles")
+        listing = []
+        for path, storage_type, dir_mtime in candidates:
+            listing.append(LazyProfile(
+                name=self._decode_hex_name(os.path.basename(path)),
+                path=path,
+                storage_type=storage_type,
+                last_save=datetime.fromtimestamp(dir_mtime / 1e9) if dir_mtime else datetime.now(),
+                loader=functools.partial(self._load_profile, path, storage_type, dir_mtime),
+            ))
+        self.last_scan_syscalls = self.fs.counter.snapshot()
+        return listing
 
-    def _find_steam_locations(self):
-        """Find Steam profile locations"""
-        locations = []
+    @traced()
+    def load_details(self, listing: List[LazyProfile], wait: bool = True):
+        """Phase two: parse every listed profile over the thread pool
+
+        With wait=False the parsing carries on in the background and each
+        profile blocks only when its details are first needed; call
+        save_profile_cache() once they have all been read.
+        """
+        pending = [p for p in listing if not p.loaded]
+        if self.scan_workers <= 1 or len(pending) <= 1:
+            if wait:
+                for profile in pending:
+                    profile.details()
+        else:
+            pool = ThreadPoolExecutor(max_workers=min(self.scan_workers, len(pending)))
+            for profile in pending:
+                profile.prefetch(pool)
+            pool.shutdown(wait=wait)
+        if wait:
+            self.save_profile_cache()
+            self.last_scan_syscalls = self.fs.counter.snapshot()
+            for kind, calls in self.last_scan_syscalls.items():
+                self.tracer.count(f"fs.{kind}", calls)
+
+    def save_profile_cache(self):
+        """Drop cache entries for vanished profiles and write the cache"""
+        if self.profile_cache is None:
+            return
+        scanned, seen = self._last_listing
+        self.profile_cache.prune(scanned, seen)
+        try:
+            self.profile_cache.save()
+        except OSError as e:
+            self._log(f"⚠️  Could not save profile cache: {e}")
+
+    @traced()
+    def refresh_profiles(self, paths) -> ProfileRefresh:
+        """Re-read only the given profile folders and update self.profiles
+
+        A profiles root among `paths` is listed again. Unchanged profiles
+        are served from the profile cache, so spurious events cost a stat.
+        """
+        started = time.perf_counter()
+        known = {p.path: p for p in self.profiles}
+        roots = set(self._watched_roots())
+        targets = set()
+        for path in paths:
+            found = self._scan_location(path) if path in roots else None
+            if found is None:
+                targets.add(path)
+                continue
+            targets.update(profile_path for profile_path, _, _ in found)
+            targets.update(p for p in known if os.path.dirname(p) == path)
+        
+        refresh = ProfileRefresh(updated=[], added=[], removed=[], seconds=0.0)
+        for path in sorted(targets):
+            st = self.fs.stat(path)
+            profile = None
+            if st is not None and os.path.isdir(path) and not _is_profile_backup(os.path.basename(path)):
+                profile = self._load_profile(path, _storage_type_for(os.path.dirname(path)), st.st_mtime_ns)
+            if profile is not None:
+                (refresh.updated if path in known else refresh.added).append(profile)
+                known[path] = profile
+            elif path in known:
+                del known[path]
+                refresh.removed.append(path)
+                if self.profile_cache is not None:
+                    self.profile_cache.discard(path)
+        
+        if not refresh.is_empty:
+            profiles = sorted(known.values(), key=lambda p: p.mods, reverse=True)
+            self.profiles = profiles
+            if self.selected_profile is not None and self.selected_profile.path in known:
+                self.selected_profile = known[self.selected_profile.path]
+        if self.profile_cache is not None:
+            try:
+                self.profile_cache.save()
+            except OSError as e:
+                self._log(f"⚠️  Could not save profile cache: {e}")
+        self.tracer.count("watch.profiles_reread", len(targets))
+        refresh.seconds = time.perf_counter() - started
+        return refresh
+
+    def _watched_roots(self) -> List[str]:
+        return self._last_listing[0] or self._default_locations()
+
+    def open_profile_watch(self, locations: Optional[List[str]] = None,
+                           backend: str = "auto", interval: float = 1.0) -> ChangeSource:
+        """Change source over the profile roots (default: those last scanned)"""
+        roots = locations or self._watched_roots()
+        source = open_change_source(roots, backend, interval)
+        self._log(f"👀 Watching {len(source.roots)} profile folder(s) with {source.backend}", 2)
+        return source
+
+    def watch_profiles(self, on_refresh: Callable[[ProfileRefresh], None], source: ChangeSource,
+                       stop: Optional[threading.Event] = None, debounce: float = DEFAULT_DEBOUNCE):
+        """Keep self.profiles current: re-read changed profiles after each burst of changes
+
+        Blocks until `stop` is set or `source` is closed; run it on a thread
+        to watch in the background.
+        """
+        for changed in debounced(source, debounce, stop=stop):
+            refresh = self.refresh_profiles(changed)
+            if not refresh.is_empty:
+                on_refresh(refresh)
+
+    def _start_background_watch(self) -> Optional[ChangeSource]:
+        """Watch profiles on a daemon thread while the menu waits for input"""
+        def report(refresh: ProfileRefresh):
+            names = [p.name for p in refresh.updated + refresh.added] + \
+                    [os.path.basename(path) for path in refresh.removed]
+            print(f"\n🔄 Profiles changed on disk: {', '.join(names)} (numbers above still apply)")
+        
+        try:
+            source = self.open_profile_watch()
+        except OSError as e:
+            self._log(f"⚠️  Not watching profile folders: {e}", 2)
+            return None
+        threading.Thread(target=self.watch_profiles, args=(report, source),
+                         name="profile-watch", daemon=True).start()
+        return source
+
+    def _default_locations(self) -> List[str]:
+        """Candidate profile folders for the current user"""
+        if self.game_dirs is not None:
+            locations = [os.path.join(game_dir, "profiles") for game_dir in self.game_dirs]
+        else:
+            current_user = getpass.getuser()
+            locations = [
+                f"C:/Users/{current_user}/Documents/Euro Truck Simulator 2/profiles",
+                f"C:/Users/{current_user}/OneDrive/Documents/Euro Truck Simulator 2/profiles",
+                f"C:/Users/{current_user}/OneDrive/Documentos/Euro Truck Simulator 2/profiles",
+            ]
+        
+        # Add Steam locations
+        steam_locations = self._find_steam_locations()
+        locations.extend(steam_locations)
+        return locations
+
+    def _load_profile(self, path: str, storage_type: str, dir_mtime: int) -> Optional[ETS2Profile]:
+        """Read one profile, from the profile cache if its files are unchanged"""
+        if self.profile_cache is None:
+            return self._read_profile(path, storage_type, dir_mtime)
+        key = self._profile_stat_key(path, dir_mtime)
+        hit, record = self.profile_cache.get(path, key)
+        if hit:
+            return self._profile_from_record(record, storage_type)
+        profile = self._read_profile(path, storage_type, dir_mtime)
+        self.profile_cache.put(path, key, self._profile_to_record(profile))
+        return profile
+
+    def _profile_stat_key(self, profile_path: str, dir_mtime: int) -> Tuple[int, ...]:
+        """Cache key: folder mtime plus mtime/size of profile.sii and save/"""
+        key = [dir_mtime]
+        for name in ("profile.sii", "save"):
+            st = self.fs.stat(os.path.join(profile_path, name))
+            key += [st.st_mtime_ns, st.st_size] if st else [-1, -1]
+        return tuple(key)
+
+    def _profile_to_record(self, profile: Optional[ETS2Profile]) -> Optional[dict]:
+        if profile is None:
+            return None
+        record = asdict(profile)
+        record["last_save"] = profile.last_save.isoformat()
+        return record
+
+    def _profile_from_record(self, record: Optional[dict], storage_type: str) -> Optional[ETS2Profile]:
+        if record is None:
+            return None
+        record = dict(record, storage_type=storage_type)
+        record["last_save"] = datetime.fromisoformat(record["last_save"])
+        return ETS2Profile(**record)
+
+    def _find_steam_path(self) -> Optional[str]:
+        """Steam install folder (configured, else from the registry), or None"""
+        if self.steam_path is not None:
+            return self.steam_path
         try:
             import winreg
             try:
@@ -104,20 +447,126 @@ class ETS2ModManager:
             
             steam_path, _ = winreg.QueryValueEx(key, "InstallPath")
             winreg.CloseKey(key)
-            
+            return steam_path
+        except Exception as e:
+            self.tracer.count(f"steam_lookup_failure.{type(e).__name__}")
+            self._log(f"🔍 No Steam install found in the registry: {e!r}", 2)
+            return None
+
+    @traced()
+    def _find_steam_locations(self):
+        """Find Steam profile locations"""
+        locations = []
+        steam_path = self._find_steam_path()
+        if steam_path:
             userdata_path = os.path.join(steam_path, "userdata")
-            if os.path.exists(userdata_path):
-                for user_id in os.listdir(userdata_path):
-                    user_path = os.path.join(userdata_path, user_id)
-                    if os.path.isdir(user_path) and user_id.isdigit():
-                        ets2_profiles = os.path.join(user_path, "227300", "remote", "profiles")
-                        if os.path.exists(ets2_profiles):
-                            locations.append(ets2_profiles)
-        except:
-            pass
+            for user_dir in self.fs.subdirs(userdata_path):
+                if user_dir.name.isdigit():
+                    ets2_profiles = os.path.join(user_dir.path, "227300", "remote", "profiles")
+                    if self.fs.stat(ets2_profiles):
+                        locations.append(ets2_profiles)
         
         return locations
 
+    def _default_mod_roots(self) -> List[str]:
+        """Local mod folders next to the profile folders, plus Steam workshop content"""
+        roots = [os.path.join(os.path.dirname(location), "mod")
+                 for location in self._default_locations() if "userdata" not in location]
+        steam_path = self._find_steam_path()
+        if steam_path:
+            roots.append(os.path.join(steam_path, "steamapps", "workshop", "content", "227300"))
+        return roots
+
+    @traced()
+    def index_mods(self, roots: Optional[List[str]] = None, workers: int = DEFAULT_INDEX_WORKERS,
+                   processes: bool = False) -> ModIndex:
+        """Refresh the on-disk mod archive index and return it"""
+        self._log("🔍 Indexing mod archives...")
+        index = ModIndex(self.mod_index_file).load()
+        index.update(roots or self._default_mod_roots(), workers=workers, processes=processes)
+        try:
+            index.save()
+        except OSError as e:
+            self._log(f"⚠️  Could not save mod index: {e}")
+        self._log(f"✅ {len(index.archives)} archives "
+                  f"({index.indexed} indexed, {index.reused} unchanged, {index.removed} removed)")
+        return index
+
+    @traced()
+    def analyze_saves(self, profile_paths: Optional[List[str]] = None,
+                      workers: int = DEFAULT_SAVE_WORKERS, processes: bool = True) -> SaveIndex:
+        """Refresh the on-disk save index for the given profiles (default: all found)"""
+        if profile_paths is None:
+            if not self.profiles:
+                self.scan_profiles()
+            profile_paths = [p.path for p in self.profiles]
+        self._log("🔍 Analyzing save games...")
+        index = SaveIndex(self.save_index_file).load()
+        index.update(profile_paths, workers=workers, processes=processes)
+        try:
+            index.save()
+        except OSError as e:
+            self._log(f"⚠️  Could not save the save index: {e}")
+        self.tracer.count("saves.analyzed", index.analyzed)
+        self._log(f"✅ {len(index.saves)} saves "
+                  f"({index.analyzed} analyzed, {index.reused} unchanged, {index.removed} removed)")
+        return index
+
+    def saves_broken_by_collection(self, index: SaveIndex,
+                                   profile_paths: Optional[List[str]] = None) -> List[SaveBreakage]:
+        """Saves needing mods that installing the collection would deactivate"""
+        needed = {mod_id for info in index.saves.values() for mod_id in info.mods}
+        return index.broken_by((mod_id for mod_id in needed if mod_id not in self.load_order), profile_paths)
+
+    def load_manifest(self) -> dict:
+        """manifest_cache.json contents, or an empty manifest"""
+        try:
+            with open(self.manifest_file, 'rb') as f:
+                return json.loads(f.read().decode('utf-8'))
+        except FileNotFoundError:
+            return {}
+
+    def update_manifest(self, mod_dir: str, workers: int = DEFAULT_HASH_WORKERS) -> dict:
+        """Record the hash and size of each local collection mod found in `mod_dir`"""
+        self._log(f"🔍 Hashing collection archives in {mod_dir}...")
+        mod_ids = [mod.package_id for mod in self.load_order.local]
+        manifest = self.load_manifest()
+        manifest["mods"] = build_manifest_mods(mod_dir, mod_ids, workers)
+        manifest["generated"] = datetime.now().isoformat()
+        manifest["total_mods"] = len(self.mod_list)
+        with atomic_writer(self.manifest_file) as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        self._log(f"✅ {len(manifest['mods'])} archives recorded in {os.path.basename(self.manifest_file)}")
+        return manifest
+
+    def sync_mods(self, remote_dir: str, mod_dir: Optional[str] = None, store_dir: Optional[str] = None,
+                  budget: Optional[int] = None, workers: int = DEFAULT_HASH_WORKERS) -> List[SyncResult]:
+        """Bring the manifest's archives into `mod_dir` through the local content store"""
+        mods = self.load_manifest().get("mods", {})
+        if mod_dir is None:
+            local_roots = [root for root in self._default_mod_roots() if "workshop" not in root]
+            if not local_roots:
+                raise FileNotFoundError("no local mod folder found; pass the folder to fill with --mod-dir")
+            mod_dir = next((root for root in local_roots if os.path.isdir(root)), local_roots[0])
+        store = ModStore(store_dir or self.mod_store_dir, budget).load()
+        self._log(f"📦 Syncing {len(mods)} archives into {mod_dir}...")
+        results = sync_mods(store, mods, remote_dir, mod_dir, workers)
+        for action in ("present", "linked", "fetched", "missing", "failed"):
+            count = sum(1 for r in results if r.action == action)
+            if count:
+                self._log(f"   {action}: {count}")
+        return results
+
+    def find_conflicts(self, load_order: Optional[List[str]] = None,
+                       index: Optional[ModIndex] = None) -> ConflictReport:
+        """Mods of `load_order` (default: the collection) missing on disk or shadowing each other"""
+        if index is None:
+            index = self.index_mods()
+        report = analyze_conflicts(self.mod_list if load_order is None else load_order, index)
+        self._log(f"🔍 {report.paths:,} game paths across {report.mods} mods: "
+                  f"{len(report.missing)} missing, {len(report.conflicts)} overlapping pairs")
+        return report
+
     def _decode_hex_name(self, hex_name: str) -> str:
         """Universal hex name decoder for ETS2 profiles"""
         # Known names first (for faster lookup)
@@ -158,54 +607,32 @@ class ETS2ModManager:
         
         # If all fails, return the original hex with readable indicator
         return f"Profile_{hex_name[:8]}"
-        """Enhanced SII decoding with better text extraction"""
-        try:
-            with open(sii_file, 'rb') as f:
-                data = f.read()
-            
-            # Try UTF-8 first
-            try:
-                content = data.decode('utf-8', errors='ignore')
-                if any(keyword in content for keyword in ['active_mods', 'experience', 'company_name']):
-                    return content
-            except:
-                pass
-            
-            # Try to extract readable parts from binary
-            text_parts = []
-            current_text = ""
-            
-            for byte in data:
-                if 32 <= byte <= 126:  # Printable ASCII
-                    current_text += chr(byte)
-                else:
-                    if len(current_text) > 5:  # Shorter threshold for better extraction
-                        text_parts.append(current_text)
-                    current_text = ""
-            
-            if current_text and len(current_text) > 5:
-                text_parts.append(current_text)
-            
-            return ' '.join(text_parts)
-            
-        except:
-            return ""
 
-    def _scan_location(self, profiles_path: str):
-        """Scan location for profiles"""
-        storage_type = "Steam Cloud" if "userdata" in profiles_path else "OneDrive" if "OneDrive" in profiles_path else "Local"
+    @traced(detail=True)
+    def _scan_location(self, profiles_path: str) -> Optional[List[Tuple[str, str, int]]]:
+        """List profile folders in a location as (profile_path, storage_type, dir_mtime_ns)
+
+        Returns None if the location does not exist.
+        """
+        storage_type = _storage_type_for(profiles_path)
+        
+        entries = self.fs.scandir(profiles_path)
+        if entries is None:
+            return None
         
-        for profile_dir in os.listdir(profiles_path):
-            if "(" in profile_dir and ".bak" in profile_dir:
+        candidates = []
+        for entry in entries:
+            if _is_profile_backup(entry.name):
                 continue
                 
-            profile_path = os.path.join(profiles_path, profile_dir)
-            if os.path.isdir(profile_path):
-                profile = self._read_profile(profile_path, storage_type)
-                if profile:
-                    self.profiles.append(profile)
+            if self.fs.entry_is_dir(entry):
+                st = self.fs.entry_stat(entry)
+                candidates.append((entry.path, storage_type, st.st_mtime_ns if st else 0))
+        return candidates
 
-    def _read_profile(self, profile_path: str, storage_type: str) -> Optional[ETS2Profile]:
+    @traced(detail=True)
+    def _read_profile(self, profile_path: str, storage_type: str,
+                      dir_mtime: Optional[int] = None) -> Optional[ETS2Profile]:
         """Read profile data with enhanced details and proper name decoding"""
         try:
             folder_name = os.path.basename(profile_path)
@@ -217,63 +644,63 @@ class ETS2ModManager:
             workshop_mods = 0
             local_mods = 0
             company_name = ""
+            money = 0
             
             # Try to read profile.sii for detailed info
             profile_file = os.path.join(profile_path, "profile.sii")
-            if os.path.exists(profile_file):
-                try:
-                    content = self._decode_sii_simple(profile_file)
-                    
-                    # Extract company name
-                    company_match = re.search(r'company_name[^:]*:\s*"([^"]*)"', content)
-                    if company_match:
-                        company_name = company_match.group(1).strip()
-                    
-                    # Extract profile name (might be different from folder name)
-                    profile_match = re.search(r'profile_name[^:]*:\s*"([^"]*)"', content)
-                    if profile_match:
-                        profile_name = profile_match.group(1).strip()
-                        if profile_name and profile_name != name:
-                            name = profile_name  # Use profile name from file if available
-                    
-                    # Extract XP
-                    xp_match = re.search(r'experience[^:]*:\s*(\d+)', content)
-                    if xp_match:
-                        xp = int(xp_match.group(1))
-                        # Calculate approximate level (ETS2 uses exponential XP)
-                        if xp > 0:
-                            level = min(150, max(1, int((xp / 1000) ** 0.5) + 1))
-                    
-                    # Extract mod count
-                    mod_match = re.search(r'active_mods\s*:\s*(\d+)', content)
-                    if mod_match:
-                        declared_count = int(mod_match.group(1))
-                        if 0 <= declared_count <= 200:
-                            mod_count = declared_count
-                            
-                    # Count workshop vs local mods
-                    mod_entries = re.findall(r'active_mods\[\d+\]\s*:\s*"([^"]*)"', content)
-                    for mod in mod_entries:
-                        if 'workshop_package' in mod:
-                            workshop_mods += 1
-                        else:
-                            local_mods += 1
+            try:
+                self.fs.count_open()
+                with self.tracer.span("decode"):
+                    fields = read_profile_fields(profile_file)
+                if self.tracer.enabled:
+                    self.tracer.count("bytes_read", os.path.getsize(profile_file))
+                
+                # Extract company name
+                company_name = fields.company_name
+                
+                # Extract profile name (might be different from folder name)
+                if fields.profile_name and fields.profile_name != name:
+                    name = fields.profile_name  # Use profile name from file if available
+                
+                # Extract XP
+                if fields.experience:
+                    xp = fields.experience
+                    # Calculate approximate level (ETS2 uses exponential XP)
+                    level = min(150, max(1, int((xp / 1000) ** 0.5) + 1))
+                
+                # Extract money
+                if fields.money_account:
+                    money = fields.money_account
+                
+                # Extract mod count
+                if fields.active_mods_count is not None:
+                    if 0 <= fields.active_mods_count <= 200:
+                        mod_count = fields.active_mods_count
                         
-                except Exception as e:
-                    pass
-            
+                # Count workshop vs local mods
+                for mod in fields.active_mods:
+                    if 'workshop_package' in mod:
+                        workshop_mods += 1
+                    else:
+                        local_mods += 1
+                    
+            except Exception as e:
+                self.tracer.count(f"parse_failure.{type(e).__name__}")
+                self._log(f"⚠️  Could not read {profile_file}: {e}", 2)
+        
             # Count saves as fallback
             if mod_count == 0:
                 save_path = os.path.join(profile_path, "save")
-                if os.path.exists(save_path):
-                    saves = [d for d in os.listdir(save_path) if os.path.isdir(os.path.join(save_path, d))]
-                    mod_count = len(saves)
-                    local_mods = mod_count  # Assume all local if can't read profile
+                mod_count = self.fs.count_subdirs(save_path)
+                local_mods = mod_count  # Assume all local if can't read profile
             
             # Get last modification time
-            try:
-                last_save = datetime.fromtimestamp(os.path.getmtime(profile_path))
-            except:
+            if dir_mtime is None:
+                st = self.fs.stat(profile_path)
+                dir_mtime = st.st_mtime_ns if st else None
+            if dir_mtime:
+                last_save = datetime.fromtimestamp(dir_mtime / 1e9)
+            else:
                 last_save = datetime.now()
             
             if name != "Unknown" or mod_count > 0:
@@ -287,17 +714,19 @@ class ETS2ModManager:
                     local_mods=local_mods,
                     last_save=last_save,
                     storage_type=storage_type,
-                    company_name=company_name
+                    company_name=company_name,
+                    money=money
                 )
-        except:
-            pass
+        except Exception as e:
+            self.tracer.count(f"profile_failure.{type(e).__name__}")
+            self._log(f"⚠️  Skipped profile {profile_path}: {e}", 2)
         
         return None
 
     def select_profile(self) -> bool:
         """Enhanced profile selection with detailed information"""
         if not self.profiles:
-            self.scan_profiles()
+            self.profiles = asyncio.run(self._scan_with_progress())
         
         if not self.profiles:
             print("❌ No profiles found!")
@@ -311,12 +740,18 @@ class ETS2ModManager:
         print("🔍 Select the profile you want to modify:")
         print("="*80)
         
+        # The background watch may re-sort self.profiles while we wait for
+        # input; numbers refer to the list as shown
+        shown = list(self.profiles)
+        
         # Display profiles with detailed information
-        for i, profile in enumerate(self.profiles, 1):
+        for i, profile in enumerate(shown, 1):
             print(f"\n{i:2d}. 👤 {profile.name}")
             if profile.company_name and profile.company_name != profile.name:
                 print(f"    🏢 Company: {profile.company_name}")
             print(f"    📊 Level: {profile.level:3d} | 🏆 XP: {profile.xp:,}")
+            if profile.money:
+                print(f"    💰 Money: €{profile.money:,}")
             print(f"    🎯 Current Mods: {profile.mods:3d} ({profile.workshop_mods} Workshop + {profile.local_mods} Local)")
             print(f"    💾 Storage: {profile.storage_type}")
             print(f"    📅 Last Activity: {profile.last_save.strftime('%Y-%m-%d %H:%M')}")
@@ -334,25 +769,30 @@ class ETS2ModManager:
         
         print("\n" + "="*80)
         print("⚠️  IMPORTANT:")
-        print("   • Your original profile will be backed up as 'profile.sii.backup'")
+        print("   • Your current profile.sii is saved as a snapshot you can restore later")
         print("   • Close ETS2 completely before proceeding")
         print("   • The installer will replace your current mod list")
         print("="*80)
         
         while True:
             try:
-                choice = input(f"\n🎯 Select profile (1-{len(self.profiles)}) or 0 to cancel: ").strip()
+                choice = input(f"\n🎯 Select profile (1-{len(shown)}) or 0 to cancel: ").strip()
                 if choice == "0":
                     print("\n❌ Installation cancelled by user")
                     return False
                 
                 index = int(choice) - 1
-                if 0 <= index < len(self.profiles):
-                    self.selected_profile = self.profiles[index]
+                if 0 <= index < len(shown):
+                    # Same profile as shown, with details refreshed since if it changed
+                    current = {p.path: p for p in self.profiles}
+                    self.selected_profile = current.get(shown[index].path, shown[index])
                     
                     # Confirmation with details
                     print(f"\n✅ Selected Profile: {self.selected_profile.name}")
                     print(f"   Current setup: {self.selected_profile.mods} mods → Will become: {len(self.mod_list)} mods")
+                    diff = self.profile_mod_diff(self.selected_profile.path)
+                    if diff is not None:
+                        print(f"   Changes: {diff.summary()}")
                     print(f"   Storage type: {self.selected_profile.storage_type}")
                     
                     confirm = input(f"\n🚀 Install {len(self.mod_list)} mods to '{self.selected_profile.name}'? (y/n): ").strip().lower()
@@ -366,97 +806,289 @@ class ETS2ModManager:
             except ValueError:
                 print("❌ Please enter a valid number!")
 
-    def install_mods(self) -> bool:
-        """Install mods to selected profile while preserving existing data"""
+    async def _scan_with_progress(self) -> List[ETS2Profile]:
+        """Interactive scan: folders are shown right away, then parsing progress"""
+        started = time.perf_counter()
+        profiles = []
+        async with AsyncModManager(self) as api:
+            async for event in api.scan():
+                if event.stage == "discover" and event.status == DONE and event.result:
+                    print(f"\n📋 Found {event.total} profile folders in "
+                          f"{(time.perf_counter() - started) * 1000:.0f} ms, loading details...")
+                    for profile in event.result:
+                        print(f"   • {profile.name:<24} 💾 {profile.storage_type:<12} "
+                              f"📅 {profile.last_save.strftime('%Y-%m-%d %H:%M')}")
+                elif event.stage == "parse" and event.status == PROGRESS:
+                    print(f"\r   ⏳ Read {event.done}/{event.total} profiles", end="", flush=True)
+                elif event.stage == "parse" and event.status == DONE and event.total:
+                    print()
+                elif event.stage == "scan":
+                    profiles = event.result
+        return profiles
+
+    async def _install_with_progress(self, profile: ETS2Profile, incremental: bool = True) -> str:
+        """Interactive install: print each step as it completes; returns the write method"""
+        method = "failed"
+        failed_stage = "install"
+        snapshot = None
+        async with AsyncModManager(self) as api:
+            async for event in api.install_profile(profile, incremental):
+                for message in event.messages:
+                    print(message)
+                if event.stage == "backup" and event.status == DONE:
+                    snapshot = event.result
+                elif event.stage == "verify" and event.status == DONE:
+                    print(f"✅ Verified: profile.sii lists all {len(self.mod_list)} mods in order")
+                elif event.status == FAILED and event.stage != "install":
+                    failed_stage = event.stage
+                elif event.stage == "install" and event.status == FAILED:
+                    if isinstance(event.result, Exception):
+                        raise InstallStageError(failed_stage, str(event.result), snapshot) from event.result
+                    raise InstallStageError(failed_stage, "profile.sii does not match the collection "
+                                                          "after writing", snapshot)
+                elif event.stage == "install" and event.status == DONE:
+                    method = event.result
+        return method
+
+    @traced()
+    def install_mods(self, incremental: bool = True) -> bool:
+        """Install mods to selected profile while preserving existing data
+
+        With `incremental`, only the active_mods block of the existing
+        profile.sii is replaced and every other field is kept byte-for-byte;
+        if that is not possible a minimal profile is generated instead.
+        """
         if not self.selected_profile:
             print("❌ No profile selected!")
             return False
         
         print(f"🚀 Installing {len(self.mod_list)} mods to profile: {self.selected_profile.name}")
         
-        profile_file = os.path.join(self.selected_profile.path, "profile.sii")
-        
         try:
-            # Create backup
-            backup_file = profile_file + ".backup"
-            if os.path.exists(profile_file):
-                shutil.copy2(profile_file, backup_file)
-                print(f"✅ Created backup: {backup_file}")
-            
-            # Read existing profile data to preserve it
-            existing_content = ""
-            profile_name = self.selected_profile.name
-            company_name = self.selected_profile.company_name or profile_name
-            experience = self.selected_profile.xp
-            money_account = 500000  # Default fallback
-            
-            if os.path.exists(profile_file):
-                try:
-                    existing_content = self._decode_sii_simple(profile_file)
-                    
-                    # Extract existing values to preserve them
-                    money_match = re.search(r'money_account[^:]*:\s*(\d+)', existing_content)
-                    if money_match:
-                        money_account = int(money_match.group(1))
-                    
-                    # Use existing profile name if found
-                    name_match = re.search(r'profile_name[^:]*:\s*"([^"]*)"', existing_content)
-                    if name_match and name_match.group(1).strip():
-                        profile_name = name_match.group(1).strip()
-                    
-                    # Use existing company name if found
-                    company_match = re.search(r'company_name[^:]*:\s*"([^"]*)"', existing_content)
-                    if company_match and company_match.group(1).strip():
-                        company_name = company_match.group(1).strip()
-                        
-                except Exception as e:
-                    print(f"⚠️  Warning: Could not read existing profile data: {e}")
-            
-            # Create enhanced SII structure preserving existing data
-            sii_content = f"""SiiNunit
-{{
-
-profile_data : profile.data {{
- profile_name: "{profile_name}"
- company_name: "{company_name}"
- experience: {experience}
- money_account: {money_account}
- 
- active_mods: {len(self.mod_list)}
-"""
-            
-            # Add all mods from the collection
-            for i, mod in enumerate(self.mod_list):
-                sii_content += f' active_mods[{i}]: "{mod}"\n'
-            
-            # Close structure with additional essential data
-            sii_content += """
- user_data[0]: ff_data
-}}
-
-}}
-"""
-            
-            # Write updated profile
-            with open(profile_file, 'w', encoding='utf-8') as f:
-                f.write(sii_content)
-            
-            print(f"🎮 Successfully installed {len(self.mod_list)} mods!")
-            print(f"✅ Preserved profile data: {profile_name} | Company: {company_name}")
-            print("ℹ️  ETS2 will handle file encoding when you next run the game")
+            method = asyncio.run(self._install_with_progress(self.selected_profile, incremental))
+            self.tracer.count(f"install.{method}")
             return True
             
+        except KeyboardInterrupt:
+            # The step in progress was completed first: profile.sii is either old or new, never partial
+            print("\n⏹️  Installation cancelled")
+            return False
+        except InstallStageError as e:
+            print(f"❌ Error installing mods: {e}")
+            if e.stage != "verify":
+                print("🛡️  Original profile.sii was left untouched")
+            elif e.snapshot is not None:
+                print(f"🛡️  profile.sii was replaced; the previous version is snapshot #{e.snapshot.id}")
+                print(f"   (restore it with: snapshots \"{self.selected_profile.path}\" --restore {e.snapshot.id})")
+            else:
+                print("⚠️  profile.sii was replaced and could not be verified")
+            return False
         except Exception as e:
             print(f"❌ Error installing mods: {e}")
-            # Try to restore backup if it exists
-            if os.path.exists(backup_file):
-                try:
-                    shutil.copy2(backup_file, profile_file)
-                    print("🔄 Restored from backup due to error")
-                except:
-                    pass
+            print("🛡️  Original profile.sii was left untouched")
             return False
 
+    @traced()
+    def _install_to_profile(self, profile: ETS2Profile, incremental: bool = True,
+                            log: Callable[[str], None] = print) -> str:
+        """Back up one profile and write the mod list to it
+
+        Returns "unchanged", "patched" or "rewritten"; raises if the profile could not be
+        written (the original profile.sii is then left untouched).
+        """
+        if incremental and self.profile_up_to_date(profile.path):
+            log(f"✅ {profile.name} already has the {len(self.mod_list)} mods in order, nothing to write")
+            return "unchanged"
+        
+        self._backup_profile(profile, log)
+        return self._write_profile(profile, incremental, log)
+
+    def profile_up_to_date(self, profile_path: str) -> bool:
+        """True if the profile's active_mods already are the collection, in order"""
+        diff = self.profile_mod_diff(profile_path)
+        return diff is not None and diff.is_empty
+
+    def _backup_profile(self, profile: ETS2Profile, log: Callable[[str], None] = print) -> Optional[Snapshot]:
+        """Snapshot profile.sii before it is replaced; None if there is none yet"""
+        if not os.path.exists(os.path.join(profile.path, "profile.sii")):
+            return None
+        snapshot, written = self.snapshot_profile(profile.path, profile.mods, "install")
+        how = "compressed" if written else "identical to an earlier one"
+        log(f"✅ Saved snapshot #{snapshot.id} of profile.sii ({snapshot.mods} mods, {how})")
+        return snapshot
+
+    def snapshot_store(self, profile_path: str) -> SnapshotStore:
+        """The snapshot history of one profile folder"""
+        profile_path = os.path.abspath(profile_path)
+        return SnapshotStore(os.path.join(self.snapshot_dir, store_key(profile_path)), profile_path,
+                             keep=self.snapshot_keep, budget=self.snapshot_budget).load()
+
+    @traced(detail=True)
+    def snapshot_profile(self, profile_path: str, mods: Optional[int] = None,
+                         reason: str = "") -> Tuple[Snapshot, bool]:
+        """Add the current profile.sii to the profile's snapshots
+
+        Returns the snapshot and whether its contents were new (False when
+        an identical version was already stored and only indexed again).
+        """
+        snapshot, written = self.snapshot_store(profile_path).add_file(
+            os.path.join(profile_path, "profile.sii"), mods, reason)
+        self.tracer.count("snapshot.written" if written else "snapshot.deduplicated")
+        return snapshot, written
+
+    @traced(detail=True)
+    def restore_snapshot(self, profile_path: str, snapshot_id: int) -> Snapshot:
+        """Put a snapshot back as profile.sii; the version it replaces is snapshotted first"""
+        return self.snapshot_store(profile_path).restore(snapshot_id, os.path.join(profile_path, "profile.sii"))
+
+    def _write_profile(self, profile: ETS2Profile, incremental: bool = True,
+                       log: Callable[[str], None] = print) -> str:
+        """Write the mod list to a (backed up) profile: "patched" or "rewritten" """
+        profile_file = os.path.join(profile.path, "profile.sii")
+        if incremental and os.path.exists(profile_file):
+            try:
+                old_size, new_size = patch_active_mods(profile_file, self.mod_list)
+                log(f"🎮 Successfully installed {len(self.mod_list)} mods!")
+                log(f"✅ Patched active_mods block in place ({old_size:,} → {new_size:,} bytes), all other profile data kept")
+                return "patched"
+            except (SiiPatchError, SiiDecodeError, OSError) as e:
+                log(f"⚠️  Incremental install not possible ({e}), rewriting profile")
+        
+        # Read existing profile data to preserve it
+        profile_name = profile.name
+        company_name = profile.company_name or profile_name
+        experience = profile.xp
+        money_account = 500000  # Default fallback
+        
+        if os.path.exists(profile_file):
+            try:
+                fields = read_profile_fields(profile_file)
+                
+                # Extract existing values to preserve them
+                if fields.money_account is not None:
+                    money_account = fields.money_account
+                
+                # Use existing profile name if found
+                if fields.profile_name:
+                    profile_name = fields.profile_name
+                
+                # Use existing company name if found
+                if fields.company_name:
+                    company_name = fields.company_name
+                    
+            except Exception as e:
+                log(f"⚠️  Warning: Could not read existing profile data: {e}")
+        
+        # Stream the new profile to a temp file and atomically swap it in
+        lines = self._iter_profile_lines(profile_name, company_name, experience, money_account)
+        with atomic_writer(profile_file) as f:
+            f.writelines(lines)
+        
+        log(f"🎮 Successfully installed {len(self.mod_list)} mods!")
+        log(f"✅ Preserved profile data: {profile_name} | Company: {company_name}")
+        log("ℹ️  ETS2 will handle file encoding when you next run the game")
+        return "rewritten"
+
+    def profile_mod_diff(self, profile_path: str) -> Optional[ModListDiff]:
+        """Delta from a profile's active_mods to the collection, or None if unreadable"""
+        try:
+            current = read_profile_fields(os.path.join(profile_path, "profile.sii")).active_mods
+        except (OSError, ValueError):
+            return None
+        return diff_mod_lists(current, self.mod_list)
+
+    def apply_profile_diff(self, profile_path: str, keep_removed: bool = False) -> Tuple[ModListDiff, bool]:
+        """Apply just the delta to a profile's active_mods, patching that block in place
+
+        With `keep_removed`, mods the collection does not list stay active.
+        Nothing is written when that leaves active_mods as it is. Returns the
+        diff and whether profile.sii was written.
+        """
+        profile_file = os.path.join(profile_path, "profile.sii")
+        current = read_profile_fields(profile_file).active_mods
+        diff = diff_mod_lists(current, self.mod_list)
+        if diff.is_empty:
+            return diff, False
+        mods = apply_diff(current, diff, keep_removed)
+        if mods == current:
+            return diff, False
+        self.snapshot_profile(profile_path, len(current), "diff")
+        patch_active_mods(profile_file, mods)
+        return diff, True
+
+    def filter_profiles(self, storage_types: Optional[List[str]] = None,
+                        name_pattern: Optional[str] = None, min_level: int = 0) -> List[ETS2Profile]:
+        """Scanned profiles matching every given filter
+
+        `storage_types` matches case-insensitively ("Local", "OneDrive",
+        "Steam Cloud"); `name_pattern` is a case-insensitive glob on the
+        profile name.
+        """
+        if not self.profiles:
+            self.scan_profiles()
+        
+        wanted = {t.lower() for t in storage_types} if storage_types else None
+        pattern = name_pattern.lower() if name_pattern else None
+        return [
+            p for p in self.profiles
+            if (wanted is None or p.storage_type.lower() in wanted)
+            and (pattern is None or fnmatch.fnmatchcase(p.name.lower(), pattern))
+            and p.level >= min_level
+        ]
+
+    @traced()
+    def install_batch(self, profiles: List[ETS2Profile], workers: int = DEFAULT_INSTALL_WORKERS,
+                      incremental: bool = True) -> Tuple[List[InstallResult], float]:
+        """Install the collection to many profiles concurrently, without prompts
+
+        Returns one InstallResult per profile (in input order) and the total
+        wall-clock time in seconds.
+        """
+        def install(profile: ETS2Profile) -> InstallResult:
+            start = time.perf_counter()
+            try:
+                method = self._install_to_profile(profile, incremental, log=lambda message: None)
+                self.tracer.count(f"install.{method}")
+                return InstallResult(profile.name, profile.path, True, method,
+                                     time.perf_counter() - start)
+            except Exception as e:
+                self.tracer.count(f"install.failed.{type(e).__name__}")
+                return InstallResult(profile.name, profile.path, False, "failed",
+                                     time.perf_counter() - start, str(e))
+        
+        start = time.perf_counter()
+        if workers <= 1 or len(profiles) <= 1:
+            results = [install(p) for p in profiles]
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(profiles))) as pool:
+                results = list(pool.map(install, profiles))
+        return results, time.perf_counter() - start
+
+    def _iter_profile_lines(self, profile_name: str, company_name: str,
+                            experience: int, money_account: int):
+        """Lines of the generated profile.sii, one mod per line"""
+        yield "SiiNunit\n"
+        yield "{\n"
+        yield "\n"
+        yield "profile_data : profile.data {\n"
+        yield f" profile_name: {quote_sii_string(profile_name)}\n"
+        yield f" company_name: {quote_sii_string(company_name)}\n"
+        yield f" experience: {experience}\n"
+        yield f" money_account: {money_account}\n"
+        yield " \n"
+        yield f" active_mods: {len(self.mod_list)}\n"
+        
+        # Add all mods from the collection
+        for i, mod in enumerate(self.mod_list):
+            yield f" active_mods[{i}]: {quote_sii_string(mod)}\n"
+        
+        # Close structure with additional essential data
+        yield "\n"
+        yield " user_data[0]: ff_data\n"
+        yield "}\n"
+        yield "\n"
+        yield "}\n"
+
     def run(self):
         """Run the mod manager with enhanced GUI"""
         # Enhanced Main Header
@@ -480,8 +1112,8 @@ profile_data : profile.data {{
         # Try to show some example mods
         if len(self.mod_list) >= 5:
             print(f"   🔧 Sample Mods:")
-            for i, mod in enumerate(self.mod_list[:5]):
-                mod_display = mod.split('|')[-1] if '|' in mod else mod
+            for i, mod in enumerate(self.load_order.mods[:5]):
+                mod_display = mod.display_name
                 if len(mod_display) > 50:
                     mod_display = mod_display[:47] + "..."
                 print(f"      {i+1}. {mod_display}")
@@ -489,22 +1121,28 @@ profile_data : profile.data {{
                 print(f"      ... and {len(self.mod_list) - 5} more mods")
         
         print(f"\n🛡️  SAFETY FEATURES:")
-        print(f"   ✅ Automatic profile backup (.backup)")
+        print(f"   ✅ Profile snapshot before every install (restorable)")
         print(f"   ✅ Profile detection (Steam/OneDrive/Local)")
         print(f"   ✅ Safe SII file creation")
         print(f"   ✅ ETS2 compatibility")
         
         print("\n" + "="*80)
         
-        # Profile selection
-        if self.select_profile():
+        # Profile selection; edits made in the game meanwhile are picked up
+        watch = self._start_background_watch()
+        try:
+            selected = self.select_profile()
+        finally:
+            if watch is not None:
+                watch.close()
+        if selected:
             print("\n" + "="*80)
             print("🚀 INSTALLATION READY")
             print("="*80)
             print(f"📁 Target Profile: {self.selected_profile.name}")
             print(f"🔢 Mod Count: {self.selected_profile.mods} → {len(self.mod_list)}")
             print(f"💾 Storage: {self.selected_profile.storage_type}")
-            print(f"🛡️  Backup: profile.sii.backup will be created")
+            print(f"🛡️  Backup: a snapshot of profile.sii will be saved first")
             print("="*80)
             
             final_confirm = input("\n🎯 FINAL CONFIRMATION - Proceed with installation? (y/n): ").strip().lower()
@@ -517,7 +1155,8 @@ profile_data : profile.data {{
                     print("🎉 INSTALLATION COMPLETED SUCCESSFULLY!")
                     print("="*80)
                     print(f"✅ {len(self.mod_list)} mods installed to '{self.selected_profile.name}'")
-                    print("✅ Original profile backed up")
+                    print("✅ Previous profile saved as a snapshot")
+                    print(f"   (restore it with: snapshots \"{self.selected_profile.path}\" --restore ID)")
                     print("✅ ETS2 ready to launch")
                     print("\n🎮 NEXT STEPS:")
                     print("   1. Launch Euro Truck Simulator 2")
@@ -526,7 +1165,7 @@ profile_data : profile.data {{
                     print("="*80)
                 else:
                     print("\n❌ INSTALLATION FAILED!")
-                    print("🛡️  Your original profile backup is safe")
+                    print("🛡️  Your profile snapshots are safe")
             else:
                 print("\n❌ Installation cancelled by user")
         else:
@@ -535,6 +1174,370 @@ profile_data : profile.data {{
         print("\n" + "="*80)
         input("Press Enter to exit...")
 
+def _print_records(records: List[dict], output_format: str):
+    """Write records to stdout as NDJSON (one per line) or a JSON array"""
+    if output_format == "json":
+        json.dump(records, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+    else:
+        for record in records:
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def _storage_type_for(path: str) -> str:
+    return "Steam Cloud" if "userdata" in path else "OneDrive" if "OneDrive" in path else "Local"
+
+def _is_profile_backup(name: str) -> bool:
+    """Folders like "4A6F65 (1).bak" left behind by the game"""
+    return "(" in name and ".bak" in name
+
+def _cmd_scan(manager: ETS2ModManager, args) -> int:
+    manager.scan_profiles(args.roots or None)
+    _print_records([manager._profile_to_record(p) for p in manager.profiles], args.format)
+    return 0
+
+def _cmd_mods(manager: ETS2ModManager, args) -> int:
+    index = manager.index_mods(args.roots or None, workers=args.workers, processes=args.processes)
+    records = []
+    for archive in sorted(index.archives.values(), key=lambda a: a.path):
+        record = asdict(archive)
+        if args.files:
+            record["files"] = list(index.iter_files(archive))
+        else:
+            del record["files"]
+        records.append(record)
+    _print_records(records, args.format)
+    return 0
+
+def _cmd_conflicts(manager: ETS2ModManager, args) -> int:
+    load_order = manager.mod_list
+    if args.profile:
+        profile_file = os.path.join(os.path.abspath(args.profile), "profile.sii")
+        try:
+            load_order = read_profile_fields(profile_file).active_mods
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not read {profile_file}: {e}", file=sys.stderr)
+            return 1
+    index = manager.index_mods(args.roots or None, workers=args.workers)
+    report = manager.find_conflicts(load_order, index)
+    names = dict(parse_mod_entry(entry) for entry in load_order)
+    _print_records(conflict_records(report, names), args.format)
+    return 1 if report.missing else 0
+
+def _cmd_saves(manager: ETS2ModManager, args) -> int:
+    profiles = [os.path.abspath(path) for path in args.profiles] or None
+    index = manager.analyze_saves(profiles, workers=args.workers, processes=not args.threads)
+    if args.remove or args.collection:
+        if args.remove:
+            broken = index.broken_by(args.remove, profiles)
+        else:
+            broken = manager.saves_broken_by_collection(index, profiles)
+        records = [{"type": "breaks", "profile": b.save.profile, "save": b.save.slot,
+                    "path": b.save.path, "missing": b.missing} for b in broken]
+        _print_records(records, args.format)
+        return 1 if broken else 0
+    
+    wanted = set(profiles) if profiles else None
+    records = []
+    for info in sorted(index.saves.values(), key=lambda i: (i.profile, i.slot)):
+        if wanted is None or info.profile in wanted:
+            records.append(dict(asdict(info), type="save", save=info.slot))
+    _print_records(records, args.format)
+    return 0
+
+def _cmd_snapshots(manager: ETS2ModManager, args) -> int:
+    path = os.path.abspath(args.profile)
+    if args.keep is not None:
+        manager.snapshot_keep = args.keep
+    if args.budget is not None:
+        manager.snapshot_budget = args.budget * 1024 * 1024
+    try:
+        if args.restore is not None:
+            snapshot = manager.restore_snapshot(path, args.restore)
+            manager._log(f"✅ Restored snapshot #{snapshot.id} from {snapshot.created_at} to {path}")
+        elif args.remove is not None:
+            manager.snapshot_store(path).remove(args.remove)
+        elif args.create:
+            manager.snapshot_profile(path, reason="manual")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    store = manager.snapshot_store(path)
+    if args.prune:
+        store.prune()
+    records = []
+    for snapshot in store.history():
+        blob = store.blobs.get(snapshot.sha256)
+        records.append(dict(asdict(snapshot), created_at=snapshot.created_at,
+                            stored_size=blob.stored_size if blob else None,
+                            codec=blob.codec if blob else None))
+    _print_records(records, args.format)
+    return 0
+
+def _cmd_manifest(manager: ETS2ModManager, args) -> int:
+    manifest = manager.update_manifest(args.mod_dir, workers=args.workers)
+    _print_records([dict(entry, mod=mod_id) for mod_id, entry in manifest["mods"].items()], args.format)
+    return 0
+
+def _cmd_sync(manager: ETS2ModManager, args) -> int:
+    budget = args.budget * 1024 * 1024 if args.budget is not None else None
+    try:
+        results = manager.sync_mods(args.remote, args.mod_dir, args.store, budget, args.workers)
+    except OSError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    _print_records([asdict(r) for r in results], args.format)
+    return 1 if any(r.action in ("missing", "failed") for r in results) else 0
+
+def _cmd_load_order(manager: ETS2ModManager, args) -> int:
+    if args.write:
+        manager.load_order.save(args.write, legacy=args.legacy)
+        manager._log(f"✅ Wrote {len(manager.load_order)} mods to {args.write}")
+    records = [
+        {"priority": i, "package_id": mod.package_id, "name": mod.display_name, "workshop": mod.is_workshop}
+        for i, mod in enumerate(manager.load_order)
+    ]
+    _print_records(records, args.format)
+    return 0
+
+def _cmd_show(manager: ETS2ModManager, args) -> int:
+    records = []
+    for path in args.profiles:
+        path = os.path.abspath(path)
+        profile = manager._read_profile(path, _storage_type_for(path))
+        if profile is None:
+            print(f"❌ Not a readable profile: {path}", file=sys.stderr)
+            return 1
+        record = manager._profile_to_record(profile)
+        profile_file = os.path.join(path, "profile.sii")
+        try:
+            with open(profile_file, 'rb') as f:
+                record["format"] = detect_sii_format(f.read(HEAD_SIZE))
+            record["active_mods"] = read_profile_fields(profile_file).active_mods
+        except (OSError, ValueError) as e:
+            record["format"] = None
+            record["error"] = str(e)
+        records.append(record)
+    _print_records(records, args.format)
+    return 0
+
+def _cmd_watch(manager: ETS2ModManager, args) -> int:
+    manager.scan_profiles(args.roots or None)
+    _print_records([dict(manager._profile_to_record(p), event="listed") for p in manager.profiles],
+                   "ndjson")
+    sys.stdout.flush()
+    try:
+        source = manager.open_profile_watch(args.roots or None, args.backend, args.interval)
+    except OSError as e:
+        print(f"❌ Cannot watch profile folders: {e}", file=sys.stderr)
+        return 1
+    batches = 0
+    
+    def report(refresh: ProfileRefresh):
+        nonlocal batches
+        records = [dict(manager._profile_to_record(p), event="added") for p in refresh.added]
+        records += [dict(manager._profile_to_record(p), event="updated") for p in refresh.updated]
+        records += [{"event": "removed", "path": path} for path in refresh.removed]
+        _print_records(records, "ndjson")
+        sys.stdout.flush()
+        batches += 1
+        if batches == args.batches:
+            source.close()
+    
+    try:
+        with source:
+            manager.watch_profiles(report, source, debounce=args.debounce)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def _cmd_install(manager: ETS2ModManager, args) -> int:
+    if not manager.mod_list:
+        print("❌ No mods loaded!", file=sys.stderr)
+        return 1
+    if args.profiles:
+        profiles = []
+        for path in args.profiles:
+            path = os.path.abspath(path)
+            profile = manager._read_profile(path, _storage_type_for(path))
+            if profile is None:
+                print(f"❌ Not a readable profile: {path}", file=sys.stderr)
+                return 1
+            profiles.append(profile)
+    else:
+        manager.scan_profiles(args.roots or None)
+        profiles = manager.filter_profiles(args.storage, args.name, args.min_level)
+    
+    results, elapsed = manager.install_batch(profiles, args.workers, incremental=not args.full)
+    records = [asdict(r) for r in results]
+    _print_records(records, args.format)
+    failed = sum(1 for r in results if not r.success)
+    manager._log(f"📊 {len(results) - failed}/{len(results)} profiles updated in {elapsed:.2f}s")
+    return 1 if failed or not results else 0
+
+def _cmd_diff(manager: ETS2ModManager, args) -> int:
+    records = []
+    for path in args.profiles:
+        path = os.path.abspath(path)
+        try:
+            applied = False
+            if args.apply:
+                diff, applied = manager.apply_profile_diff(path, keep_removed=args.keep_removed)
+            else:
+                diff = manager.profile_mod_diff(path)
+                if diff is None:
+                    raise OSError("profile.sii not readable")
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not diff {path}: {e}", file=sys.stderr)
+            return 1
+        records.append({
+            "profile": path,
+            "added": [{"index": ti, "mod": mod} for ti, mod in diff.added],
+            "removed": [{"index": ci, "mod": mod} for ci, mod in diff.removed],
+            "moved": [{"from": ci, "to": ti, "mod": mod} for ci, ti, mod in diff.moved],
+            "unchanged": diff.unchanged,
+            "applied": applied,
+        })
+    _print_records(records, args.format)
+    return 0
+
+def main(argv=None):
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="ETS2 Mod Manager. Without a command, starts the interactive installer.")
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="status messages on stderr (-vv for diagnostics)")
+    parser.add_argument("--load-order", metavar="FILE", help="load order JSON (default: load_order.json)")
+    parser.add_argument("--format", choices=("ndjson", "json"), default="ndjson",
+                        help="output format for commands (default: ndjson)")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the profile cache")
+    parser.add_argument("--scan-workers", type=int, default=DEFAULT_SCAN_WORKERS,
+                        help="threads used to read profiles")
+    parser.add_argument("--game-dir", dest="game_dirs", action="append", metavar="DIR",
+                        help="\"Euro Truck Simulator 2\" folder holding profiles/ and mod/; repeatable "
+                             "(default: the usual Documents/OneDrive locations)")
+    parser.add_argument("--steam-path", metavar="DIR", help="Steam install folder (default: from the registry)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write timing spans and counters as Chrome trace-event JSON")
+    parser.add_argument("--trace-summary", action="store_true",
+                        help="print a table of timings and counters on stderr when done")
+    commands = parser.add_subparsers(dest="command")
+    
+    scan = commands.add_parser("scan", help="list profiles found under the given roots")
+    scan.add_argument("roots", nargs="*", help="profiles folders (default: the usual Windows/Steam locations)")
+    
+    watch = commands.add_parser("watch", help="print profiles as they change on disk (NDJSON)")
+    watch.add_argument("roots", nargs="*", help="profiles folders (default: the usual Windows/Steam locations)")
+    watch.add_argument("--backend", choices=("auto", "inotify", "polling"), default="auto",
+                       help="change notification (default: inotify on Linux, else polling)")
+    watch.add_argument("--interval", type=float, default=1.0, help="polling interval in seconds")
+    watch.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                       help="quiet seconds that end a burst of changes")
+    watch.add_argument("--batches", type=int, default=0, help="exit after this many updates (default: run until Ctrl+C)")
+    
+    show = commands.add_parser("show", help="details and active mods of profile folders")
+    show.add_argument("profiles", nargs="+", help="profile folders")
+    
+    diff = commands.add_parser("diff", help="compare profiles' active mods with the load order")
+    diff.add_argument("profiles", nargs="+", help="profile folders")
+    diff.add_argument("--apply", action="store_true", help="write just the delta to each profile's active_mods")
+    diff.add_argument("--keep-removed", action="store_true",
+                      help="with --apply, keep mods the load order does not list")
+    
+    mods = commands.add_parser("mods", help="index mod archives and list them")
+    mods.add_argument("roots", nargs="*", help="mod / workshop content folders (default: the usual locations)")
+    mods.add_argument("--workers", type=int, default=DEFAULT_INDEX_WORKERS, help="archives read in parallel")
+    mods.add_argument("--processes", action="store_true", help="use processes instead of threads")
+    mods.add_argument("--files", action="store_true", help="include each archive's file list")
+    
+    saves = commands.add_parser("saves", help="mods and DLC each save depends on; saves that removing mods would break")
+    saves.add_argument("profiles", nargs="*", help="profile folders (default: all profiles found)")
+    saves.add_argument("--remove", nargs="+", metavar="MOD", help="list saves that need any of these package ids")
+    saves.add_argument("--collection", action="store_true",
+                       help="list saves that need mods the load order does not have")
+    saves.add_argument("--workers", type=int, default=DEFAULT_SAVE_WORKERS, help="saves read in parallel")
+    saves.add_argument("--threads", action="store_true", help="use threads instead of processes")
+    
+    conflicts = commands.add_parser("conflicts", help="report missing mods and mods overriding each other's files")
+    conflicts.add_argument("roots", nargs="*", help="mod / workshop content folders (default: the usual locations)")
+    conflicts.add_argument("--profile", metavar="PATH", help="check this profile's active mods instead of the load order")
+    conflicts.add_argument("--workers", type=int, default=DEFAULT_INDEX_WORKERS, help="archives read in parallel")
+    
+    snapshots = commands.add_parser("snapshots", help="list, create or restore a profile's profile.sii snapshots")
+    snapshots.add_argument("profile", help="profile folder")
+    snapshot_action = snapshots.add_mutually_exclusive_group()
+    snapshot_action.add_argument("--restore", type=int, metavar="ID",
+                                 help="put this snapshot back (the current profile.sii is snapshotted first)")
+    snapshot_action.add_argument("--remove", type=int, metavar="ID", help="delete this snapshot")
+    snapshot_action.add_argument("--create", action="store_true", help="snapshot the current profile.sii")
+    snapshots.add_argument("--prune", action="store_true", help="apply the retention policy now")
+    snapshots.add_argument("--keep", type=int, help=f"snapshots kept per profile (default: {DEFAULT_KEEP})")
+    snapshots.add_argument("--budget", type=int, metavar="MB",
+                           help=f"compressed size kept per profile (default: {DEFAULT_BUDGET // (1024 * 1024)})")
+    
+    manifest = commands.add_parser("manifest", help="record hashes and sizes of the collection's local archives")
+    manifest.add_argument("mod_dir", help="mod folder holding the collection's archives")
+    manifest.add_argument("--workers", type=int, default=DEFAULT_HASH_WORKERS, help="files hashed in parallel")
+    
+    sync = commands.add_parser("sync", help="fetch the manifest's archives through the local content store")
+    sync.add_argument("remote", help="folder holding the published archives")
+    sync.add_argument("--mod-dir", help="mod folder to fill (default: the Documents mod folder)")
+    sync.add_argument("--store", help="content store folder (default: mod_store next to the manager)")
+    sync.add_argument("--budget", type=int, metavar="MB", help="evict unused store objects above this size")
+    sync.add_argument("--workers", type=int, default=DEFAULT_HASH_WORKERS, help="archives handled in parallel")
+    
+    load_order = commands.add_parser("load-order", help="validate the load order and list it, optionally converting it")
+    load_order.add_argument("--write", metavar="FILE", help="save the load order in the versioned format")
+    load_order.add_argument("--legacy", action="store_true", help="with --write, save the plain JSON string array")
+    
+    install = commands.add_parser("install", help="install the load order without prompts")
+    install.add_argument("roots", nargs="*", help="profiles folders to scan (default: the usual locations)")
+    install.add_argument("--profile", dest="profiles", action="append", metavar="PATH",
+                         help="install to this profile folder instead of scanning; repeatable")
+    install.add_argument("--storage", action="append", metavar="TYPE",
+                         help="only profiles with this storage type (Local, OneDrive, Steam Cloud); repeatable")
+    install.add_argument("--name", metavar="PATTERN", help="only profiles whose name matches this glob")
+    install.add_argument("--min-level", type=int, default=0, help="only profiles at or above this level")
+    install.add_argument("--workers", type=int, default=DEFAULT_INSTALL_WORKERS,
+                         help="concurrent profile writes")
+    install.add_argument("--full", action="store_true",
+                         help="regenerate profile.sii instead of patching the active_mods block")
+    args = parser.parse_args(argv)
+    
+    tracer = Tracer(enabled=bool(args.trace or args.trace_summary))
+    try:
+        return _run_command(args, tracer)
+    finally:
+        if args.trace:
+            tracer.write_json(args.trace)
+        if args.trace_summary:
+            tracer.print_summary(sys.stderr)
+
+def _run_command(args, tracer: Tracer) -> int:
+    if args.command is None:
+        try:
+            manager = ETS2ModManager(scan_workers=args.scan_workers, use_cache=not args.no_cache,
+                                     verbosity=1 + args.verbose, load_order_file=args.load_order,
+                                     game_dirs=args.game_dirs, steam_path=args.steam_path,
+                                     tracer=tracer)
+        except LoadOrderError:
+            return 2
+        manager.run()
+        return 0
+    
+    try:
+        manager = ETS2ModManager(scan_workers=args.scan_workers, use_cache=not args.no_cache,
+                                 verbosity=args.verbose, log_stream=sys.stderr,
+                                 load_order_file=args.load_order,
+                                 game_dirs=args.game_dirs, steam_path=args.steam_path,
+                                 tracer=tracer)
+    except LoadOrderError:
+        return 2
+    handlers = {"scan": _cmd_scan, "show": _cmd_show, "install": _cmd_install, "diff": _cmd_diff,
+                "mods": _cmd_mods, "conflicts": _cmd_conflicts,
+                "manifest": _cmd_manifest, "sync": _cmd_sync, "load-order": _cmd_load_order,
+                "watch": _cmd_watch, "saves": _cmd_saves, "snapshots": _cmd_snapshots}
+    return handlers[args.command](manager, args)
+
 if __name__ == "__main__":
-    manager = ETS2ModManager()
-    manager.run()
+    sys.exit(main())
\ No newline at end of file
@@ -213,7 +213,7 @@ echo.
 echo The installer will:
 echo ✅ Scan for ETS2 profiles
 echo ✅ Let you choose which profile to modify
-echo ✅ Create backup (.backup)
+echo ✅ Save a restorable snapshot of the profile
 echo ✅ Install mod collection
 echo.
 choice /c YN /m "Begin installation? (Y/N)"
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Asyncio API for ETS2 Mod Manager
+Discovery, parsing, backup, write and verify as cancellable coroutines that
+stream progress events, with the blocking filesystem work run on an executor
+"""
+
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, List, Optional, Set
+
+# Profiles installed at once by install(); writes are I/O bound
+DEFAULT_CONCURRENCY = 4
+
+STARTED = "started"
+PROGRESS = "progress"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+@dataclass
+class ProgressEvent:
+    """One step of an operation: stage, status, and how far along it is"""
+    stage: str  # discover, parse, scan, backup, write, verify or install
+    status: str  # started, progress, done, failed or cancelled
+    done: int = 0
+    total: int = 0
+    path: str = ""
+    messages: List[str] = field(default_factory=list)
+    result: Any = None
+
+
+class AsyncModManager:
+    """Async front end over an ETS2ModManager
+
+    Every operation is an async generator of ProgressEvent; its last event
+    carries the result. Cancelling the consuming task stops the operation:
+    queued work is dropped, and a step already running on the executor
+    (an atomic profile write, say) is allowed to finish so no profile is
+    left half-done.
+    """
+
+    def __init__(self, manager, executor: Optional[Executor] = None):
+        self.manager = manager
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max(1, manager.scan_workers),
+                                                       thread_name_prefix="ets2-async")
+        self._pending: Set[asyncio.Future] = set()
+
+    async def __aenter__(self) -> "AsyncModManager":
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._own_executor:
+            # Queued work is dropped, running work finishes (shutdown's
+            # cancel_futures does the same, but needs Python 3.9)
+            for future in list(self._pending):
+                future.cancel()
+            self.executor.shutdown(wait=True)
+
+    def _submit(self, func, *args, **kwargs) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return future
+
+    async def _step(self, func, *args, **kwargs):
+        """Run one blocking step; if cancelled meanwhile, let it finish first"""
+        future = self._submit(func, *args, **kwargs)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await asyncio.wait([future])
+            raise
+
+    async def discover(self, locations: Optional[List[str]] = None) -> AsyncIterator[ProgressEvent]:
+        """Profile folders from names and stat alone (phase one of a scan)"""
+        yield ProgressEvent("discover", STARTED)
+        listing = await self._step(self.manager.list_profiles, locations)
+        yield ProgressEvent("discover", DONE, len(listing), len(listing), result=listing)
+
+    async def parse(self, listing) -> AsyncIterator[ProgressEvent]:
+        """Parse listed profiles in parallel, one event per profile as it completes"""
+        total = len(listing)
+        yield ProgressEvent("parse", STARTED, 0, total)
+        pending = {self._submit(profile.details): profile for profile in listing}
+        done = 0
+        try:
+            for next_done in asyncio.as_completed(pending):
+                profile = await next_done
+                done += 1
+                yield ProgressEvent("parse", PROGRESS, done, total,
+                                    path=profile.path if profile else "", result=profile)
+        except asyncio.CancelledError:
+            # Drops parses not yet started; running ones finish on their own
+            for future in pending:
+                future.cancel()
+            raise
+        finally:
+            await self._step(self.manager.save_profile_cache)
+        yield ProgressEvent("parse", DONE, done, total)
+
+    async def scan(self, locations: Optional[List[str]] = None) -> AsyncIterator[ProgressEvent]:
+        """discover() then parse(); the final event's result is the sorted profile list"""
+        listing = []
+        async for event in self.discover(locations):
+            if event.status == DONE:
+                listing = event.result
+            yield event
+        async for event in self.parse(listing):
+            yield event
+        profiles = [p.details() for p in listing if p.details()]
+        profiles.sort(key=lambda p: p.mods, reverse=True)
+        self.manager.profiles = profiles
+        yield ProgressEvent("scan", DONE, len(profiles), len(listing), result=profiles)
+
+    async def install_profile(self, profile, incremental: bool = True,
+                              verify: bool = True) -> AsyncIterator[ProgressEvent]:
+        """Backup, write and verify one profile; the final event's result is the write method
+
+        Verifying reads profile.sii back, which is as costly as the write.
+        """
+        manager = self.manager
+        yield ProgressEvent("install", STARTED, path=profile.path)
+        if incremental and await self._step(manager.profile_up_to_date, profile.path):
+            yield ProgressEvent("install", DONE, path=profile.path, result="unchanged",
+                                messages=[f"✅ {profile.name} already has the {len(manager.mod_list)} "
+                                          "mods in order, nothing to write"])
+            return
+        stages = (
+            ("backup", manager._backup_profile, (profile,)),
+            ("write", manager._write_profile, (profile, incremental)),
+        )
+        method = None
+        for stage, func, args in stages:
+            messages = []
+            yield ProgressEvent(stage, STARTED, path=profile.path)
+            try:
+                result = await self._step(func, *args, log=messages.append)
+            except Exception as e:
+                messages.append(f"❌ {e}")
+                yield ProgressEvent(stage, FAILED, path=profile.path, messages=messages, result=e)
+                yield ProgressEvent("install", FAILED, path=profile.path, result=e)
+                return
+            method = result if stage == "write" else method
+            yield ProgressEvent(stage, DONE, path=profile.path, messages=messages, result=result)
+
+        if not verify:
+            yield ProgressEvent("install", DONE, path=profile.path, result=method)
+            return
+        yield ProgressEvent("verify", STARTED, path=profile.path)
+        ok = await self._step(manager.profile_up_to_date, profile.path)
+        yield ProgressEvent("verify", DONE if ok else FAILED, path=profile.path, result=ok,
+                            messages=[] if ok else ["❌ profile.sii does not list the collection after writing"])
+        yield ProgressEvent("install", DONE if ok else FAILED, path=profile.path, result=method)
+
+    async def install(self, profiles, incremental: bool = True, verify: bool = True,
+                      concurrency: int = DEFAULT_CONCURRENCY) -> AsyncIterator[ProgressEvent]:
+        """install_profile() over several profiles at once, events interleaved
+
+        `done` / `total` on the "install" events count finished profiles.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        total = len(profiles)
+
+        async def run(profile):
+            async with semaphore:
+                async for event in self.install_profile(profile, incremental, verify):
+                    queue.put_nowait(event)
+
+        runner = asyncio.gather(*(run(profile) for profile in profiles), return_exceptions=True)
+        # None marks the end of the event stream
+        runner.add_done_callback(lambda _: queue.put_nowait(None))
+        finished = 0
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                if event.stage == "install" and event.status != STARTED:
+                    finished += 1
+                    event.done, event.total = finished, total
+                yield event
+        except BaseException:
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+            raise
+        for outcome in runner.result():
+            if isinstance(outcome, BaseException):
+                raise outcome
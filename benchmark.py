@@ -0,0 +1,1149 @@
+#!/usr/bin/env python3
+"""
+ETS2 Mod Manager - Benchmarks
+Synthetic fixtures and timings for the profile pipeline
+
+Usage: python benchmark.py [benchmark ...] [--json FILE] [--compare FILE]
+       python benchmark.py --write-fixtures [DIR]
+       python benchmark.py --write-tree DIR [--profiles N]
+"""
+
+import argparse
+import asyncio
+import difflib
+import contextlib
+import io
+import json
+import platform
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sii import (
+    decode_sii_text, find_active_mods_block, format_sii_text, iter_sii_fields, patch_active_mods,
+    read_profile_fields,
+)
+from async_api import AsyncModManager
+from fs_walk import atomic_writer, link_or_copy
+from instrumentation import Tracer
+from mod_conflicts import analyze_conflicts
+from mod_diff import apply_diff, diff_mod_lists
+from load_order import LoadOrder
+from mod_index import ModArchive, ModIndex, index_archive
+from mod_store import ModStore, build_manifest_mods, hash_files, sync_mods
+from profile_cache import ProfileCache
+from profile_snapshots import SnapshotStore
+from save_analyzer import SaveIndex, read_save_dependencies
+from sii_binary import SiiToken, SiiUnit, decode_bsii, encode_bsii, encrypt_scsc
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+BENCHMARKS = {}
+
+# Stage records of the benchmark being run, by benchmark name (see measure())
+RESULTS: Dict[str, List[dict]] = {}
+_current: List[str] = []
+# Failed correctness checks, as "benchmark: what" (see check())
+FAILURES: List[str] = []
+# Slowest acceptable refresh after a change, by watch backend (seconds)
+WATCH_LATENCY_LIMIT = {"inotify": 1.0, "polling": 2.0}
+# Slowest acceptable stop after an async scan or install is cancelled (seconds)
+CANCEL_LATENCY_LIMIT = 1.0
+
+
+def benchmark(name):
+    """Register a benchmark under a command-line name"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def measure(stage: str, func, repeat: int = 3, items: int = 0, nbytes: int = 0) -> dict:
+    """Time `func` (best of `repeat`), then its peak traced memory in a separate run
+
+    The record is printed and kept in RESULTS for --json output.
+    """
+    elapsed = best_of(func, repeat)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    record = {"stage": stage, "seconds": elapsed, "peak_bytes": peak}
+    line = f"   {stage:<28} {elapsed * 1000:>9.1f} ms  peak {peak / 2**20:>7.2f} MiB"
+    if items:
+        record["items"] = items
+        record["items_per_s"] = items / elapsed
+        line += f"  {items / elapsed:>9.0f} /s"
+    if nbytes:
+        record["bytes"] = nbytes
+        record["mib_per_s"] = nbytes / 2**20 / elapsed
+        line += f"  {nbytes / 2**20 / elapsed:>7.1f} MiB/s"
+    print(line)
+    RESULTS.setdefault(_current[-1] if _current else "", []).append(record)
+    return record
+
+
+def check(ok: bool, what: str) -> bool:
+    """Record a correctness check; any failed check makes the run exit non-zero"""
+    if not ok:
+        FAILURES.append(f"{_current[-1] if _current else ''}: {what}")
+        print(f"   ❌ check failed: {what}")
+    return ok
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """Best wall-clock time of several runs, in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def make_profile_units(lines: int, mods: int = 56, name: str = "Rodrigo") -> List[SiiUnit]:
+    """Synthetic profile.sii units padded with user_data to roughly `lines` text lines"""
+    active_mods = []
+    for i in range(mods):
+        if i % 3:
+            active_mods.append(f"mod_workshop_package.{i:016X}|Workshop Mod {i}")
+        else:
+            active_mods.append(f"local_mod_{i}|Local Mod {i}")
+    filler = max(0, lines - mods - 20)
+    fields = {
+        "face": 0,
+        "brand": SiiToken("scania"),
+        "map_path": "/map/europe.mbd",
+        "logo": ".logo.a",
+        "company_name": f"{name} Logistics",
+        "male": True,
+        "cached_experience": 1234567,
+        "cached_distance": 98765,
+        "money_account": 2500000,
+        "active_mods": active_mods,
+        "user_data": [f"{i:08x}deadbeefcafebabe{i:08x}" for i in range(filler)],
+        "profile_name": name,
+        "creation_time": 1690000000,
+        "save_time": 1690100000,
+    }
+    return [SiiUnit("user_profile", SiiToken("_nameless.1f2.3a4b.5c60"), fields)]
+
+
+def make_profile_text(lines: int, mods: int = 56, name: str = "Rodrigo") -> str:
+    """Synthetic text profile.sii of roughly `lines` lines"""
+    return format_sii_text(make_profile_units(lines, mods, name))
+
+
+def make_profile_binary(lines: int, mods: int = 56, name: str = "Rodrigo",
+                        encrypted: bool = False) -> bytes:
+    """Synthetic BSII profile.sii, optionally wrapped in ScsC"""
+    data = encode_bsii(make_profile_units(lines, mods, name))
+    return encrypt_scsc(data, iv=bytes(16)) if encrypted else data
+
+
+def write_sii_fixtures(directory: str):
+    """Write one text, binary and encrypted profile.sii fixture"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "profile_text.sii"), 'w', encoding='utf-8') as f:
+        f.write(make_profile_text(200))
+    with open(os.path.join(directory, "profile_binary.sii"), 'wb') as f:
+        f.write(make_profile_binary(200))
+    with open(os.path.join(directory, "profile_encrypted.sii"), 'wb') as f:
+        f.write(make_profile_binary(200, encrypted=True))
+
+
+def make_profile_tree(root: str, profiles: int, lines: int = 500, saves: int = 3,
+                      sizes: Sequence[int] = (), first: int = 0) -> str:
+    """Synthetic `profiles` folder: hex-named profiles with profile.sii and save folders
+
+    Text and binary profiles alternate; with `sizes`, the line counts cycle
+    through it instead of using `lines`.
+    """
+    location = os.path.join(root, "profiles")
+    for i in range(first, first + profiles):
+        name = f"Driver{i:04d}"
+        profile_path = os.path.join(location, name.encode('utf-8').hex().upper())
+        os.makedirs(profile_path, exist_ok=True)
+        if sizes:
+            lines = sizes[(i // 2) % len(sizes)]
+        if i % 2:
+            data = make_profile_text(lines, mods=i % 80, name=name).encode('utf-8')
+        else:
+            data = make_profile_binary(lines, mods=i % 80, name=name)
+        with open(os.path.join(profile_path, "profile.sii"), 'wb') as f:
+            f.write(data)
+        for save in range(saves):
+            os.makedirs(os.path.join(profile_path, "save", f"{save + 1}"), exist_ok=True)
+    return location
+
+
+def make_game_tree(root: str, profiles: int, steam_users: int = 2, steam_profiles: int = 25,
+                   sizes: Sequence[int] = (200, 2000, 10000), saves: int = 5):
+    """Documents and Steam-userdata style layouts under `root`
+
+    Returns (game_dir, steam_path) for ETS2ModManager(game_dirs=..., steam_path=...).
+    """
+    game_dir = os.path.join(root, "Documents", "Euro Truck Simulator 2")
+    steam_path = os.path.join(root, "Steam")
+    make_profile_tree(game_dir, profiles, saves=saves, sizes=sizes)
+    for user in range(steam_users):
+        remote = os.path.join(steam_path, "userdata", str(10_000_000 + user), "227300", "remote")
+        make_profile_tree(remote, steam_profiles, saves=saves, sizes=sizes,
+                          first=profiles + user * steam_profiles)
+    return game_dir, steam_path
+
+
+def make_save_heavy_tree(root: str, profiles: int, saves: int) -> str:
+    """Profiles without profile.sii, each with `saves` save folders (save-count fallback path)"""
+    location = os.path.join(root, "profiles")
+    for i in range(profiles):
+        profile_path = os.path.join(location, f"Driver{i:04d}".encode('utf-8').hex().upper())
+        for save in range(saves):
+            os.makedirs(os.path.join(profile_path, "save", f"autosave_{save}"))
+    return location
+
+
+def make_mod_archive(path: str, package: str, files: int, paths: List[str] = ()) -> str:
+    """Zip-based mod archive with a manifest.sii and `files` small members"""
+    manifest = (f'SiiNunit\n{{\nmod_package : .{package}\n{{\n'
+                f' package_version: "1.{files % 10}"\n display_name: "{package}"\n'
+                f' author: "benchmark"\n}}\n}}\n')
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("manifest.sii", manifest)
+        for member in paths:
+            zf.writestr(member, b"x")
+        for i in range(files):
+            zf.writestr(f"def/{package}/unit_{i:05d}.sii", b"SiiNunit\n{\n}\n")
+    return path
+
+
+def make_mod_tree(root: str, local: int, workshop: int, files: int = 200) -> str:
+    """Mods folder with `local` archives plus `workshop` numeric workshop item folders"""
+    location = os.path.join(root, "mod")
+    os.makedirs(location, exist_ok=True)
+    for i in range(local):
+        make_mod_archive(os.path.join(location, f"local_mod_{i:04d}.scs"), f"local_mod_{i:04d}", files)
+    for i in range(workshop):
+        item = os.path.join(location, str(2_000_000_000 + i))
+        os.makedirs(item)
+        make_mod_archive(os.path.join(item, "universal.scs"), f"workshop_{i:04d}", files)
+    return location
+
+
+def make_save_units(companies: int, mods: Sequence[str], dlc: Sequence[str] = ()) -> List[SiiUnit]:
+    """Synthetic game.sii: an economy unit with dependencies, then `companies` company units"""
+    dependencies = [f"dlc|{d}|{d.upper()}" for d in dlc] + [f"mod|{m}|Mod {m}" for m in mods]
+    units = [SiiUnit("economy", SiiToken("_nameless.1.2"), {
+        "bank": SiiToken("_nameless.1.3"),
+        "game_time": 123456,
+        "dependencies": dependencies,
+        "experience_points": 1234567,
+    })]
+    for i in range(companies):
+        units.append(SiiUnit("company", SiiToken(f"company.volatile.c{i % 997}.city{i % 113}"), {
+            "permanent_data": SiiToken(f"company.permanent.c{i % 997}"),
+            "job_offer": [SiiToken(f"_nameless.{i:x}.{j:x}") for j in range(6)],
+            "cargo_offer_seeds": [i * 31 + j for j in range(12)],
+            "discovered": bool(i % 2),
+            "reserved_trailer_slot": 0,
+            "state": 1.5,
+            "state_change_time": i,
+            "description": f"Depot {i} on the road to {i % 113}",
+        }))
+    return units
+
+
+def write_save(profile_path: str, slot: str, units: List[SiiUnit], sii_format: str = "text") -> str:
+    """Save folder `slot` with a game.sii in the given format"""
+    folder = os.path.join(profile_path, "save", slot)
+    os.makedirs(folder, exist_ok=True)
+    if sii_format == "text":
+        data = format_sii_text(units).encode('utf-8')
+    else:
+        data = encode_bsii(units)
+        if sii_format == "encrypted":
+            data = encrypt_scsc(data, iv=bytes(16))
+    with open(os.path.join(folder, "game.sii"), 'wb') as f:
+        f.write(data)
+    return folder
+
+
+def quiet_manager(**kwargs):
+    """ETS2ModManager with its console output suppressed"""
+    from ETS2_Mod_Manager import ETS2ModManager
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ETS2ModManager(**kwargs)
+
+
+def _regex_profile_fields(path: str):
+    """The previous approach: read everything, one regex scan per field"""
+    with open(path, 'rb') as f:
+        content = f.read().decode('utf-8', errors='ignore')
+    re.search(r'company_name[^:]*:\s*"([^"]*)"', content)
+    re.search(r'profile_name[^:]*:\s*"([^"]*)"', content)
+    re.search(r'experience[^:]*:\s*(\d+)', content)
+    re.search(r'active_mods\s*:\s*(\d+)', content)
+    re.findall(r'active_mods\[\d+\]\s*:\s*"([^"]*)"', content)
+    re.search(r'money_account[^:]*:\s*(\d+)', content)
+
+
+@benchmark("sii-extract")
+def bench_sii_extract():
+    """Streaming single-pass extractor vs. per-field regex scans"""
+    print(f"{'lines':>8} {'size KB':>9} {'regex ms':>10} {'stream ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for lines in (1000, 5000, 10000, 25000, 50000):
+            path = os.path.join(tmp, f"profile_{lines}.sii")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(make_profile_text(lines))
+            size = os.path.getsize(path) / 1024
+            regex_time = best_of(lambda: _regex_profile_fields(path))
+            stream_time = best_of(lambda: read_profile_fields(path))
+            print(f"{lines:>8} {size:>9.0f} {regex_time * 1000:>10.2f} {stream_time * 1000:>10.2f}")
+
+
+def make_binary_blob(size: int, seed: int = 0) -> bytes:
+    """Binary SII-like data: random bytes interleaved with field-like text runs"""
+    rng = random.Random(seed)
+    words = [b"active_mods", b"company_name", b"profile_name", b"cached_experience",
+             b"mod_workshop_package.00000000CE350CEA|Ford Trucks F-MAX"]
+    parts = []
+    total = 0
+    while total < size:
+        noise = bytes(rng.getrandbits(8) for _ in range(rng.randint(4, 48)))
+        word = rng.choice(words)
+        parts += (noise, word)
+        total += len(noise) + len(word)
+    # Tile a small pattern so large samples are cheap to build
+    blob = b"".join(parts)
+    return (blob * (size // len(blob) + 1))[:size]
+
+
+def _legacy_printable_runs(path: str) -> str:
+    """The previous per-byte extraction loop"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    text_parts = []
+    current_text = ""
+    for byte in data:
+        if 32 <= byte <= 126:
+            current_text += chr(byte)
+        else:
+            if len(current_text) > 5:
+                text_parts.append(current_text)
+            current_text = ""
+    if current_text and len(current_text) > 5:
+        text_parts.append(current_text)
+    return ' '.join(text_parts)
+
+
+@benchmark("sii-decode")
+def bench_sii_decode():
+    """Binary SII printable-run decoder throughput"""
+    print(f"{'size MB':>8} {'legacy MB/s':>12} {'mmap+re MB/s':>13}")
+    pattern = make_binary_blob(256 * 1024)
+    with tempfile.TemporaryDirectory() as tmp:
+        for megabytes in (1, 4, 16, 64):
+            path = os.path.join(tmp, f"profile_{megabytes}.sii")
+            with open(path, 'wb') as f:
+                for _ in range(megabytes * 4):
+                    f.write(pattern)
+            new_time = best_of(lambda: decode_sii_text(path), repeat=3)
+            if megabytes <= 4:
+                legacy = f"{megabytes / best_of(lambda: _legacy_printable_runs(path), repeat=1):>12.1f}"
+            else:
+                legacy = f"{'skipped':>12}"
+            print(f"{megabytes:>8} {legacy} {megabytes / new_time:>13.1f}")
+
+
+@benchmark("sii-binary")
+def bench_sii_binary():
+    """Profile field extraction per format (text / BSII / ScsC)"""
+    print(f"{'lines':>8} {'text ms':>9} {'binary ms':>10} {'encrypted ms':>13} {'enc KB':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for lines in (200, 1000, 5000):
+            paths = {}
+            for kind, data in (("text", make_profile_text(lines).encode('utf-8')),
+                               ("binary", make_profile_binary(lines)),
+                               ("encrypted", make_profile_binary(lines, encrypted=True))):
+                paths[kind] = os.path.join(tmp, f"{kind}_{lines}.sii")
+                with open(paths[kind], 'wb') as f:
+                    f.write(data)
+            times = {kind: best_of(lambda: read_profile_fields(path), repeat=3) * 1000
+                     for kind, path in paths.items()}
+            size = os.path.getsize(paths["encrypted"]) / 1024
+            print(f"{lines:>8} {times['text']:>9.2f} {times['binary']:>10.2f} "
+                  f"{times['encrypted']:>13.2f} {size:>7.0f}")
+        if os.path.isdir(FIXTURES_DIR):
+            for name in sorted(os.listdir(FIXTURES_DIR)):
+                path = os.path.join(FIXTURES_DIR, name)
+                if name.endswith(".sii"):
+                    ms = best_of(lambda: read_profile_fields(path), repeat=3) * 1000
+                    print(f"   fixture {name}: {ms:.2f} ms")
+
+
+@benchmark("scan")
+def bench_scan():
+    """scan_profiles over a synthetic tree, by worker count"""
+    with tempfile.TemporaryDirectory() as tmp:
+        location = make_profile_tree(tmp, 300)
+        print(f"   {len(os.listdir(location))} profiles in {location}")
+        print(f"{'workers':>8} {'scan ms':>9} {'profiles':>9}")
+        for workers in (1, 2, 4, 8, 16):
+            manager = quiet_manager(scan_workers=workers, use_cache=False)
+
+            def scan():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    manager.scan_profiles([location])
+
+            elapsed = best_of(scan, repeat=3)
+            print(f"{workers:>8} {elapsed * 1000:>9.1f} {len(manager.profiles):>9}")
+
+
+@benchmark("cache")
+def bench_cache():
+    """Cold scan vs. warm start from the persistent profile cache"""
+    with tempfile.TemporaryDirectory() as tmp:
+        location = make_profile_tree(tmp, 300)
+        cache_file = os.path.join(tmp, "profile_cache.json")
+
+        def scan(warm: bool):
+            if not warm and os.path.exists(cache_file):
+                os.remove(cache_file)
+            manager = quiet_manager(use_cache=False)
+            manager.profile_cache = ProfileCache(cache_file).load()
+            with contextlib.redirect_stdout(io.StringIO()):
+                manager.scan_profiles([location])
+            return manager
+
+        cold = best_of(lambda: scan(False), repeat=3)
+        warm = best_of(lambda: scan(True), repeat=3)
+        cache = scan(True).profile_cache
+        print(f"   cold: {cold * 1000:.1f} ms   warm: {warm * 1000:.1f} ms   "
+              f"(warm hits {cache.hits}, misses {cache.misses})")
+
+
+def _legacy_discovery(location: str, calls: dict):
+    """The previous listdir/isdir/exists/getmtime discovery, with its calls counted"""
+    def counted(kind, func):
+        def wrapper(*args):
+            calls[kind] = calls.get(kind, 0) + 1
+            return func(*args)
+        return wrapper
+
+    listdir = counted("listdir", os.listdir)
+    isdir = counted("isdir", os.path.isdir)
+    exists = counted("exists", os.path.exists)
+    getmtime = counted("getmtime", os.path.getmtime)
+
+    if not exists(location):
+        return
+    for profile_dir in listdir(location):
+        profile_path = os.path.join(location, profile_dir)
+        if isdir(profile_path):
+            exists(os.path.join(profile_path, "profile.sii"))
+            save_path = os.path.join(profile_path, "save")
+            if exists(save_path):
+                [d for d in listdir(save_path) if isdir(os.path.join(save_path, d))]
+            getmtime(profile_path)
+
+
+@benchmark("walk")
+def bench_walk():
+    """Discovery syscalls: listdir+isdir vs. scandir walker (10k save folders)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        location = make_save_heavy_tree(tmp, 200, 50)
+        legacy_calls = {}
+        legacy = best_of(lambda: _legacy_discovery(location, {}), repeat=3)
+        _legacy_discovery(location, legacy_calls)
+
+        manager = quiet_manager(use_cache=False, scan_workers=1)
+
+        def scan():
+            with contextlib.redirect_stdout(io.StringIO()):
+                manager.scan_profiles([location])
+
+        walker = best_of(scan, repeat=3)
+        calls = manager.last_scan_syscalls
+        print(f"   legacy: {sum(legacy_calls.values()):>6} calls {legacy * 1000:8.1f} ms  {legacy_calls}")
+        print(f"   scandir: {sum(calls.values()):>5} calls {walker * 1000:8.1f} ms  {calls}")
+
+
+def _legacy_install(path: str, mods: List[str]):
+    """The previous install write: string concatenation, then an in-place write"""
+    sii_content = "SiiNunit\n{\n\nprofile_data : profile.data {\n"
+    sii_content += f" active_mods: {len(mods)}\n"
+    for i, mod in enumerate(mods):
+        sii_content += f' active_mods[{i}]: "{mod}"\n'
+    sii_content += "\n user_data[0]: ff_data\n}\n\n}\n"
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(sii_content)
+
+
+@benchmark("install")
+def bench_install():
+    """install_mods write path: concatenation vs. streamed atomic write, copy vs. link backup"""
+    print(f"{'mods':>8} {'concat ms':>10} {'atomic ms':>10} {'copy2 ms':>9} {'link ms':>8} {'method':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        profile_file = os.path.join(tmp, "profile.sii")
+        backup_file = profile_file + ".backup"
+        manager = quiet_manager(use_cache=False)
+        for count in (100, 1000, 10000):
+            mods = [f"mod_workshop_package.{i:016X}|Workshop Mod {i}" for i in range(count)]
+            manager.load_order = LoadOrder.from_entries(mods)
+            legacy = best_of(lambda: _legacy_install(profile_file, mods), repeat=3)
+
+            def write():
+                with atomic_writer(profile_file) as f:
+                    f.writelines(manager._iter_profile_lines("Bench", "Bench", 0, 0))
+
+            atomic = best_of(write, repeat=3)
+            copy = best_of(lambda: shutil.copy2(profile_file, backup_file), repeat=3)
+            link = best_of(lambda: link_or_copy(profile_file, backup_file), repeat=3)
+            method = link_or_copy(profile_file, backup_file)
+            print(f"{count:>8} {legacy * 1000:>10.2f} {atomic * 1000:>10.2f} "
+                  f"{copy * 1000:>9.2f} {link * 1000:>8.2f} {method:>9}")
+
+
+@benchmark("patch")
+def bench_patch():
+    """In-place active_mods patch: time vs. file size and vs. mod block size"""
+    print(f"{'lines':>8} {'file KB':>8} {'mods':>6} {'patch ms':>9} {'kept':>5}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profile.sii")
+        for lines, mods in ((1000, 100), (50000, 100), (200000, 100), (1000, 1000), (1000, 10000)):
+            original = make_profile_text(lines).encode('utf-8')
+            new_mods = [f"mod_workshop_package.{i:016X}|Patched Mod {i}" for i in range(mods)]
+
+            def patch():
+                with open(path, 'wb') as f:
+                    f.write(original)
+                start = time.perf_counter()
+                patch_active_mods(path, new_mods)
+                return time.perf_counter() - start
+
+            elapsed = min(patch() for _ in range(3))
+            with open(path, 'rb') as f:
+                patched = f.read()
+            old_start, old_end, _, _ = find_active_mods_block(original)
+            new_start, new_end, _, _ = find_active_mods_block(patched)
+            kept = (original[:old_start] == patched[:new_start]
+                    and original[old_end:] == patched[new_end:])
+            print(f"{lines:>8} {len(original) / 1024:>8.0f} {mods:>6} {elapsed * 1000:>9.2f} {'yes' if kept else 'NO':>5}")
+            check(kept, f"{lines} lines, {mods} mods: bytes outside active_mods changed")
+            check(read_profile_fields(path).active_mods == new_mods,
+                  f"{lines} lines, {mods} mods: patched active_mods do not match")
+
+
+@benchmark("batch")
+def bench_batch():
+    """Batch install of the collection to many profiles, by worker count"""
+    print(f"{'workers':>8} {'profiles':>9} {'wall ms':>9} {'ok':>4}")
+    for workers in (1, 4, 8):
+        with tempfile.TemporaryDirectory() as tmp:
+            location = make_profile_tree(tmp, 100, lines=2000, saves=0)
+            manager = quiet_manager(use_cache=False)
+            manager.snapshot_dir = os.path.join(tmp, "snapshots")
+            with contextlib.redirect_stdout(io.StringIO()):
+                manager.scan_profiles([location])
+            results, elapsed = manager.install_batch(manager.profiles, workers=workers)
+            ok = sum(1 for r in results if r.success)
+            print(f"{workers:>8} {len(results):>9} {elapsed * 1000:>9.1f} {ok:>4}")
+            check(len(results) == len(manager.profiles) == 100,
+                  f"{workers} workers: {len(results)} results for {len(manager.profiles)} profiles")
+            check(ok == len(results), f"{workers} workers: {len(results) - ok} profile(s) failed")
+
+
+@benchmark("listing")
+def bench_listing():
+    """Time to first listing (names + stat) vs. time to full profile detail"""
+    with tempfile.TemporaryDirectory() as tmp:
+        location = make_profile_tree(tmp, 300, lines=2000)
+        print(f"{'workers':>8} {'first ms':>9} {'detail ms':>10} {'eager ms':>9}")
+        for workers in (1, 8):
+            manager = quiet_manager(scan_workers=workers, use_cache=False)
+            first = detail = 0.0
+            for _ in range(3):
+                started = time.perf_counter()
+                listing = manager.list_profiles([location])
+                listed = time.perf_counter()
+                manager.load_details(listing)
+                finished = time.perf_counter()
+                first = min(first or listed - started, listed - started)
+                detail = min(detail or finished - started, finished - started)
+
+            def scan():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    manager.scan_profiles([location])
+
+            eager = best_of(scan, repeat=3)
+            print(f"{workers:>8} {first * 1000:>9.1f} {detail * 1000:>10.1f} {eager * 1000:>9.1f}")
+
+
+@benchmark("modindex")
+def bench_modindex():
+    """Mod archive index: cold by pool type, zipfile baseline, incremental refresh"""
+    with tempfile.TemporaryDirectory() as tmp:
+        location = make_mod_tree(tmp, 600, 400, files=300)
+        archives = [os.path.join(d, f) for d, _, names in os.walk(location) for f in names]
+        print(f"   {len(archives)} archives x 301 members")
+
+        def with_zipfile():
+            for path in archives:
+                with zipfile.ZipFile(path) as zf:
+                    zf.namelist()
+                    zf.read("manifest.sii")
+
+        def with_mmap():
+            for path in archives:
+                st = os.stat(path)
+                index_archive(path, "", st.st_size, st.st_mtime_ns)
+
+        print(f"   zipfile (namelist + manifest), 1 thread: {best_of(with_zipfile, 3) * 1000:.0f} ms")
+        print(f"   mmap central directory,        1 thread: {best_of(with_mmap, 3) * 1000:.0f} ms")
+        for workers, processes in ((1, False), (8, False), (4, True), (8, True)):
+            elapsed = best_of(lambda: ModIndex().update([location], workers, processes), 3)
+            kind = "processes" if processes else "threads"
+            print(f"   cold index, {workers} {kind:<9}: {elapsed * 1000:.0f} ms")
+
+        index = ModIndex().update([location])
+        warm = best_of(lambda: index.update([location]), 3)
+        for path in archives[:10]:
+            os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        started = time.perf_counter()
+        index.update([location])
+        touched = time.perf_counter() - started
+        print(f"   unchanged refresh: {warm * 1000:.1f} ms   "
+              f"10 touched: {touched * 1000:.1f} ms ({index.indexed} re-indexed)")
+        check(index.indexed == 10, f"10 touched archives, {index.indexed} re-indexed")
+
+
+def make_overlapping_index(mods: int, paths_per_mod: int, shared: float = 0.3,
+                           path: Optional[str] = None) -> ModIndex:
+    """ModIndex whose mods share a `shared` fraction of their paths
+
+    In memory, or with `path` keeping the member lists on disk.
+    """
+    rng = random.Random(13)
+    common = [f"vehicle/ai/common_{i:07d}.sii" for i in range(paths_per_mod)]
+    index = ModIndex(path)
+    for m in range(mods):
+        own = int(paths_per_mod * (1 - shared))
+        files = [f"def/mod{m:03d}/dir{i % 97:02d}/file_{i:07d}.sii" for i in range(own)]
+        # Fresh string objects, as if decoded from separate archives
+        files += ["".join(p) for p in rng.sample(common, paths_per_mod - own)]
+        index._store([ModArchive(path=f"/mods/m{m}.scs", mod_id=f"m{m}", size=0, mtime_ns=0,
+                                 format="zip", files=files, file_count=len(files))])
+    return index
+
+
+def _naive_conflicts(load_order: List[str], index: ModIndex) -> dict:
+    """The obvious approach: path -> list of mod id strings, no interning"""
+    providers = {}
+    for archive in index.archives.values():
+        for path in archive.files:
+            providers.setdefault(path, []).append(archive.mod_id)
+    return {path: mods for path, mods in providers.items() if len(mods) > 1}
+
+
+@benchmark("conflicts")
+def bench_conflicts():
+    """Conflict analysis over ~1M game paths: time, resident index, peak ("streamed": lists on disk)"""
+    for mods, per_mod in ((56, 5_000), (56, 20_000)):
+        load_order = [f"m{m}|Mod {m}" for m in range(mods)]
+        found = {}
+        for label, func, on_disk in (("naive", _naive_conflicts, False),
+                                     ("interned", analyze_conflicts, False),
+                                     ("streamed", analyze_conflicts, True)):
+            with tempfile.TemporaryDirectory() as tmp:
+                tracemalloc.start()
+                index = make_overlapping_index(mods, per_mod,
+                                               path=os.path.join(tmp, "mod_index.json") if on_disk else None)
+                resident = tracemalloc.get_traced_memory()[0]
+                started = time.perf_counter()
+                result = func(load_order, index)
+                elapsed = time.perf_counter() - started
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                if func is analyze_conflicts:
+                    found[label] = [(c.winner, c.shadowed, c.paths) for c in result.conflicts]
+                del result, index
+            print(f"   {mods * per_mod:>9,} paths  {label:<9} {elapsed * 1000:>7.0f} ms  "
+                  f"index {resident / 2**20:>6.1f} MiB  peak {peak / 2**20:>6.1f} MiB")
+        check(found["streamed"] == found["interned"], f"{mods * per_mod:,} paths: streamed conflicts differ")
+
+
+@benchmark("store")
+def bench_store():
+    """Content store: SHA-256 throughput by thread count, cold vs. warm sync"""
+    with tempfile.TemporaryDirectory() as tmp:
+        remote = os.path.join(tmp, "remote")
+        os.makedirs(remote)
+        block = os.urandom(1024 * 1024)
+        for i in range(16):
+            with open(os.path.join(remote, f"pack_{i:02d}.scs"), 'wb') as f:
+                f.write(i.to_bytes(4, 'little'))
+                for _ in range(16):
+                    f.write(block)
+        paths = sorted(os.path.join(remote, name) for name in os.listdir(remote))
+        total = sum(os.path.getsize(p) for p in paths)
+        for workers in (1, 4):
+            elapsed = best_of(lambda: hash_files(paths, workers), 3)
+            print(f"   hash {total / 2**20:.0f} MiB, {workers} threads: {elapsed * 1000:.0f} ms "
+                  f"({total / 2**20 / elapsed:.0f} MiB/s)")
+
+        mods = build_manifest_mods(remote, [f"pack_{i:02d}" for i in range(16)])
+        store = ModStore(os.path.join(tmp, "store")).load()
+        mod_dir = os.path.join(tmp, "mod")
+        for label in ("cold (fetch + verify)", "warm (all present)"):
+            started = time.perf_counter()
+            results = sync_mods(store, mods, remote, mod_dir)
+            elapsed = time.perf_counter() - started
+            actions = sorted({r.action for r in results})
+            print(f"   sync {label:<22} {elapsed * 1000:>6.0f} ms  {actions}")
+        shutil.rmtree(mod_dir)
+        started = time.perf_counter()
+        results = sync_mods(store, mods, remote, mod_dir)
+        print(f"   sync {'relink from store':<22} {(time.perf_counter() - started) * 1000:>6.0f} ms  "
+              f"{sorted({r.action for r in results})}")
+
+
+def edit_mod_list(mods: List[str], edits: int, seed: int = 15) -> List[str]:
+    """Copy of `mods` with `edits` each of insertions, deletions and moves"""
+    rng = random.Random(seed)
+    target = list(mods)
+    for i in range(edits):
+        target.insert(rng.randrange(len(target) + 1), f"new_mod_{i}|New Mod {i}")
+        del target[rng.randrange(len(target))]
+        target.insert(rng.randrange(len(target)), target.pop(rng.randrange(len(target))))
+    return target
+
+
+@benchmark("diff")
+def bench_diff():
+    """Mod list diff on 10k entries with small edits: LIS diff vs. difflib"""
+    current = [f"mod_workshop_package.{i:016X}|Mod {i}" for i in range(10_000)]
+    for edits in (1, 10, 100):
+        target = edit_mod_list(current, edits)
+        diff = diff_mod_lists(current, target)
+        check(apply_diff(current, diff) == target, f"{edits} edits: applying the diff does not give the target")
+        ours = best_of(lambda: diff_mod_lists(current, target), 5)
+        apply = best_of(lambda: apply_diff(current, diff), 5)
+        matcher = best_of(lambda: difflib.SequenceMatcher(None, current, target, autojunk=False)
+                          .get_opcodes(), 1)
+        print(f"   {edits:>3} edits x3: diff {ours * 1000:6.1f} ms  apply {apply * 1000:5.1f} ms  "
+              f"difflib {matcher * 1000:7.1f} ms  ({diff.summary()})")
+
+
+@benchmark("loadorder")
+def bench_loadorder():
+    """Load order: legacy string array vs. versioned format, and id lookups"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (1_000, 100_000):
+            entries = [f"mod_workshop_package.{i:016X}|Workshop Mod {i}" if i % 2
+                       else f"local_mod_{i}|Local Mod {i}" for i in range(count)]
+            order = LoadOrder.from_entries(entries)
+            legacy = os.path.join(tmp, "legacy.json")
+            versioned = os.path.join(tmp, "versioned.json")
+            order.save(legacy, legacy=True)
+            order.save(versioned)
+
+            def raw_json():
+                with open(legacy, 'rb') as f:
+                    return json.loads(f.read().decode('utf-8'))
+
+            raw = best_of(raw_json, 3)
+            old = best_of(lambda: LoadOrder.load(legacy), 3)
+            new = best_of(lambda: LoadOrder.load(versioned), 3)
+            probes = [entries[i].partition('|')[0] for i in range(0, count, max(1, count // 100))]
+            scan = best_of(lambda: [any(e.startswith(p + '|') for e in entries) for p in probes], 1)
+            lookup = best_of(lambda: [p in order for p in probes], 3)
+            print(f"   {count:>7,} mods: raw json {raw * 1000:6.1f} ms  legacy {old * 1000:6.1f} ms  "
+                  f"versioned {new * 1000:6.1f} ms  | {len(probes)} lookups: "
+                  f"list scan {scan * 1000:7.1f} ms, dict {lookup * 1e6:5.0f} µs")
+
+
+@benchmark("pipeline")
+def bench_pipeline():
+    """Per-stage timings of discovery, parsing, scanning and installing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        game_dir, steam_path = make_game_tree(tmp, 100)
+        manager = quiet_manager(use_cache=False, game_dirs=[game_dir], steam_path=steam_path,
+                                verbosity=0)
+        manager.snapshot_dir = os.path.join(tmp, "snapshots")
+        listing = manager.list_profiles()
+        paths = [p.path for p in listing]
+        files = [os.path.join(path, "profile.sii") for path in paths]
+        total = sum(os.path.getsize(f) for f in files)
+        print(f"   {len(paths)} profiles ({total / 2**20:.1f} MiB of profile.sii) "
+              f"in {len(manager._default_locations())} locations")
+
+        measure("discover (names + stat)", manager.list_profiles, items=len(paths))
+        by_kind: Dict[str, List[str]] = {}
+        for f in files:
+            with open(f, 'rb') as fh:
+                kind = "text" if fh.read(8) == b'SiiNunit' else "binary"
+            size = os.path.getsize(f)
+            bucket = "small" if size < 64 * 1024 else "medium" if size < 512 * 1024 else "large"
+            by_kind.setdefault(f"parse {kind} {bucket}", []).append(f)
+        for stage in sorted(by_kind):
+            group = by_kind[stage]
+            measure(stage, lambda: [read_profile_fields(f) for f in group], items=len(group),
+                    nbytes=sum(os.path.getsize(f) for f in group))
+        measure("read profiles (1 thread)",
+                lambda: [manager._read_profile(p, "Local") for p in paths], items=len(paths), nbytes=total)
+        measure("scan_profiles (cold)", manager.scan_profiles, items=len(paths), nbytes=total)
+
+        warm = quiet_manager(use_cache=False, game_dirs=[game_dir], steam_path=steam_path, verbosity=0)
+        warm.profile_cache = ProfileCache(os.path.join(tmp, "profile_cache.json")).load()
+        warm.scan_profiles()
+        measure("scan_profiles (warm cache)", warm.scan_profiles, items=len(paths))
+
+        manager.scan_profiles()
+        profiles = manager.profiles
+        orders = [LoadOrder.from_entries(manager.mod_list),
+                  LoadOrder.from_entries(list(reversed(manager.mod_list)))]
+        for label, incremental in (("install patch", True), ("install rewrite", False)):
+            def install():
+                # Alternate load orders so every run has something to write
+                manager.load_order = orders[0]
+                orders.reverse()
+                return manager.install_batch(profiles, workers=1, incremental=incremental)
+
+            measure(label, install, items=len(profiles), nbytes=total)
+
+
+@benchmark("trace")
+def bench_trace():
+    """Cost of instrumentation: scan_profiles with tracing off vs. on"""
+    with tempfile.TemporaryDirectory() as tmp:
+        location = make_profile_tree(tmp, 300, lines=500)
+        tracer = Tracer(enabled=True)
+        managers = {label: quiet_manager(scan_workers=1, use_cache=False, verbosity=0, tracer=t)
+                    for label, t in (("off", None), ("on", tracer))}
+        best = {}
+        # Interleaved rounds so page cache and CPU frequency affect both alike
+        for _ in range(5):
+            for label, manager in managers.items():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    started = time.perf_counter()
+                    manager.scan_profiles([location])
+                    elapsed = time.perf_counter() - started
+                best[label] = min(best.get(label, elapsed), elapsed)
+        for label, elapsed in best.items():
+            print(f"   tracing {label:<3}: {elapsed * 1000:7.1f} ms")
+        print(f"   overhead: {(best['on'] / best['off'] - 1) * 100:+.1f}% "
+              f"({len(tracer.spans) // 5} spans per scan)")
+        print()
+        tracer.print_summary()
+
+
+@benchmark("watch")
+def bench_watch():
+    """Watch mode: latency from a profile edit to the refreshed list, per backend"""
+    import queue
+    import threading
+
+    with tempfile.TemporaryDirectory() as tmp:
+        location = make_profile_tree(tmp, 200, lines=2000)
+        paths = sorted(os.path.join(location, name) for name in os.listdir(location))
+        print(f"{'backend':>8} {'change':<16} {'latency ms':>11} {'re-read':>8} {'profiles':>9}")
+        for backend in ("inotify", "polling"):
+            tracer = Tracer(enabled=True)
+            manager = quiet_manager(scan_workers=1, use_cache=True, verbosity=0, tracer=tracer)
+            manager.profile_cache = ProfileCache(os.path.join(tmp, f"cache-{backend}.json"))
+            manager.scan_profiles([location])
+            try:
+                source = manager.open_profile_watch([location], backend, interval=0.2)
+            except OSError as e:
+                print(f"{backend:>8} unavailable: {e}")
+                continue
+            refreshes = queue.Queue()
+            thread = threading.Thread(target=manager.watch_profiles,
+                                      args=(refreshes.put, source), kwargs={"debounce": 0.05},
+                                      daemon=True)
+            thread.start()
+            new_profile = os.path.join(location, "4E6577" + backend.encode().hex().upper())
+
+            def edit():
+                target = os.path.join(paths[1], "profile.sii")
+                with atomic_writer(target, binary=True) as f:
+                    f.write(make_profile_text(2000, mods=7, name="Edited").encode('utf-8'))
+
+            def burst():
+                # A game save: several writes of profile.sii in a row
+                target = os.path.join(paths[3], "profile.sii")
+                for mods in (10, 11, 12, 13, 14):
+                    with open(target, 'w', encoding='utf-8') as f:
+                        f.write(make_profile_text(2000, mods=mods, name="Saved"))
+                    time.sleep(0.01)
+
+            def add():
+                make_profile_tree(os.path.join(tmp, "new"), 1)
+                shutil.move(os.path.join(tmp, "new", "profiles", os.listdir(os.path.join(tmp, "new", "profiles"))[0]),
+                            new_profile)
+
+            def remove():
+                shutil.rmtree(new_profile)
+
+            # (label, change, expected (updated, added, removed) profile paths)
+            for label, change, expected in (("edit (rename)", edit, ([paths[1]], [], [])),
+                                            ("burst (5 writes)", burst, ([paths[3]], [], [])),
+                                            ("new profile", add, ([], [new_profile], [])),
+                                            ("delete profile", remove, ([], [], [new_profile]))):
+                reads_before = sum(1 for span in tracer.spans if span[0] == "_read_profile")
+                started = time.perf_counter()
+                change()
+                try:
+                    refresh = refreshes.get(timeout=10)
+                except queue.Empty:
+                    print(f"{backend:>8} {label:<16} {'timeout':>11}")
+                    check(False, f"{backend} {label}: no refresh within 10 s")
+                    continue
+                latency = time.perf_counter() - started
+                reads = sum(1 for span in tracer.spans if span[0] == "_read_profile") - reads_before
+                print(f"{backend:>8} {label:<16} {latency * 1000:>11.1f} {reads:>8} {len(manager.profiles):>9}")
+                seen = ([p.path for p in refresh.updated], [p.path for p in refresh.added], refresh.removed)
+                check(seen == expected, f"{backend} {label}: refreshed {seen}, expected {expected}")
+                check(reads == len(expected[0]) + len(expected[1]),
+                      f"{backend} {label}: {reads} profiles re-read")
+                check(latency <= WATCH_LATENCY_LIMIT[backend],
+                      f"{backend} {label}: {latency * 1000:.0f} ms, limit {WATCH_LATENCY_LIMIT[backend] * 1000:.0f} ms")
+                # Let any trailing events settle before the next change
+                time.sleep(0.3)
+                while not refreshes.empty():
+                    refreshes.get()
+            source.close()
+            thread.join()
+
+
+@benchmark("saves")
+def bench_saves():
+    """Save analyzer: streamed vs. whole-file parsing of big saves, cold and cached index"""
+    collection = [f"mod_workshop_package.{i:016X}" for i in range(1, 60)]
+    with tempfile.TemporaryDirectory() as tmp:
+        big = os.path.join(tmp, "big")
+        units = make_save_units(30000, collection[:40], ("eut2_east", "eut2_north"))
+        text = os.path.join(write_save(big, "text", units, "text"), "game.sii")
+        binary = os.path.join(write_save(big, "binary", units, "binary"), "game.sii")
+        for label, path in (("text", text), ("binary", binary)):
+            size = os.path.getsize(path)
+            print(f"   {label} game.sii: {size / 2**20:.1f} MiB")
+            measure(f"{label} streamed", lambda: read_save_dependencies(path), repeat=2, nbytes=size)
+            if label == "text":
+                measure(f"{label} whole file", lambda: list(iter_sii_fields([decode_sii_text(path)], ("dependencies",))),
+                        repeat=2, nbytes=size)
+            else:
+                measure(f"{label} decode_bsii", lambda: [u for u in decode_bsii(open(path, 'rb').read())
+                                                         if u.type == "economy"], repeat=2, nbytes=size)
+        del units
+
+        location = os.path.join(tmp, "profiles")
+        formats = ("text", "binary", "binary", "encrypted")
+        for p in range(8):
+            profile = os.path.join(location, f"{p:02X}")
+            for slot, sii_format in enumerate(formats):
+                companies = 200 if sii_format == "encrypted" else 4000
+                write_save(profile, f"{slot + 1}", make_save_units(companies, collection[p:p + 30]), sii_format)
+        profiles = sorted(os.path.join(location, name) for name in os.listdir(location))
+        total = sum(os.path.getsize(os.path.join(d, "game.sii")) for d, _, names in os.walk(location)
+                    if "game.sii" in names)
+        saves = len(profiles) * len(formats)
+        print(f"   {saves} saves, {total / 2**20:.1f} MiB ({os.cpu_count()} CPU)")
+        for label, workers, processes in (("1 worker", 1, False), ("4 threads", 4, False),
+                                          ("4 processes", 4, True)):
+            measure(f"index cold, {label}", lambda: SaveIndex().update(profiles, workers, processes),
+                    repeat=2, items=saves, nbytes=total)
+        index = SaveIndex(os.path.join(tmp, "save_index.json"))
+        index.update(profiles, 4, True)
+        index.save()
+        measure("index warm (cached)", lambda: SaveIndex(index.path).load().update(profiles), items=saves)
+        removed = collection[33:36]
+        broken = index.broken_by(removed)
+        measure("broken_by 3 mods", lambda: index.broken_by(removed), repeat=5)
+        print(f"   removing {len(removed)} mods breaks {len(broken)} of {saves} saves")
+
+
+@benchmark("async")
+def bench_async():
+    """Async API: scan / batch install vs. the blocking calls, and cancellation latency"""
+    with tempfile.TemporaryDirectory() as tmp:
+        location = make_profile_tree(tmp, 200, lines=2000)
+        manager = quiet_manager(scan_workers=4, use_cache=False, verbosity=0)
+        manager.snapshot_dir = os.path.join(tmp, "snapshots")
+
+        async def drain(events) -> int:
+            count = 0
+            async for _ in events:
+                count += 1
+            return count
+
+        async def scan_async():
+            async with AsyncModManager(manager) as api:
+                return await drain(api.scan([location]))
+
+        measure("scan_profiles (blocking)", lambda: manager.scan_profiles([location]), items=200)
+        measure("scan (async events)", lambda: asyncio.run(scan_async()), items=200)
+        profiles = manager.profiles
+        orders = [LoadOrder.from_entries(manager.mod_list),
+                  LoadOrder.from_entries(list(reversed(manager.mod_list)))]
+
+        def swap():
+            manager.load_order = orders[0]
+            orders.reverse()
+
+        async def install_async(verify: bool = True):
+            async with AsyncModManager(manager) as api:
+                return await drain(api.install(profiles, verify=verify, concurrency=4))
+
+        measure("install_batch (blocking)", lambda: (swap(), manager.install_batch(profiles, workers=4)),
+                items=len(profiles))
+        measure("install (async, no verify)", lambda: (swap(), asyncio.run(install_async(False))),
+                items=len(profiles))
+        measure("install (async + verify)", lambda: (swap(), asyncio.run(install_async())), items=len(profiles))
+
+        async def cancel_after(make_events, after: float):
+            task = asyncio.create_task(make_events())
+            await asyncio.sleep(after)
+            started = time.perf_counter()
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            return time.perf_counter() - started
+
+        async def cancelled_scan():
+            fresh = quiet_manager(scan_workers=4, use_cache=False, verbosity=0)
+            async with AsyncModManager(fresh) as api:
+                await drain(api.scan([location]))
+
+        swap()
+        for label, make_events in (("scan", cancelled_scan), ("install", install_async)):
+            latency = asyncio.run(cancel_after(make_events, 0.1))
+            print(f"   cancel mid-{label:<8} stopped after {latency * 1000:6.1f} ms")
+            check(latency <= CANCEL_LATENCY_LIMIT,
+                  f"cancelled {label} took {latency * 1000:.0f} ms to stop, "
+                  f"limit {CANCEL_LATENCY_LIMIT * 1000:.0f} ms")
+
+
+@benchmark("snapshots")
+def bench_snapshots():
+    """Profile snapshots: new and deduplicated snapshots vs. the .backup hardlink, restore, retention"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, data in (("text 2k lines", make_profile_text(2000).encode('utf-8')),
+                            ("text 20k lines", make_profile_text(20000).encode('utf-8')),
+                            ("binary 20k lines", make_profile_binary(20000))):
+            profile_file = os.path.join(tmp, "profile.sii")
+            with open(profile_file, 'wb') as f:
+                f.write(data)
+            store = SnapshotStore(os.path.join(tmp, "store"), profile_file).load()
+            edits = iter(range(10 ** 6))
+            print(f"   {label}: {len(data) / 1024:.0f} KB")
+            measure("  .backup hardlink", lambda: link_or_copy(profile_file, profile_file + ".backup"))
+            measure("  snapshot, new contents",
+                    lambda: store.add(data + b"# %d\n" % next(edits)), nbytes=len(data))
+            snapshot, _ = store.add(data)
+            measure("  snapshot, identical", lambda: store.add(data), nbytes=len(data))
+            blob = store.blobs[snapshot.sha256]
+            print(f"     stored {blob.stored_size / 1024:.0f} KB ({blob.size / blob.stored_size:.1f}x, {blob.codec})")
+            measure("  restore", lambda: store.restore(snapshot.id, profile_file), nbytes=len(data))
+            shutil.rmtree(store.root)
+
+        # Repeated installs cycling through a few mod lists, as users do
+        data = make_profile_text(2000).encode('utf-8')
+        variants = [data.replace(b"active_mods: 56", b"active_mods: %d" % (56 + v)) for v in range(5)]
+        for count in (10, 200):
+            store = SnapshotStore(os.path.join(tmp, f"store{count}"), keep=count).load()
+            for i in range(count):
+                store.add(variants[i % len(variants)])
+            oldest = min(store.snapshots)
+            measure(f"open + list, {count} snaps", lambda: SnapshotStore(store.root).load().history(),
+                    items=count)
+            measure(f"open + restore oldest, {count}",
+                    lambda: SnapshotStore(store.root).load().restore(oldest, os.path.join(tmp, "restored.sii")))
+            print(f"     {len(store.snapshots)} snapshots in {len(store.blobs)} blobs, "
+                  f"{store.stored_size / 1024:.0f} KB stored vs. {count * len(data) / 1024:.0f} KB as copies")
+        store = SnapshotStore(os.path.join(tmp, "budget"), budget=64 * 1024).load()
+        for i in range(100):
+            store.add(data + b"# %d\n" % i)
+        print(f"   64 KB budget after 100 distinct installs: {len(store.snapshots)} snapshots "
+              f"(#{', #'.join(str(s.id) for s in reversed(store.history()))}), "
+              f"{store.stored_size / 1024:.0f} KB")
+
+
+def compare_results(previous_file: str):
+    """Print each stage's time against a previous --json run"""
+    with open(previous_file, 'r', encoding='utf-8') as f:
+        previous = json.load(f)["results"]
+    print(f"\n📊 Compared with {previous_file}:")
+    for name, records in RESULTS.items():
+        before = {r["stage"]: r for r in previous.get(name, [])}
+        for record in records:
+            old = before.get(record["stage"])
+            if old:
+                change = (record["seconds"] / old["seconds"] - 1) * 100 if old["seconds"] else 0
+                print(f"   {name}/{record['stage']:<28} {old['seconds'] * 1000:>9.1f} → "
+                      f"{record['seconds'] * 1000:>9.1f} ms ({change:+.0f}%)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="ETS2 Mod Manager benchmarks")
+    parser.add_argument("benchmarks", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--write-fixtures", nargs="?", const=FIXTURES_DIR, metavar="DIR",
+                        help="write SII fixture files and exit")
+    parser.add_argument("--write-tree", metavar="DIR",
+                        help="write a Documents + Steam userdata profile tree and exit")
+    parser.add_argument("--profiles", type=int, default=150, help="Documents profiles in --write-tree (plus 25 per Steam user)")
+    parser.add_argument("--json", metavar="FILE", help="save stage results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="compare stage results with a saved run")
+    args = parser.parse_args(argv)
+
+    if args.write_fixtures:
+        write_sii_fixtures(args.write_fixtures)
+        print(f"✅ Fixtures written to {args.write_fixtures}")
+        return 0
+    if args.write_tree:
+        game_dir, steam_path = make_game_tree(args.write_tree, args.profiles)
+        print(f"✅ Profile tree written: --game-dir \"{game_dir}\" --steam-path \"{steam_path}\"")
+        return 0
+
+    names = args.benchmarks or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"❌ Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            return 1
+        print(f"\n⏱️  {name}: {BENCHMARKS[name].__doc__}")
+        _current.append(name)
+        BENCHMARKS[name]()
+
+    if args.compare:
+        compare_results(args.compare)
+    if args.json:
+        with atomic_writer(args.json) as f:
+            json.dump({
+                "timestamp": datetime.now().isoformat(timespec='seconds'),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": RESULTS,
+            }, f, indent=2)
+        print(f"\n✅ Results written to {args.json}")
+    if FAILURES:
+        print(f"\n❌ {len(FAILURES)} check(s) failed:")
+        for failure in FAILURES:
+            print(f"   {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Filesystem helpers for ETS2 Mod Manager
+os.scandir-based walking that reuses DirEntry type/stat data and counts the
+filesystem calls it makes, plus atomic writes, versioned JSON indexes and
+cheap backups
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import threading
+from collections import Counter
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+# DirEntry.stat() is served from the directory listing on Windows; elsewhere
+# the first call is a real stat (then cached on the entry)
+ENTRY_STAT_IS_FREE = os.name == 'nt'
+
+# Mode bits new files get; mkstemp files are 0600 whatever the umask
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class SyscallCounter:
+    """Thread-safe tally of filesystem calls by kind"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, count: int = 1):
+        with self._lock:
+            self._counts[kind] += count
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+    @property
+    def total(self) -> int:
+        return sum(self._counts.values())
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+class FsWalker:
+    """Single entry point for discovery I/O, so every call is counted"""
+
+    def __init__(self, counter: Optional[SyscallCounter] = None):
+        self.counter = counter or SyscallCounter()
+
+    def scandir(self, path: str) -> Optional[List[os.DirEntry]]:
+        """Entries of `path`, or None if it does not exist or is not a folder"""
+        self.counter.add("scandir")
+        try:
+            with os.scandir(path) as entries:
+                return list(entries)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    def subdirs(self, path: str) -> List[os.DirEntry]:
+        """Folder entries of `path`; the type comes from the listing itself"""
+        return [entry for entry in self.scandir(path) or () if self.entry_is_dir(entry)]
+
+    def entry_is_dir(self, entry: os.DirEntry) -> bool:
+        try:
+            return entry.is_dir()
+        except OSError:
+            return False
+
+    def entry_stat(self, entry: os.DirEntry) -> Optional[os.stat_result]:
+        """Stat of a listed entry, counted only when it costs a syscall"""
+        if not ENTRY_STAT_IS_FREE:
+            self.counter.add("stat")
+        try:
+            return entry.stat()
+        except OSError:
+            return None
+
+    def stat(self, path: str) -> Optional[os.stat_result]:
+        """os.stat, or None if the path is missing"""
+        self.counter.add("stat")
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+
+    def count_subdirs(self, path: str) -> int:
+        return len(self.subdirs(path))
+
+    def count_open(self):
+        """Record a file open done by a reader outside the walker"""
+        self.counter.add("open")
+
+
+@contextlib.contextmanager
+def atomic_writer(path: str, encoding: str = 'utf-8', newline: Optional[str] = '\n',
+                  binary: bool = False, fsync: bool = True) -> Iterator[IO]:
+    """Write to a temp file next to `path`, fsync, then rename it into place
+
+    The file keeps the permissions of the one it replaces (a new file gets
+    the umask default), and the directory is fsynced after the rename so
+    the new name survives a power cut. If the block raises, the temp file
+    is removed and `path` is untouched. Without `fsync` the rename is still
+    atomic, but a power cut can leave an empty file; only for data that
+    can be rebuilt.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=os.path.splitext(path)[1], dir=directory)
+    try:
+        if binary:
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding=encoding, newline=newline)
+        with f:
+            yield f
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.chmod(tmp_path, replacement_mode(path))
+        os.replace(tmp_path, path)
+        if fsync:
+            fsync_directory(directory)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def replacement_mode(path: str) -> int:
+    """Permission bits for a file written over `path`"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def fsync_directory(directory: str):
+    """Make renames in `directory` durable; a no-op where directories cannot be opened"""
+    if os.name == 'nt':
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        # Some filesystems do not support fsync on directories
+        pass
+    finally:
+        os.close(fd)
+
+
+def load_json_index(path: str, version: int, parse: Callable[[Dict[str, Any]], T], default: T) -> T:
+    """Records of a versioned JSON index, via `parse` on the whole document
+
+    A missing or unreadable file, another version, or records `parse` cannot
+    read (missing keys, wrong shapes) all give `default`: the index is a
+    cache and is rebuilt from scratch.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = json.loads(f.read().decode('utf-8'))
+        if not isinstance(data, dict) or data.get("version") != version:
+            return default
+        return parse(data)
+    except (OSError, ValueError, KeyError, TypeError):
+        return default
+
+
+def save_json_index(path: str, version: int, **sections: Any):
+    """Atomically write a versioned JSON index as compact JSON"""
+    with atomic_writer(path) as f:
+        json.dump({"version": version, **sections}, f, separators=(',', ':'))
+
+
+def write_all(fd: int, buffers: List) -> int:
+    """Write every buffer to `fd`, gathered into one writev call where supported"""
+    buffers = [memoryview(b).cast('B') for b in buffers if len(b)]
+    total = sum(len(b) for b in buffers)
+    writev = getattr(os, 'writev', None)
+    while buffers:
+        if writev is not None:
+            written = writev(fd, buffers[:1024])
+        else:
+            written = os.write(fd, buffers[0])
+        while written and buffers:
+            if written >= len(buffers[0]):
+                written -= len(buffers[0])
+                buffers.pop(0)
+            else:
+                buffers[0] = buffers[0][written:]
+                written = 0
+    return total
+
+
+# Linux FICLONE ioctl: share extents on btrfs/XFS instead of copying
+_FICLONE = 0x40049409
+
+
+def _reflink(src: str, dst: str) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, 'rb') as s, open(dst, 'wb') as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.unlink(dst)
+        return False
+
+
+def link_or_copy(src: str, dst: str) -> str:
+    """Make `dst` a copy of `src` as cheaply as possible: hardlink, reflink, then copy
+
+    A hardlink is only a safe backup when `src` is later replaced by rename
+    (as atomic_writer does), never rewritten in place. `dst` always has the
+    permissions of `src` (a hardlink shares them), and the rename is fsynced.
+    Returns the method used.
+    """
+    directory = os.path.dirname(os.path.abspath(dst))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    os.close(fd)
+    os.unlink(tmp_path)
+    try:
+        try:
+            os.link(src, tmp_path)
+            method = "hardlink"
+        except (OSError, NotImplementedError, AttributeError):
+            if _reflink(src, tmp_path):
+                method = "reflink"
+            else:
+                shutil.copy2(src, tmp_path)
+                method = "copy"
+        os.replace(tmp_path, dst)
+        fsync_directory(directory)
+        return method
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
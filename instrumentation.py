@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Instrumentation for ETS2 Mod Manager
+Timing spans and counters for the manager's stages, written as a Chrome
+trace-event JSON file or printed as a summary table. A disabled tracer hands
+out one shared no-op context, so instrumented code costs next to nothing.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, TextIO
+
+from fs_walk import atomic_writer
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer: "Tracer", name: str, args: Optional[dict]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args = dict(self.args or {}, error=exc_type.__name__)
+        self.tracer._record(self.name, self.start, end - self.start, self.args)
+        return False
+
+
+class Tracer:
+    """Collects (name, start, duration, thread, args) spans and named counters"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.spans: List[tuple] = []
+        self.counters: Counter = Counter()
+        self.origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **args):
+        """Context manager timing a block; a no-op when disabled"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args or None)
+
+    def count(self, name: str, n: int = 1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += n
+
+    def _record(self, name: str, start: int, duration: int, args: Optional[dict]):
+        # list.append is atomic, spans from worker threads need no lock
+        self.spans.append((name, start, duration, threading.get_ident(), args))
+
+    def summary(self) -> Dict[str, dict]:
+        """Per span name: calls, total, mean and max milliseconds"""
+        rows: Dict[str, dict] = {}
+        for name, _, duration, _, _ in self.spans:
+            row = rows.setdefault(name, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            ms = duration / 1e6
+            row["calls"] += 1
+            row["total_ms"] += ms
+            row["max_ms"] = max(row["max_ms"], ms)
+        for row in rows.values():
+            row["mean_ms"] = row["total_ms"] / row["calls"]
+        return rows
+
+    def format_summary(self) -> str:
+        lines = [f"{'span':<28} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"]
+        for name, row in sorted(self.summary().items(), key=lambda item: -item[1]["total_ms"]):
+            lines.append(f"{name:<28} {row['calls']:>7} {row['total_ms']:>10.1f} "
+                         f"{row['mean_ms']:>9.2f} {row['max_ms']:>9.2f}")
+        if self.counters:
+            lines.append("")
+            lines.append(f"{'counter':<40} {'value':>12}")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:<40} {value:>12,}")
+        return "\n".join(lines)
+
+    def print_summary(self, stream: Optional[TextIO] = None):
+        print(self.format_summary(), file=stream)
+
+    def trace_events(self) -> dict:
+        """Chrome trace-event format (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        events = []
+        for name, start, duration, tid, args in self.spans:
+            event = {"name": name, "ph": "X", "pid": pid, "tid": tid,
+                     "ts": (start - self.origin) / 1000, "dur": duration / 1000}
+            if args:
+                event["args"] = args
+            events.append(event)
+        for name, value in sorted(self.counters.items()):
+            events.append({"name": name, "ph": "C", "pid": pid, "tid": 0,
+                           "ts": (time.perf_counter_ns() - self.origin) / 1000,
+                           "args": {"value": value}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_json(self, path: str):
+        with atomic_writer(path) as f:
+            json.dump(self.trace_events(), f)
+
+
+# Shared disabled tracer for code that was not given one
+NULL_TRACER = Tracer(enabled=False)
+
+
+def traced(name: Optional[str] = None, detail: bool = False):
+    """Method decorator: time each call as a span on `self.tracer`
+
+    With `detail`, the first argument (a path, usually) is kept on the span.
+    """
+    def decorate(method):
+        span_name = name or method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            tracer = self.tracer
+            if not tracer.enabled:
+                return method(self, *args, **kwargs)
+            with _Span(tracer, span_name, {"arg": str(args[0])} if detail and args else None):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Load order model for ETS2 Mod Manager
+Typed mod records with O(1) lookup by package id, read from either the
+legacy JSON array of "package_id|Display Name" strings or the versioned
+format, and validated in one pass
+"""
+
+import json
+from typing import Dict, Iterator, List, Optional, Union
+
+from fs_walk import atomic_writer
+from mod_index import WORKSHOP_PREFIX
+
+LOAD_ORDER_FORMAT = "ets2-load-order"
+LOAD_ORDER_VERSION = 1
+
+# Errors listed in a LoadOrderError before the rest are summarised
+MAX_REPORTED_ERRORS = 20
+
+
+class LoadOrderError(ValueError):
+    """The load order is malformed; `errors` lists every problem found"""
+
+    def __init__(self, source: str, errors: List[str]):
+        self.source = source
+        self.errors = errors
+        shown = errors[:MAX_REPORTED_ERRORS]
+        more = len(errors) - len(shown)
+        message = f"{source}: {len(errors)} problem(s)\n  " + "\n  ".join(shown)
+        if more:
+            message += f"\n  ... and {more} more"
+        super().__init__(message)
+
+
+class ModEntry:
+    """One mod of the load order"""
+    __slots__ = ('package_id', 'name', 'is_workshop', 'entry')
+
+    def __init__(self, package_id: str, name: str, entry: Optional[str] = None):
+        self.package_id = package_id
+        # As written in the load order; may be empty (see display_name)
+        self.name = name
+        self.is_workshop = package_id.startswith(WORKSHOP_PREFIX)
+        # The active_mods value written to profile.sii
+        self.entry = entry or f"{package_id}|{name}"
+
+    @property
+    def display_name(self) -> str:
+        return self.name or self.package_id
+
+    @property
+    def workshop_id(self) -> Optional[int]:
+        """Steam workshop item id, or None for local mods"""
+        if not self.is_workshop:
+            return None
+        return int(self.package_id[len(WORKSHOP_PREFIX):], 16)
+
+    def __repr__(self) -> str:
+        return f"ModEntry({self.package_id!r}, {self.name!r})"
+
+
+def _check_field(value, what: str, position: int, errors: List[str]) -> bool:
+    if not isinstance(value, str):
+        errors.append(f"#{position + 1}: {what} must be a string, got {type(value).__name__}")
+        return False
+    if '"' in value or '\n' in value or '\r' in value:
+        errors.append(f"#{position + 1}: {what} {value!r} contains a quote or line break")
+        return False
+    return True
+
+
+class LoadOrder:
+    """Ordered mods (first = top priority) with a package id -> index map"""
+
+    def __init__(self, mods: Optional[List[ModEntry]] = None):
+        self.mods: List[ModEntry] = mods or []
+        self._index: Dict[str, int] = {mod.package_id: i for i, mod in enumerate(self.mods)}
+        self._entries: List[str] = [mod.entry for mod in self.mods]
+        self.workshop: List[ModEntry] = [mod for mod in self.mods if mod.is_workshop]
+        self.local: List[ModEntry] = [mod for mod in self.mods if not mod.is_workshop]
+
+    @classmethod
+    def _build(cls, items, source: str, errors: List[str]) -> "LoadOrder":
+        """Validate (package_id, name) pairs in one pass; raise with every problem found"""
+        mods = []
+        first_seen: Dict[str, int] = {}
+        for position, (package_id, name) in enumerate(items):
+            if not (_check_field(package_id, "package id", position, errors)
+                    and _check_field(name, "name", position, errors)):
+                continue
+            if not package_id or '|' in package_id or package_id != package_id.strip():
+                errors.append(f"#{position + 1}: invalid package id {package_id!r}")
+                continue
+            earlier = first_seen.setdefault(package_id, position)
+            if earlier != position:
+                errors.append(f"#{position + 1}: {package_id} already listed as #{earlier + 1}")
+                continue
+            mods.append(ModEntry(package_id, name))
+        if errors:
+            raise LoadOrderError(source, errors)
+        return cls(mods)
+
+    @classmethod
+    def _valid_in_bulk(cls, ids: List, names: List) -> bool:
+        """True only if every pair passes _build's per-item checks
+
+        The same checks, each run over the whole list in C instead of per
+        item; if any fails, _build runs to find and report the problems.
+        """
+        try:
+            # Equal lengths and no duplicate ids (set() raises on unhashable ids)
+            if len(ids) != len(names) or len(set(ids)) != len(ids):
+                return False
+            # join raises unless every item is a str
+            joined_ids = "\n".join(ids)
+            joined_names = "\n".join(names)
+        except TypeError:
+            return False
+        # A join adds exactly len - 1 separators, so any other "\n" is inside an item;
+        # the strip comparison is _build's whitespace check, item by item but in C
+        return (joined_ids.count('\n') == len(ids) - 1 and joined_names.count('\n') == len(names) - 1
+                and '|' not in joined_ids
+                and '"' not in joined_ids and '"' not in joined_names
+                and '\r' not in joined_ids and '\r' not in joined_names
+                and all(ids) and all(map(str.__eq__, ids, map(str.strip, ids))))
+
+    @classmethod
+    def from_pairs(cls, ids: List, names: List, source: str = "load order") -> "LoadOrder":
+        """Build from parallel package id / name lists (the versioned format)"""
+        if cls._valid_in_bulk(ids, names):
+            return cls(list(map(ModEntry, ids, names)))
+        errors = []
+        if len(ids) != len(names):
+            errors.append(f"{len(ids)} package ids but {len(names)} names")
+        return cls._build(zip(ids, names), source, errors)
+
+    @classmethod
+    def from_entries(cls, entries: List, source: str = "load order") -> "LoadOrder":
+        """Build from "package_id|Display Name" strings (the legacy format)"""
+        if all(type(entry) is str for entry in entries):
+            ids, bars, names = zip(*(entry.partition('|') for entry in entries)) if entries else ((), (), ())
+            if all(bars) and cls._valid_in_bulk(ids, names):
+                return cls(list(map(ModEntry, ids, names, entries)))
+        errors = []
+
+        def split(position: int, entry):
+            if not isinstance(entry, str):
+                return entry, ""
+            if '|' not in entry:
+                errors.append(f"#{position + 1}: {entry!r} is not \"package_id|Display Name\"")
+            package_id, _, name = entry.partition('|')
+            return package_id, name
+
+        return cls._build((split(i, entry) for i, entry in enumerate(entries)), source, errors)
+
+    @classmethod
+    def from_data(cls, data: Union[list, dict], source: str = "load order") -> "LoadOrder":
+        """Build from parsed JSON in either the legacy or the versioned format"""
+        if isinstance(data, list):
+            return cls.from_entries(data, source)
+        if isinstance(data, dict) and data.get("format") == LOAD_ORDER_FORMAT:
+            version = data.get("version")
+            if version != LOAD_ORDER_VERSION:
+                raise LoadOrderError(source, [f"unsupported version {version!r} "
+                                              f"(this manager reads version {LOAD_ORDER_VERSION})"])
+            ids, names = data.get("ids"), data.get("names")
+            if not isinstance(ids, list) or not isinstance(names, list):
+                raise LoadOrderError(source, ["\"ids\" and \"names\" must be lists"])
+            return cls.from_pairs(ids, names, source)
+        raise LoadOrderError(source, ["expected a JSON array of \"package_id|Display Name\" "
+                                      f"strings or a {LOAD_ORDER_FORMAT} object"])
+
+    @classmethod
+    def load(cls, path: str) -> "LoadOrder":
+        """Read a load order file in either format"""
+        with open(path, 'rb') as f:
+            raw = f.read()
+        try:
+            data = json.loads(raw.decode('utf-8-sig'))
+        except ValueError as e:
+            raise LoadOrderError(path, [f"not valid JSON: {e}"]) from None
+        return cls.from_data(data, path)
+
+    def to_data(self) -> dict:
+        """The versioned format: parallel id and name arrays"""
+        return {
+            "format": LOAD_ORDER_FORMAT,
+            "version": LOAD_ORDER_VERSION,
+            "ids": [mod.package_id for mod in self.mods],
+            "names": [mod.name for mod in self.mods],
+        }
+
+    def save(self, path: str, legacy: bool = False):
+        """Write the versioned format, or the legacy string array with `legacy`"""
+        data = self._entries if legacy else self.to_data()
+        with atomic_writer(path) as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+    def entries(self) -> List[str]:
+        """The "package_id|Display Name" strings written to active_mods"""
+        return self._entries
+
+    def __len__(self) -> int:
+        return len(self.mods)
+
+    def __iter__(self) -> Iterator[ModEntry]:
+        return iter(self.mods)
+
+    def __getitem__(self, position: int) -> ModEntry:
+        return self.mods[position]
+
+    def __contains__(self, package_id: str) -> bool:
+        return package_id in self._index
+
+    def index_of(self, package_id: str) -> Optional[int]:
+        """Load priority of a package (0 = top), or None if not listed"""
+        return self._index.get(package_id)
+
+    def get(self, package_id: str) -> Optional[ModEntry]:
+        position = self._index.get(package_id)
+        return None if position is None else self.mods[position]
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Missing-mod and conflict detection for ETS2 Mod Manager
+Builds an inverted index from game file path to the mods that ship it and
+reports which mods shadow each other, ordered by load priority
+"""
+
+import sys
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from mod_index import ModIndex
+
+# Samples of shadowed paths kept per conflicting pair
+SAMPLE_PATHS = 5
+
+
+def parse_mod_entry(entry: str) -> Tuple[str, str]:
+    """(mod id, display name) of an active_mods / load order entry "id|name" """
+    mod_id, _, name = entry.partition('|')
+    return mod_id, name or mod_id
+
+
+def is_package_metadata(path: str) -> bool:
+    """Root-level files (manifest.sii, icons, descriptions) describe the package, not game data"""
+    return '/' not in path
+
+
+@dataclass
+class ModConflict:
+    """`winner` overrides `shadowed` for `paths` game files"""
+    winner: str
+    winner_priority: int
+    shadowed: str
+    shadowed_priority: int
+    paths: int
+    sample: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ConflictReport:
+    mods: int
+    paths: int
+    missing: List[str] = field(default_factory=list)
+    unindexed: List[str] = field(default_factory=list)
+    conflicts: List[ModConflict] = field(default_factory=list)
+
+
+class PathIndex:
+    """Inverted index: game file path -> ids of the mods providing it
+
+    Mod ids are load priorities (0 wins). Paths are interned and most of
+    them have a single provider, so that provider is stored as a plain int;
+    only shared paths get an array of the mods they shadow.
+    """
+
+    def __init__(self):
+        self.owner: Dict[str, int] = {}
+        self.shadowed: Dict[str, array] = {}
+
+    def add(self, mod: int, paths: Iterable[str]):
+        """Add a mod's files; mods must be added from highest priority down"""
+        owner = self.owner
+        shadowed = self.shadowed
+        intern = sys.intern
+        for path in paths:
+            if is_package_metadata(path):
+                continue
+            first = owner.get(path)
+            if first is None:
+                owner[intern(path)] = mod
+            elif first != mod:
+                others = shadowed.get(path)
+                if others is None:
+                    shadowed[intern(path)] = array('I', (mod,))
+                elif others[-1] != mod:
+                    others.append(mod)
+
+    def __len__(self) -> int:
+        return len(self.owner)
+
+    def pairs(self) -> Dict[Tuple[int, int], List]:
+        """(winner, shadowed) -> [path count, sample paths]"""
+        pairs: Dict[Tuple[int, int], List] = {}
+        for path, others in self.shadowed.items():
+            winner = self.owner[path]
+            for loser in others:
+                entry = pairs.get((winner, loser))
+                if entry is None:
+                    pairs[(winner, loser)] = [1, [path]]
+                else:
+                    entry[0] += 1
+                    if len(entry[1]) < SAMPLE_PATHS:
+                        entry[1].append(path)
+        return pairs
+
+
+def analyze_conflicts(load_order: List[str], index: ModIndex) -> ConflictReport:
+    """Missing mods and file overlaps for `load_order` (first entry = top priority)
+
+    Member lists are streamed from the index one archive at a time, so
+    memory is the path index plus the largest single archive's list.
+    """
+    archives_by_mod = index.by_mod_id()
+    mod_ids = [parse_mod_entry(entry)[0] for entry in load_order]
+    report = ConflictReport(mods=len(mod_ids), paths=0)
+
+    paths = PathIndex()
+    for priority, mod_id in enumerate(mod_ids):
+        archives = archives_by_mod.get(mod_id)
+        if not archives:
+            report.missing.append(mod_id)
+            continue
+        if not any(archive.file_count for archive in archives):
+            report.unindexed.append(mod_id)
+            continue
+        for archive in archives:
+            paths.add(priority, index.iter_files(archive))
+    report.paths = len(paths)
+
+    for (winner, loser), (count, sample) in sorted(paths.pairs().items()):
+        report.conflicts.append(ModConflict(
+            winner=mod_ids[winner], winner_priority=winner,
+            shadowed=mod_ids[loser], shadowed_priority=loser,
+            paths=count, sample=sorted(sample),
+        ))
+    return report
+
+
+def conflict_records(report: ConflictReport, names: Optional[Dict[str, str]] = None) -> List[dict]:
+    """Flat records for CLI output: missing, unindexed, then conflicts by priority"""
+    names = names or {}
+    records = []
+    for mod_id in report.missing:
+        records.append({"type": "missing", "mod": mod_id, "name": names.get(mod_id, mod_id)})
+    for mod_id in report.unindexed:
+        records.append({"type": "unindexed", "mod": mod_id, "name": names.get(mod_id, mod_id)})
+    for conflict in report.conflicts:
+        records.append({
+            "type": "conflict",
+            "winner": conflict.winner,
+            "winner_priority": conflict.winner_priority,
+            "shadowed": conflict.shadowed,
+            "shadowed_priority": conflict.shadowed_priority,
+            "paths": conflict.paths,
+            "sample": conflict.sample,
+        })
+    return records
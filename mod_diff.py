@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Mod list diffing for ETS2 Mod Manager
+Compares a profile's active_mods with a target load order as added, removed
+and moved entries, and applies just that delta to a list
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# An entry plus its occurrence number, so repeated entries stay distinct
+EntryKey = Tuple[str, int]
+
+
+def _keyed(entries: List[str]) -> List[EntryKey]:
+    """(entry, occurrence) keys; only needed when some entry repeats"""
+    seen: Dict[str, int] = {}
+    keys = []
+    for entry in entries:
+        n = seen.get(entry, 0)
+        seen[entry] = n + 1
+        keys.append((entry, n))
+    return keys
+
+
+def longest_increasing_subsequence(values: List[int]) -> List[int]:
+    """Indices into `values` of one longest strictly increasing subsequence
+
+    Patience sorting: O(n log n).
+    """
+    tails: List[int] = []      # smallest tail value of an increasing run of each length
+    tail_index: List[int] = []  # index in `values` of that tail
+    parent = [-1] * len(values)
+    for i, value in enumerate(values):
+        pile = bisect_left(tails, value)
+        if pile == len(tails):
+            tails.append(value)
+            tail_index.append(i)
+        else:
+            tails[pile] = value
+            tail_index[pile] = i
+        parent[i] = tail_index[pile - 1] if pile else -1
+    result = []
+    i = tail_index[-1] if tail_index else -1
+    while i >= 0:
+        result.append(i)
+        i = parent[i]
+    result.reverse()
+    return result
+
+
+@dataclass
+class ModListDiff:
+    """Delta that turns the current list into the target list"""
+    added: List[Tuple[int, str]] = field(default_factory=list)        # (target index, entry)
+    removed: List[Tuple[int, str]] = field(default_factory=list)      # (current index, entry)
+    moved: List[Tuple[int, int, str]] = field(default_factory=list)   # (current, target index, entry)
+    unchanged: int = 0
+    target_size: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.moved)
+
+    def summary(self) -> str:
+        return f"+{len(self.added)} added, -{len(self.removed)} removed, ↕{len(self.moved)} moved"
+
+
+def diff_mod_lists(current: List[str], target: List[str]) -> ModListDiff:
+    """Diff two mod lists (active_mods order: first entry = top priority)
+
+    Repeated entries are made unique by their occurrence number, so the longest
+    common subsequence is the longest increasing run of target positions
+    taken in current order (Hunt-Szymanski). Entries on that run are
+    unchanged; other shared entries were moved.
+    """
+    target_pos = dict(zip(target, range(len(target))))
+    if len(target_pos) == len(target) and len(set(current)) == len(current):
+        target_keys, current_keys = target, current
+    else:
+        target_keys, current_keys = _keyed(target), _keyed(current)
+        target_pos = {key: i for i, key in enumerate(target_keys)}
+
+    diff = ModListDiff(target_size=len(target))
+    common: List[Tuple[int, int]] = []
+    for ci, key in enumerate(current_keys):
+        ti = target_pos.get(key)
+        if ti is None:
+            diff.removed.append((ci, current[ci]))
+        else:
+            common.append((ci, ti))
+
+    kept = longest_increasing_subsequence([ti for _, ti in common])
+    kept_set = set(kept)
+    diff.unchanged = len(kept)
+    diff.moved = [(ci, ti, current[ci]) for n, (ci, ti) in enumerate(common) if n not in kept_set]
+
+    current_set = set(current_keys)
+    diff.added = [(ti, target[ti]) for ti, key in enumerate(target_keys) if key not in current_set]
+    return diff
+
+
+def apply_diff(current: List[str], diff: ModListDiff, keep_removed: bool = False) -> List[str]:
+    """Apply `diff` to `current`, producing the target list
+
+    Added and moved entries go to their target positions; unchanged entries
+    fill the remaining slots in their current order. With `keep_removed`,
+    entries the target does not have stay in, each after the entry that
+    preceded it in `current`.
+    """
+    slots: List[Optional[Tuple[str, int]]] = [None] * diff.target_size
+    for ti, entry in diff.added:
+        slots[ti] = (entry, -1)
+    displaced = set()
+    for ci, ti, entry in diff.moved:
+        slots[ti] = (entry, ci)
+        displaced.add(ci)
+    removed = {ci for ci, _ in diff.removed}
+
+    survivors = (ci for ci in range(len(current)) if ci not in removed and ci not in displaced)
+    for ti, slot in enumerate(slots):
+        if slot is None:
+            ci = next(survivors, None)
+            if ci is None:
+                raise ValueError("diff does not match the current list")
+            slots[ti] = (current[ci], ci)
+    if next(survivors, None) is not None:
+        raise ValueError("diff does not match the current list")
+
+    if not keep_removed or not removed:
+        return [entry for entry, _ in slots]
+
+    # Removed entries, grouped under the nearest preceding entry that survives
+    trailing: Dict[int, List[str]] = {}
+    anchor = -1
+    for ci, entry in enumerate(current):
+        if ci in removed:
+            trailing.setdefault(anchor, []).append(entry)
+        else:
+            anchor = ci
+    result = list(trailing.get(-1, ()))
+    for entry, ci in slots:
+        result.append(entry)
+        if ci >= 0:
+            result.extend(trailing.get(ci, ()))
+    return result
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Mod archive index for ETS2 Mod Manager
+Reads the zip central directory and manifest.sii of each .scs/.zip mod
+through mmap, without extracting anything, and keeps the results on disk
+so that only archives whose mtime or size changed are read again
+"""
+
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from fs_walk import FsWalker, atomic_writer, load_json_index, save_json_index
+from sii import FORMAT_TEXT, HEAD_SIZE, detect_sii_format, iter_sii_fields, unwrap_sii
+from sii_binary import decode_bsii
+
+INDEX_VERSION = 2
+
+MOD_EXTENSIONS = ('.scs', '.zip')
+WORKSHOP_PREFIX = "mod_workshop_package."
+# Workshop items keep their archives a couple of folders down (versions)
+WORKSHOP_DEPTH = 3
+
+ARCHIVE_ZIP = "zip"
+ARCHIVE_HASHFS = "hashfs"
+ARCHIVE_UNKNOWN = "unknown"
+
+HASHFS_SIGNATURE = b'SCS#'
+
+_EOCD = struct.Struct('<4s4H2LH')
+_EOCD_SIGNATURE = b'PK\x05\x06'
+_ZIP64_LOCATOR = struct.Struct('<4sLQL')
+_ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+_ZIP64_EOCD = struct.Struct('<4sQ2H2L4Q')
+_ZIP64_EOCD_SIGNATURE = b'PK\x06\x06'
+_CENTRAL = struct.Struct('<4s6H3L5H2L')
+_CENTRAL_SIGNATURE = b'PK\x01\x02'
+_LOCAL = struct.Struct('<4s5H3L2H')
+_LOCAL_SIGNATURE = b'PK\x03\x04'
+_MAX_COMMENT = 0xFFFF
+_UTF8_FLAG = 0x800
+
+MANIFEST_NAME = "manifest.sii"
+MANIFEST_KEYS = ('package_version', 'display_name', 'author')
+_PACKAGE_RE = re.compile(r'mod_package\s*:\s*\.?([\w.]+)')
+
+# (name, compression method, compressed size, size, local header offset)
+ZipEntry = Tuple[str, int, int, int, int]
+
+
+class ModIndexError(ValueError):
+    """An archive could not be read as a mod package"""
+
+
+@dataclass
+class ModArchive:
+    """What the index knows about one mod archive"""
+    path: str
+    mod_id: str
+    size: int
+    mtime_ns: int
+    format: str = ARCHIVE_UNKNOWN
+    package_name: str = ""
+    version: str = ""
+    display_name: str = ""
+    author: str = ""
+    # Member names; kept on disk instead by an index with a path (see ModIndex.iter_files)
+    files: List[str] = field(default_factory=list)
+    file_count: int = 0
+    error: str = ""
+
+    @property
+    def files_name(self) -> str:
+        """File name of the stored member list, unique to this version of the archive"""
+        key = f"{self.path}\0{self.size}\0{self.mtime_ns}".encode('utf-8', 'surrogatepass')
+        return hashlib.sha1(key).hexdigest() + ".json"
+
+
+def _zip64_extra(extra: bytes, size: int, csize: int, offset: int) -> Tuple[int, int, int]:
+    """Apply the ZIP64 extended information extra field to saturated values"""
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, length = struct.unpack_from('<2H', extra, pos)
+        pos += 4
+        if header_id == 0x0001:
+            values = iter(struct.unpack_from(f'<{length // 8}Q', extra, pos))
+            if size == 0xFFFFFFFF:
+                size = next(values, size)
+            if csize == 0xFFFFFFFF:
+                csize = next(values, csize)
+            if offset == 0xFFFFFFFF:
+                offset = next(values, offset)
+            break
+        pos += length
+    return size, csize, offset
+
+
+def read_central_directory(data) -> List[ZipEntry]:
+    """Entries of a zip held in `data` (bytes or mmap), from its central directory alone"""
+    eocd = data.rfind(_EOCD_SIGNATURE, max(0, len(data) - _EOCD.size - _MAX_COMMENT))
+    if eocd < 0:
+        raise ModIndexError("no zip end of central directory")
+    _, _, _, _, count, cd_size, cd_offset, _ = _EOCD.unpack_from(data, eocd)
+
+    if count == 0xFFFF or cd_offset == 0xFFFFFFFF or cd_size == 0xFFFFFFFF:
+        locator = eocd - _ZIP64_LOCATOR.size
+        if locator < 0 or data[locator:locator + 4] != _ZIP64_LOCATOR_SIGNATURE:
+            raise ModIndexError("missing zip64 locator")
+        zip64_offset = _ZIP64_LOCATOR.unpack_from(data, locator)[2]
+        if data[zip64_offset:zip64_offset + 4] != _ZIP64_EOCD_SIGNATURE:
+            raise ModIndexError("bad zip64 end of central directory")
+        fields = _ZIP64_EOCD.unpack_from(data, zip64_offset)
+        count, cd_size, cd_offset = fields[7], fields[8], fields[9]
+
+    entries = []
+    pos = cd_offset
+    end = cd_offset + cd_size
+    unpack = _CENTRAL.unpack_from
+    while pos < end and len(entries) < count:
+        (signature, _, _, flags, method, _, _, _, csize, size,
+         name_len, extra_len, comment_len, _, _, _, offset) = unpack(data, pos)
+        if signature != _CENTRAL_SIGNATURE:
+            raise ModIndexError(f"bad central directory entry at {pos}")
+        pos += _CENTRAL.size
+        raw_name = data[pos:pos + name_len]
+        name = raw_name.decode('utf-8' if flags & _UTF8_FLAG else 'cp437', 'replace')
+        if 0xFFFFFFFF in (size, csize, offset):
+            size, csize, offset = _zip64_extra(data[pos + name_len:pos + name_len + extra_len],
+                                               size, csize, offset)
+        pos += name_len + extra_len + comment_len
+        if not name.endswith('/'):
+            entries.append((name, method, csize, size, offset))
+    return entries
+
+
+def read_member(data, entry: ZipEntry) -> bytes:
+    """Contents of one stored or deflated zip member"""
+    name, method, csize, _, offset = entry
+    signature, *_, name_len, extra_len = _LOCAL.unpack_from(data, offset)
+    if signature != _LOCAL_SIGNATURE:
+        raise ModIndexError(f"bad local header for {name}")
+    start = offset + _LOCAL.size + name_len + extra_len
+    raw = data[start:start + csize]
+    if method == 0:
+        return raw
+    if method == 8:
+        return zlib.decompress(raw, -15)
+    raise ModIndexError(f"unsupported compression method {method} for {name}")
+
+
+def parse_manifest(data: bytes) -> Dict[str, str]:
+    """package_name, version, display_name and author from a manifest.sii"""
+    data = unwrap_sii(data)
+    info = {}
+    if detect_sii_format(data[:HEAD_SIZE]) == FORMAT_TEXT:
+        text = data.decode('utf-8-sig', 'replace')
+        match = _PACKAGE_RE.search(text)
+        if match:
+            info['package_name'] = match.group(1)
+        fields = dict(iter_sii_fields([text], MANIFEST_KEYS))
+    else:
+        units = [unit for unit in decode_bsii(data) if unit.type == 'mod_package']
+        if not units:
+            return info
+        info['package_name'] = units[0].name.lstrip('.')
+        fields = {key: str(value) for key, value in units[0].fields.items() if key in MANIFEST_KEYS}
+    info['version'] = fields.get('package_version', "")
+    info['display_name'] = fields.get('display_name', "")
+    info['author'] = fields.get('author', "")
+    return info
+
+
+def _read_zip(data, archive: ModArchive):
+    entries = read_central_directory(data)
+    archive.format = ARCHIVE_ZIP
+    archive.files = [entry[0] for entry in entries]
+    archive.file_count = len(archive.files)
+    manifest = next((e for e in entries if e[0].lower() == MANIFEST_NAME), None)
+    if manifest is not None:
+        for key, value in parse_manifest(read_member(data, manifest)).items():
+            setattr(archive, key, value)
+
+
+def index_archive(path: str, mod_id: str, size: int, mtime_ns: int) -> ModArchive:
+    """Read one archive's file list and manifest; errors are recorded, not raised
+
+    Top-level so it can run in a process pool.
+    """
+    archive = ModArchive(path=path, mod_id=mod_id, size=size, mtime_ns=mtime_ns)
+    try:
+        with open(path, 'rb') as f:
+            if size == 0:
+                raise ModIndexError("empty file")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:4] == HASHFS_SIGNATURE:
+                    # HashFS stores CityHash64 path hashes, not names
+                    archive.format = ARCHIVE_HASHFS
+                else:
+                    _read_zip(mm, archive)
+    except (OSError, ValueError, struct.error, zlib.error) as e:
+        archive.error = str(e) or type(e).__name__
+    if not archive.package_name:
+        archive.package_name = os.path.splitext(os.path.basename(path))[0]
+    return archive
+
+
+def _index_job(job: Tuple[str, str, int, int]) -> ModArchive:
+    return index_archive(*job)
+
+
+def workshop_mod_id(item_id: str) -> str:
+    """active_mods id of a Steam workshop item folder (decimal item id)"""
+    return f"{WORKSHOP_PREFIX}{int(item_id):016X}"
+
+
+def iter_mod_archives(fs: FsWalker, root: str) -> Iterator[Tuple[str, str, int, int]]:
+    """(path, mod_id, size, mtime_ns) for every mod archive under `root`
+
+    Archives directly in `root` are local mods named after the file;
+    numeric subfolders are Steam workshop items, whose archives are found
+    a few levels down and share the item's mod id.
+    """
+    for entry in fs.scandir(root) or ():
+        if fs.entry_is_dir(entry):
+            if entry.name.isdigit():
+                yield from _iter_workshop_item(fs, entry.path, workshop_mod_id(entry.name), 1)
+        elif entry.name.lower().endswith(MOD_EXTENSIONS):
+            st = fs.entry_stat(entry)
+            if st:
+                yield entry.path, os.path.splitext(entry.name)[0], st.st_size, st.st_mtime_ns
+
+
+def _iter_workshop_item(fs: FsWalker, path: str, mod_id: str, depth: int):
+    for entry in fs.scandir(path) or ():
+        if fs.entry_is_dir(entry):
+            if depth < WORKSHOP_DEPTH:
+                yield from _iter_workshop_item(fs, entry.path, mod_id, depth + 1)
+        elif entry.name.lower().endswith(MOD_EXTENSIONS):
+            st = fs.entry_stat(entry)
+            if st:
+                yield entry.path, mod_id, st.st_size, st.st_mtime_ns
+
+
+class ModIndex:
+    """On-disk map of archive path -> ModArchive, refreshed incrementally
+
+    With a `path`, member lists are not kept in memory: each is written to
+    its own file in a folder next to the index as soon as the archive is
+    read, and iter_files() reads them back one archive at a time. Without
+    one, the lists stay in ModArchive.files.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.files_dir = os.path.splitext(path)[0] + "_files" if path else None
+        self.archives: Dict[str, ModArchive] = {}
+        self.dirty = False
+        self.fs = FsWalker()
+        self.indexed = 0
+        self.reused = 0
+        self.removed = 0
+
+    def load(self) -> "ModIndex":
+        """Load the index from disk; a missing or unreadable index starts empty"""
+        if not self.path:
+            return self
+        self.archives = load_json_index(self.path, INDEX_VERSION, lambda data: {
+            record["path"]: ModArchive(**record) for record in data.get("archives", [])
+        }, {})
+        return self
+
+    def save(self):
+        """Write the index atomically if anything changed"""
+        if not self.path or not self.dirty:
+            return
+        save_json_index(self.path, INDEX_VERSION,
+                        archives=[asdict(archive) for archive in self.archives.values()])
+        self.dirty = False
+        # Member lists of archives that changed or vanished
+        wanted = {archive.files_name for archive in self.archives.values()}
+        for name in self._stored_lists() - wanted:
+            with contextlib.suppress(OSError):
+                os.unlink(os.path.join(self.files_dir, name))
+
+    def _stored_lists(self) -> Set[str]:
+        """Names of the member list files on disk (one directory listing)"""
+        if not self.files_dir:
+            return set()
+        return {entry.name for entry in self.fs.scandir(self.files_dir) or ()}
+
+    def iter_files(self, archive: ModArchive) -> Iterator[str]:
+        """Member names of one archive, read from disk if the index keeps them there
+
+        A list that cannot be read is deleted, so the next update() reads
+        the archive again; until then it yields nothing.
+        """
+        if archive.files or not self.files_dir or not archive.file_count:
+            yield from archive.files
+            return
+        list_path = os.path.join(self.files_dir, archive.files_name)
+        try:
+            with open(list_path, 'rb') as f:
+                files = json.loads(f.read().decode('utf-8'))
+        except (OSError, ValueError):
+            with contextlib.suppress(OSError):
+                os.unlink(list_path)
+            return
+        yield from files
+
+    def update(self, roots: Iterable[str], workers: int = 8, processes: bool = False) -> "ModIndex":
+        """Re-index archives under `roots` that are new or whose mtime/size changed
+
+        Archives that vanished from a scanned root are dropped. Parsing runs
+        on a thread pool, or a process pool with `processes` (the central
+        directory walk is pure Python, so processes win on big collections).
+        """
+        self.indexed = self.reused = self.removed = 0
+        stored = self._stored_lists()
+        scanned = []
+        seen = set()
+        jobs = []
+        for root in roots:
+            if self.fs.stat(root) is None:
+                continue
+            scanned.append(os.path.normcase(os.path.abspath(root)))
+            for path, mod_id, size, mtime_ns in iter_mod_archives(self.fs, root):
+                seen.add(path)
+                known = self.archives.get(path)
+                if (known and known.size == size and known.mtime_ns == mtime_ns and known.mod_id == mod_id
+                        and (not known.file_count or not self.files_dir or known.files_name in stored)):
+                    self.reused += 1
+                else:
+                    jobs.append((path, mod_id, size, mtime_ns))
+
+        if jobs:
+            if workers <= 1 or len(jobs) == 1:
+                results = map(_index_job, jobs)
+                self._store(results)
+            else:
+                executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+                with executor(max_workers=min(workers, len(jobs))) as pool:
+                    chunksize = max(1, len(jobs) // (workers * 4)) if processes else 1
+                    self._store(pool.map(_index_job, jobs, chunksize=chunksize))
+
+        for path in list(self.archives):
+            if path not in seen and any(_is_under(path, root) for root in scanned):
+                del self.archives[path]
+                self.removed += 1
+                self.dirty = True
+        return self
+
+    def _store(self, results: Iterable[ModArchive]):
+        for archive in results:
+            if self.files_dir and archive.files:
+                os.makedirs(self.files_dir, exist_ok=True)
+                # A lost list only means reading the archive again, so no fsync
+                with atomic_writer(os.path.join(self.files_dir, archive.files_name), fsync=False) as f:
+                    json.dump(archive.files, f, separators=(',', ':'))
+                archive.files = []
+            self.archives[archive.path] = archive
+            self.indexed += 1
+            self.dirty = True
+
+    def by_mod_id(self) -> Dict[str, List[ModArchive]]:
+        """Archives grouped by the id used in active_mods"""
+        grouped: Dict[str, List[ModArchive]] = {}
+        for archive in self.archives.values():
+            grouped.setdefault(archive.mod_id, []).append(archive)
+        return grouped
+
+
+def _is_under(path: str, root: str) -> bool:
+    path = os.path.normcase(os.path.abspath(path))
+    return path.startswith(root.rstrip(os.sep) + os.sep)
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Content-addressed mod archive store for ETS2 Mod Manager
+Archives are copied once by SHA-256 into a local store folder, verified on
+the way in, hardlinked into mod folders and evicted least recently used first
+"""
+
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fs_walk import link_or_copy, load_json_index, replacement_mode, save_json_index
+from mod_index import MOD_EXTENSIONS
+
+STORE_VERSION = 1
+# hashlib drops the GIL for large updates, so threads hash in parallel
+HASH_CHUNK = 1024 * 1024
+DEFAULT_HASH_WORKERS = 4
+
+
+class ModStoreError(ValueError):
+    """An archive did not match the hash or size it was expected to have"""
+
+
+def hash_file(path: str, chunk_size: int = HASH_CHUNK) -> Tuple[str, int]:
+    """(sha256 hex digest, size) of a file, read in fixed-size chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            digest.update(view[:n])
+            size += n
+    return digest.hexdigest(), size
+
+
+def hash_files(paths: List[str], workers: int = DEFAULT_HASH_WORKERS) -> List[Tuple[str, int]]:
+    """hash_file() over a thread pool, results in input order"""
+    if workers <= 1 or len(paths) <= 1:
+        return [hash_file(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        return list(pool.map(hash_file, paths))
+
+
+@dataclass
+class StoredObject:
+    sha256: str
+    size: int
+    last_used: float
+    # Object file mtime when it was last verified; 0 = never (older indexes)
+    mtime_ns: int = 0
+
+
+@dataclass
+class SyncResult:
+    """What sync_mods() did for one manifest entry"""
+    mod_id: str
+    file: str
+    action: str  # present, linked, fetched, missing or failed
+    error: str = ""
+
+
+class ModStore:
+    """objects/<aa>/<sha256> files plus an index of sizes and last use"""
+
+    def __init__(self, root: str, budget: Optional[int] = None):
+        self.root = root
+        self.budget = budget
+        self.index_file = os.path.join(root, "index.json")
+        self.objects: Dict[str, StoredObject] = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def load(self) -> "ModStore":
+        """Load the index; a missing or unreadable index starts empty"""
+        self.objects = load_json_index(self.index_file, STORE_VERSION, lambda data: {
+            record["sha256"]: StoredObject(**record) for record in data.get("objects", [])
+        }, {})
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            records = [asdict(obj) for obj in self.objects.values()]
+            self.dirty = False
+        save_json_index(self.index_file, STORE_VERSION, objects=records)
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "objects", sha256[:2], sha256)
+
+    def has(self, sha256: str, size: Optional[int] = None) -> bool:
+        """True if the object is indexed, on disk and still has its contents
+
+        Objects hardlinked into a mod folder share the inode with the file
+        there, so an in-place edit of that mod changes the object too. Size
+        and mtime are compared with the values recorded when the object was
+        last verified; if either moved, the object is hashed again, and
+        dropped from the store if it no longer matches.
+        """
+        obj = self.objects.get(sha256)
+        if obj is None or (size is not None and obj.size != size):
+            return False
+        path = self.object_path(sha256)
+        try:
+            st = os.stat(path)
+            if st.st_size == obj.size and st.st_mtime_ns == obj.mtime_ns:
+                return True
+            if st.st_size == obj.size and hash_file(path)[0] == sha256:
+                with self._lock:
+                    obj.mtime_ns = st.st_mtime_ns
+                    self.dirty = True
+                return True
+            os.unlink(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.objects.pop(sha256, None)
+            self.dirty = True
+        return False
+
+    @property
+    def total_size(self) -> int:
+        return sum(obj.size for obj in self.objects.values())
+
+    def _touch(self, sha256: str, size: int, mtime_ns: Optional[int] = None):
+        with self._lock:
+            known = self.objects.get(sha256)
+            if mtime_ns is None:
+                mtime_ns = known.mtime_ns if known is not None else 0
+            self.objects[sha256] = StoredObject(sha256, size, time.time(), mtime_ns)
+            self.dirty = True
+
+    def add(self, path: str, sha256: Optional[str] = None, size: Optional[int] = None) -> StoredObject:
+        """Store a local archive, copied and hashed on the way in
+
+        The copy is what keeps the object immutable: a hardlink would let
+        later edits of the mod file change it. With a known (sha256, size)
+        the copy is verified against them.
+        """
+        if sha256 is not None and size is not None and self.has(sha256, size):
+            self._touch(sha256, size)
+            return self.objects[sha256]
+        return self.fetch(path, sha256, size)
+
+    def fetch(self, source: str, sha256: Optional[str] = None, size: Optional[int] = None) -> StoredObject:
+        """Copy `source` into the store, hashing on the way, and verify it
+
+        Without an expected (sha256, size) the file is stored under the hash
+        it turns out to have.
+        """
+        if sha256 is not None and size is not None and self.has(sha256, size):
+            self._touch(sha256, size)
+            return self.objects[sha256]
+        directory = os.path.join(self.root, "objects")
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        copied = 0
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+        try:
+            buf = bytearray(HASH_CHUNK)
+            view = memoryview(buf)
+            with open(source, 'rb', buffering=0) as src, os.fdopen(fd, 'wb') as dst:
+                while True:
+                    n = src.readinto(buf)
+                    if not n:
+                        break
+                    digest.update(view[:n])
+                    dst.write(view[:n])
+                    copied += n
+            if sha256 is not None and (copied != size or digest.hexdigest() != sha256):
+                raise ModStoreError(f"{source}: expected {sha256[:12]}… ({size} bytes), "
+                                    f"got {digest.hexdigest()[:12]}… ({copied} bytes)")
+            sha256, size = digest.hexdigest(), copied
+            target = self.object_path(sha256)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Objects are linked into mod folders, so not the 0600 of mkstemp
+            os.chmod(tmp_path, replacement_mode(target))
+            os.replace(tmp_path, target)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+        self._touch(sha256, size, os.stat(target).st_mtime_ns)
+        return self.objects[sha256]
+
+    def link(self, sha256: str, dest: str) -> str:
+        """Place a stored object at `dest` (hardlink where possible)"""
+        os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+        method = link_or_copy(self.object_path(sha256), dest)
+        self._touch(sha256, self.objects[sha256].size)
+        return method
+
+    def evict(self, budget: Optional[int] = None) -> List[str]:
+        """Drop least recently used objects until the store fits `budget` bytes
+
+        Objects still hardlinked into a mod folder are skipped: removing
+        them would free nothing.
+        """
+        budget = self.budget if budget is None else budget
+        if budget is None:
+            return []
+        evicted = []
+        total = self.total_size
+        for obj in sorted(self.objects.values(), key=lambda o: o.last_used):
+            if total <= budget:
+                break
+            path = self.object_path(obj.sha256)
+            try:
+                if os.stat(path).st_nlink > 1:
+                    continue
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            with self._lock:
+                del self.objects[obj.sha256]
+                self.dirty = True
+            total -= obj.size
+            evicted.append(obj.sha256)
+        return evicted
+
+
+def find_mod_archive(mod_dir: str, mod_id: str) -> Optional[str]:
+    """Path of a local mod's archive in `mod_dir`, or None"""
+    for ext in MOD_EXTENSIONS:
+        path = os.path.join(mod_dir, mod_id + ext)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def build_manifest_mods(mod_dir: str, mod_ids: Iterable[str],
+                        workers: int = DEFAULT_HASH_WORKERS) -> Dict[str, dict]:
+    """Manifest "mods" entries (file, sha256, size) for the local mods found in `mod_dir`
+
+    Workshop mods are left out: Steam distributes those.
+    """
+    found = [(mod_id, find_mod_archive(mod_dir, mod_id)) for mod_id in mod_ids]
+    found = [(mod_id, path) for mod_id, path in found if path]
+    hashes = hash_files([path for _, path in found], workers)
+    return {
+        mod_id: {"file": os.path.basename(path), "sha256": sha256, "size": size}
+        for (mod_id, path), (sha256, size) in zip(found, hashes)
+    }
+
+
+def _sync_one(store: ModStore, mod_id: str, entry: dict, remote_dir: str, mod_dir: str) -> SyncResult:
+    name, sha256, size = entry["file"], entry["sha256"], entry["size"]
+    dest = os.path.join(mod_dir, name)
+    result = SyncResult(mod_id=mod_id, file=name, action="present")
+    try:
+        st = os.stat(dest) if os.path.exists(dest) else None
+        if st is not None and st.st_size == size:
+            # has() re-hashes the object if it changed since it was verified
+            if store.has(sha256, size) and os.path.samefile(dest, store.object_path(sha256)):
+                store._touch(sha256, size)
+                return result
+            if hash_file(dest)[0] == sha256:
+                store.add(dest, sha256, size)
+                return result
+        if store.has(sha256, size):
+            result.action = "linked"
+        else:
+            source = os.path.join(remote_dir, name)
+            if not os.path.isfile(source):
+                result.action = "missing"
+                return result
+            store.fetch(source, sha256, size)
+            result.action = "fetched"
+        store.link(sha256, dest)
+    except (OSError, ModStoreError) as e:
+        result.action = "failed"
+        result.error = str(e)
+    return result
+
+
+def sync_mods(store: ModStore, mods: Dict[str, dict], remote_dir: str, mod_dir: str,
+              workers: int = DEFAULT_HASH_WORKERS) -> List[SyncResult]:
+    """Make `mod_dir` hold every manifest archive, fetching only what the store lacks
+
+    Archives already in place are verified (same inode as an unchanged
+    stored object, or a matching hash) and skipped. The store is trimmed to its budget and
+    its index saved afterwards.
+    """
+    items = list(mods.items())
+
+    def sync(item):
+        return _sync_one(store, item[0], item[1], remote_dir, mod_dir)
+
+    if workers <= 1 or len(items) <= 1:
+        results = [sync(item) for item in items]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+            results = list(pool.map(sync, items))
+    store.evict()
+    store.save()
+    return results
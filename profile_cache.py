@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Persistent profile cache for ETS2 Mod Manager
+Parsed profile records keyed by path and the stat of the files they came from
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from fs_walk import load_json_index, save_json_index
+
+CACHE_VERSION = 1
+
+StatKey = Tuple[int, ...]
+
+
+class ProfileCache:
+    """On-disk map of profile path -> (stat key, parsed record)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Tuple[StatKey, Optional[dict]]] = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        # Profiles may be parsed in the background while others are read
+        self._lock = threading.Lock()
+
+    def load(self) -> "ProfileCache":
+        """Load entries from disk; a missing or unreadable cache starts empty"""
+        self.entries = load_json_index(self.path, CACHE_VERSION, lambda data: {
+            path: (tuple(entry["key"]), entry["record"])
+            for path, entry in data.get("profiles", {}).items()
+        }, {})
+        return self
+
+    def get(self, path: str, key: StatKey) -> Tuple[bool, Optional[dict]]:
+        """(hit, record) for `path`; a hit needs an identical stat key"""
+        with self._lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def put(self, path: str, key: StatKey, record: Optional[dict]):
+        with self._lock:
+            self.entries[path] = (tuple(key), record)
+            self.dirty = True
+
+    def discard(self, path: str):
+        """Forget one profile (it was deleted or renamed)"""
+        with self._lock:
+            if self.entries.pop(path, None) is not None:
+                self.dirty = True
+
+    def prune(self, locations: Iterable[str], seen: Iterable[str]):
+        """Evict entries under the scanned `locations` that were not `seen`"""
+        scanned = {os.path.normcase(os.path.abspath(loc)) for loc in locations}
+        seen = set(seen)
+        with self._lock:
+            for path in list(self.entries):
+                parent = os.path.normcase(os.path.abspath(os.path.dirname(path)))
+                if parent in scanned and path not in seen:
+                    del self.entries[path]
+                    self.dirty = True
+
+    def save(self):
+        """Write the cache atomically if anything changed
+
+        Parses still running may put() meanwhile; they are written next time.
+        """
+        with self._lock:
+            if not self.dirty:
+                return
+            entries = dict(self.entries)
+            self.dirty = False
+        try:
+            save_json_index(self.path, CACHE_VERSION, profiles={
+                path: {"key": list(key), "record": record}
+                for path, (key, record) in entries.items()
+            })
+        except BaseException:
+            with self._lock:
+                self.dirty = True
+            raise
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Profile folder watching for ETS2 Mod Manager
+Reports which profile folders changed under the profile roots, from inotify
+on Linux or from cheap stat diffs elsewhere, with bursts debounced. Both
+backends watch the same things: profile folders appearing or vanishing,
+each profile.sii, and save slots being added to or removed from save/;
+files inside a save slot are not watched (the profile list does not use them).
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# inotify(7) event bits
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; then the name
+# Folders appearing, vanishing or being renamed in a profiles root
+ROOT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+# profile.sii written or swapped in, save/ created or removed
+PROFILE_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_ATTRIB | IN_ONLYDIR
+# Save slots added to or removed from save/
+SAVE_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ATTRIB | IN_ONLYDIR
+SAVE_DIR = "save"
+# Files in a profile folder that the profile listing depends on
+WATCHED_NAMES = frozenset(("profile.sii", SAVE_DIR))
+
+# What an inotify watch descriptor is on
+_ROOT, _PROFILE, _SAVES = "root", "profile", "saves"
+
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_DEBOUNCE = 0.25
+# A steady stream of events is still reported at least this often
+DEFAULT_MAX_DELAY = 2.0
+
+
+class ChangeSource:
+    """Yields sets of changed paths under `roots`
+
+    A profile folder path means "re-read this profile"; a root path means
+    "list this root again" (after an event queue overflow, say).
+    """
+    backend = "none"
+
+    def __init__(self, roots: List[str]):
+        self.roots = [root for root in roots if os.path.isdir(root)]
+        self.closed = threading.Event()
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Changes seen within `timeout` seconds (empty if none)"""
+        raise NotImplementedError
+
+    def close(self):
+        self.closed.set()
+
+    def __enter__(self) -> "ChangeSource":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch, libc.inotify_rm_watch
+    except (OSError, AttributeError):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+_libc = _load_libc()
+
+
+def inotify_available() -> bool:
+    return _libc is not None
+
+
+class InotifySource(ChangeSource):
+    """inotify watches on each root, each profile folder in it and their save/
+
+    close() may come from another thread while wait() blocks in select():
+    it only wakes the waiter through a pipe, and the fds are closed by
+    whichever thread is done with them last, so a number that another
+    thread's open() reuses is never read from.
+    """
+    backend = "inotify"
+
+    def __init__(self, roots: List[str]):
+        super().__init__(roots)
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1: {os.strerror(errno)}")
+        self._state_lock = threading.Lock()
+        self._waiting = False
+        self._released = False
+        # watch descriptor -> (profile or root path, what is watched)
+        self.watches: Dict[int, Tuple[str, str]] = {}
+        try:
+            self._wake_r, self._wake_w = os.pipe()
+        except BaseException:
+            os.close(self.fd)
+            raise
+        try:
+            for root in self.roots:
+                if self._add(root, ROOT_MASK, root, _ROOT):
+                    with os.scandir(root) as entries:
+                        for entry in entries:
+                            if entry.is_dir():
+                                self._add_profile(entry.path)
+        except BaseException:
+            for fd in (self.fd, self._wake_r, self._wake_w):
+                os.close(fd)
+            raise
+
+    def _add(self, path: str, mask: int, owner: str, kind: str) -> bool:
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            # Gone already, or out of watches (fs.inotify.max_user_watches)
+            return False
+        self.watches[wd] = (owner, kind)
+        return True
+
+    def _add_profile(self, path: str):
+        if self._add(path, PROFILE_MASK, path, _PROFILE):
+            self._add(os.path.join(path, SAVE_DIR), SAVE_MASK, path, _SAVES)
+
+    def wait(self, timeout: float) -> Set[str]:
+        with self._state_lock:
+            if self.closed.is_set():
+                return set()
+            self._waiting = True
+        changed: Set[str] = set()
+        try:
+            ready, _, _ = select.select([self.fd, self._wake_r], [], [], timeout)
+            while self.fd in ready and not self.closed.is_set():
+                try:
+                    data = os.read(self.fd, 64 * 1024)
+                except BlockingIOError:
+                    break
+                self._parse(data, changed)
+                ready, _, _ = select.select([self.fd], [], [], 0)
+        finally:
+            with self._state_lock:
+                self._waiting = False
+                if self.closed.is_set():
+                    self._release()
+        return set() if self.closed.is_set() else changed
+
+    def _parse(self, data: bytes, changed: Set[str]):
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0"))
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                changed.update(self.roots)
+                continue
+            watch = self.watches.get(wd)
+            if watch is None:
+                continue
+            path, kind = watch
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+            elif kind == _ROOT:
+                profile = os.path.join(path, name)
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_profile(profile)
+                changed.add(profile)
+            elif kind == _SAVES:
+                changed.add(path)
+            elif name in WATCHED_NAMES:
+                if name == SAVE_DIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add(os.path.join(path, SAVE_DIR), SAVE_MASK, path, _SAVES)
+                changed.add(path)
+
+    def close(self):
+        with self._state_lock:
+            if self.closed.is_set():
+                return
+            super().close()
+            if self._waiting:
+                os.write(self._wake_w, b"x")
+            else:
+                self._release()
+
+    def _release(self):
+        # Called with _state_lock held, once nobody is selecting on the fds
+        if not self._released:
+            self._released = True
+            for fd in (self.fd, self._wake_r, self._wake_w):
+                os.close(fd)
+
+
+class PollingSource(ChangeSource):
+    """Diffs a (folder mtime, profile.sii mtime and size, save/ mtime) snapshot per poll
+
+    One scandir per root and about three stats per profile each poll.
+    """
+    backend = "polling"
+
+    def __init__(self, roots: List[str], interval: float = DEFAULT_POLL_INTERVAL):
+        super().__init__(roots)
+        self.interval = interval
+        self.state = self._snapshot()
+        self._next_poll = time.monotonic() + interval
+
+    def _snapshot(self) -> Dict[str, tuple]:
+        state = {}
+        for root in self.roots:
+            try:
+                with os.scandir(root) as entries:
+                    folders = [entry for entry in entries if entry.is_dir()]
+            except OSError:
+                continue
+            for entry in folders:
+                try:
+                    folder_mtime = entry.stat().st_mtime_ns
+                except OSError:
+                    continue
+                try:
+                    st = os.stat(os.path.join(entry.path, "profile.sii"))
+                    profile = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    profile = (-1, -1)
+                try:
+                    saves = os.stat(os.path.join(entry.path, SAVE_DIR)).st_mtime_ns
+                except OSError:
+                    saves = -1
+                state[entry.path] = (folder_mtime,) + profile + (saves,)
+        return state
+
+    def wait(self, timeout: float) -> Set[str]:
+        delay = min(timeout, max(0.0, self._next_poll - time.monotonic()))
+        if self.closed.wait(delay):
+            return set()
+        if time.monotonic() < self._next_poll:
+            return set()
+        self._next_poll = time.monotonic() + self.interval
+        previous, self.state = self.state, self._snapshot()
+        return {path for path in previous.keys() | self.state.keys()
+                if previous.get(path) != self.state.get(path)}
+
+
+def open_change_source(roots: List[str], backend: str = "auto",
+                       interval: float = DEFAULT_POLL_INTERVAL) -> ChangeSource:
+    """inotify where available ("auto"), else polling every `interval` seconds"""
+    if backend not in ("auto", "inotify", "polling"):
+        raise ValueError(f"unknown watch backend {backend!r}")
+    if backend != "polling" and inotify_available():
+        try:
+            return InotifySource(roots)
+        except OSError:
+            if backend == "inotify":
+                raise
+    elif backend == "inotify":
+        raise OSError("inotify is not available on this system")
+    return PollingSource(roots, interval)
+
+
+def debounced(source: ChangeSource, debounce: float = DEFAULT_DEBOUNCE,
+              max_delay: float = DEFAULT_MAX_DELAY,
+              stop: Optional[threading.Event] = None) -> Iterator[Set[str]]:
+    """Batches of changed paths, each yielded once `debounce` seconds pass quietly
+
+    A game save touches profile.sii and save/ several times in a row; those
+    events become one batch. Runs until `stop` is set or the source closes.
+    """
+    stop = stop or source.closed
+    # Polling cannot tell a quiet period shorter than one poll
+    quiet = max(debounce, getattr(source, "interval", 0.0))
+    while not (stop.is_set() or source.closed.is_set()):
+        changed = source.wait(0.5)
+        if not changed:
+            continue
+        deadline = time.monotonic() + max_delay
+        while not stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            more = source.wait(min(quiet, remaining))
+            if not more:
+                break
+            changed |= more
+        if not stop.is_set():
+            yield changed
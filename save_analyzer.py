@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Save game analyzer for ETS2 Mod Manager
+Streams each save's game.sii with bounded memory to find the mods and DLC it
+depends on, caches the results per save by mtime, and reports which saves
+break when mods are removed
+"""
+
+import mmap
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fs_walk import FsWalker, load_json_index, save_json_index
+from sii import (
+    CHUNK_SIZE, FORMAT_BINARY, FORMAT_ENCRYPTED, FORMAT_TEXT, FORMAT_UNKNOWN, HEAD_SIZE,
+    decode_sii_text, detect_sii_format, iter_sii_fields, iter_stream_chunks,
+)
+from sii_binary import decrypt_scsc_stream, iter_bsii_fields
+
+SAVE_INDEX_VERSION = 1
+
+SAVE_FILE = "game.sii"
+INFO_FILE = "info.sii"
+# `dependencies[n]: "mod|<package id>|<name>"`, "dlc|..." and "rdlc|..." entries:
+# what the game checks before it loads a save
+DEPENDENCY_KEYS = ("dependencies",)
+DLC_KINDS = ("dlc", "rdlc")
+DEFAULT_SAVE_WORKERS = 4
+
+
+@dataclass
+class SaveInfo:
+    """What one save folder depends on"""
+    path: str
+    profile: str
+    size: int
+    mtime_ns: int
+    format: str = FORMAT_UNKNOWN
+    mods: List[str] = field(default_factory=list)  # package ids
+    dlc: List[str] = field(default_factory=list)
+    error: str = ""
+
+    @property
+    def slot(self) -> str:
+        return os.path.basename(self.path)
+
+
+@dataclass
+class SaveBreakage:
+    """A save that needs mods which would no longer be installed"""
+    save: SaveInfo
+    missing: List[str]
+
+
+def parse_dependency(value: str) -> Tuple[str, str, str]:
+    """(kind, id, display name) of a dependencies entry like "mod|promods|ProMods" """
+    kind, _, rest = value.partition('|')
+    package_id, _, name = rest.partition('|')
+    return kind, package_id, name or package_id
+
+
+def _text_dependencies(f: BinaryIO, chunk_size: int) -> List[str]:
+    return [value for key, value in iter_sii_fields(iter_stream_chunks(f, chunk_size), DEPENDENCY_KEYS)
+            if key != "dependencies"]
+
+
+def _binary_dependencies(f: BinaryIO) -> List[str]:
+    if not os.fstat(f.fileno()).st_size:
+        return []
+    # Mapped pages come from the page cache, only the dependency values are built
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return [str(item) for _, _, value in iter_bsii_fields(data, DEPENDENCY_KEYS)
+                for item in (value if isinstance(value, list) else [value])]
+
+
+def read_save_dependencies(path: str, chunk_size: int = CHUNK_SIZE) -> Tuple[str, List[str]]:
+    """(format, dependency entries) of a game.sii or info.sii
+
+    Text is streamed a chunk at a time and BSII walked through mmap; ScsC
+    is decrypted chunk by chunk into a temporary file first. Memory use
+    stays flat however large the save is. Scrambled (3nK) files are rare
+    and decoded whole.
+    """
+    with open(path, 'rb') as f:
+        sii_format = detect_sii_format(f.read(HEAD_SIZE))
+        f.seek(0)
+        if sii_format == FORMAT_TEXT:
+            return sii_format, _text_dependencies(f, chunk_size)
+        if sii_format == FORMAT_BINARY:
+            return sii_format, _binary_dependencies(f)
+        if sii_format == FORMAT_ENCRYPTED:
+            with tempfile.TemporaryFile(prefix="ets2-save-") as plain:
+                decrypt_scsc_stream(f, plain)
+                plain.seek(0)
+                inner = detect_sii_format(plain.read(HEAD_SIZE))
+                plain.seek(0)
+                if inner == FORMAT_BINARY:
+                    return sii_format, _binary_dependencies(plain)
+                if inner == FORMAT_TEXT:
+                    return sii_format, _text_dependencies(plain, chunk_size)
+    text = decode_sii_text(path)
+    return sii_format, [value for key, value in iter_sii_fields([text], DEPENDENCY_KEYS)
+                        if key != "dependencies"]
+
+
+def analyze_save(path: str, profile: str, size: int, mtime_ns: int) -> SaveInfo:
+    """Dependencies of one save folder (top-level, so process pools can run it)"""
+    info = SaveInfo(path=path, profile=profile, size=size, mtime_ns=mtime_ns)
+    try:
+        info.format, dependencies = read_save_dependencies(os.path.join(path, SAVE_FILE))
+        info_file = os.path.join(path, INFO_FILE)
+        if not dependencies and os.path.isfile(info_file):
+            dependencies = read_save_dependencies(info_file)[1]
+    except (OSError, ValueError) as e:
+        info.error = str(e)
+        return info
+    for entry in dict.fromkeys(dependencies):
+        kind, package_id, _ = parse_dependency(entry)
+        if kind == "mod":
+            info.mods.append(package_id)
+        elif kind in DLC_KINDS:
+            info.dlc.append(package_id)
+    return info
+
+
+def _analyze_job(job: Tuple[str, str, int, int]) -> SaveInfo:
+    return analyze_save(*job)
+
+
+def iter_saves(fs: FsWalker, profile_path: str) -> Iterator[Tuple[str, int, int]]:
+    """(save folder, game.sii size, game.sii mtime_ns) for each save of a profile"""
+    for entry in fs.subdirs(os.path.join(profile_path, "save")):
+        st = fs.stat(os.path.join(entry.path, SAVE_FILE))
+        if st is not None:
+            yield entry.path, st.st_size, st.st_mtime_ns
+
+
+class SaveIndex:
+    """On-disk map of save folder -> SaveInfo, re-analyzed only when game.sii changes"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.saves: Dict[str, SaveInfo] = {}
+        self.dirty = False
+        self.fs = FsWalker()
+        self.analyzed = 0
+        self.reused = 0
+        self.removed = 0
+
+    def load(self) -> "SaveIndex":
+        """Load the index from disk; a missing or unreadable index starts empty"""
+        if not self.path:
+            return self
+        self.saves = load_json_index(self.path, SAVE_INDEX_VERSION, lambda data: {
+            record["path"]: SaveInfo(**record) for record in data.get("saves", [])
+        }, {})
+        return self
+
+    def save(self):
+        """Write the index atomically if anything changed"""
+        if not self.path or not self.dirty:
+            return
+        save_json_index(self.path, SAVE_INDEX_VERSION, saves=[asdict(info) for info in self.saves.values()])
+        self.dirty = False
+
+    def update(self, profile_paths: Iterable[str], workers: int = DEFAULT_SAVE_WORKERS,
+               processes: bool = True) -> "SaveIndex":
+        """Analyze saves of `profile_paths` that are new or whose game.sii changed
+
+        Saves that vanished from a scanned profile are dropped. Parsing is
+        pure Python and CPU bound, so it runs on a process pool by default.
+        """
+        self.analyzed = self.reused = self.removed = 0
+        scanned = set()
+        seen = set()
+        jobs = []
+        for profile in profile_paths:
+            scanned.add(profile)
+            for path, size, mtime_ns in iter_saves(self.fs, profile):
+                seen.add(path)
+                known = self.saves.get(path)
+                if known and known.size == size and known.mtime_ns == mtime_ns:
+                    self.reused += 1
+                else:
+                    jobs.append((path, profile, size, mtime_ns))
+
+        if jobs:
+            if workers <= 1 or len(jobs) == 1:
+                self._store(map(_analyze_job, jobs))
+            else:
+                executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+                with executor(max_workers=min(workers, len(jobs))) as pool:
+                    self._store(pool.map(_analyze_job, jobs))
+
+        for path, info in list(self.saves.items()):
+            if info.profile in scanned and path not in seen:
+                del self.saves[path]
+                self.removed += 1
+                self.dirty = True
+        return self
+
+    def _store(self, results: Iterable[SaveInfo]):
+        for info in results:
+            self.saves[info.path] = info
+            self.analyzed += 1
+            self.dirty = True
+
+    def by_mod(self) -> Dict[str, List[SaveInfo]]:
+        """Saves grouped by each mod they depend on"""
+        grouped: Dict[str, List[SaveInfo]] = {}
+        for info in self.saves.values():
+            for mod_id in info.mods:
+                grouped.setdefault(mod_id, []).append(info)
+        return grouped
+
+    def broken_by(self, removed: Iterable[str],
+                  profiles: Optional[Iterable[str]] = None) -> List[SaveBreakage]:
+        """Saves (optionally only of `profiles`) that need any of the `removed` mods"""
+        removed = set(removed)
+        profiles = set(profiles) if profiles is not None else None
+        broken = []
+        for info in sorted(self.saves.values(), key=lambda i: (i.profile, i.slot)):
+            if profiles is not None and info.profile not in profiles:
+                continue
+            missing = [mod_id for mod_id in info.mods if mod_id in removed]
+            if missing:
+                broken.append(SaveBreakage(info, missing))
+        return broken
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+SII helpers for ETS2 Mod Manager
+Format detection, single-pass streaming extraction of SiiNunit key/value
+pairs, text rendering of decoded binary units, and in-place patching of the
+active_mods block
+"""
+
+import codecs
+import mmap
+import os
+import re
+import struct
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+from fs_walk import atomic_writer, write_all
+from sii_binary import (
+    BSII_SIGNATURE, SCRAMBLED_SIGNATURE, SCSC_SIGNATURE, SiiToken, SiiUnit,
+    decode_bsii, decrypt_scsc, unscramble_3nk,
+)
+
+CHUNK_SIZE = 64 * 1024
+
+# One attribute per line: `key: value`, `key[3]: "value"`, `key[]: value`.
+# Anchoring on a literal newline lets the regex engine skip ahead with a fast
+# character search instead of trying every offset.
+_FIELD_TEMPLATE = r'\n[ \t]*({keys}(?:\[\d*\])?)[ \t]*:[ \t]*([^\r\n]*)'
+_FIELD_RE = re.compile(_FIELD_TEMPLATE.format(keys=r'[A-Za-z_]\w*'))
+
+# Keys read by the manager, longest alternatives first
+PROFILE_KEYS = (
+    'active_mods',
+    'profile_name',
+    'company_name',
+    'money_account',
+    'cached_experience',
+    'experience',
+)
+
+_ESCAPE_RE = re.compile(r'\\(x[0-9A-Fa-f]{2}|.)')
+
+TEXT_SIGNATURE = b'SiiNunit'
+_UTF8_BOM = b'\xef\xbb\xbf'
+HEAD_SIZE = len(TEXT_SIGNATURE) + 16
+
+# Values returned by detect_sii_format
+FORMAT_TEXT = "text"
+FORMAT_BINARY = "binary"
+FORMAT_ENCRYPTED = "encrypted"
+FORMAT_SCRAMBLED = "scrambled"
+FORMAT_UNKNOWN = "unknown"
+
+# Printable ASCII runs long enough to be field names or values
+MIN_TEXT_RUN = 6
+_PRINTABLE_RUN_RE = re.compile(rb'[\x20-\x7e]{%d,}' % MIN_TEXT_RUN)
+
+# `active_mods: N` followed by its `active_mods[i]: ...` lines
+_ACTIVE_MODS_BLOCK_RE = re.compile(
+    rb'^([ \t]*)active_mods[ \t]*:[^\r\n]*(\r?\n)(?:[ \t]*active_mods\[\d*\][ \t]*:[^\r\n]*\r?\n)*',
+    re.MULTILINE,
+)
+# First `type : name {` line, where a missing block gets inserted
+_UNIT_OPEN_RE = re.compile(rb'^[ \t]*\w+[ \t]*:[ \t]*[\w.]+[ \t]*\{[ \t]*(\r?\n)', re.MULTILINE)
+
+
+class SiiPatchError(ValueError):
+    """Raised when a profile cannot be patched in place"""
+
+
+@dataclass
+class SiiProfileFields:
+    """Values the manager reads from a profile.sii"""
+    profile_name: str = ""
+    company_name: str = ""
+    experience: Optional[int] = None
+    money_account: Optional[int] = None
+    active_mods_count: Optional[int] = None
+    active_mods: List[str] = field(default_factory=list)
+
+
+def _unquote(value: str) -> str:
+    """Strip quotes and resolve SII escapes (\\", \\\\ and \\xNN UTF-8 bytes)"""
+    end = value.find('"', 1)
+    while end > 0 and value[end - 1] == '\\':
+        end = value.find('"', end + 1)
+    inner = value[1:end] if end > 0 else value[1:]
+    if '\\' not in inner:
+        return inner
+
+    raw = bytearray()
+    pos = 0
+    for match in _ESCAPE_RE.finditer(inner):
+        raw += inner[pos:match.start()].encode('utf-8')
+        escape = match.group(1)
+        if len(escape) == 3:
+            raw.append(int(escape[1:], 16))
+        else:
+            raw += escape.encode('utf-8')
+        pos = match.end()
+    raw += inner[pos:].encode('utf-8')
+    return raw.decode('utf-8', errors='replace')
+
+
+def is_text_sii(head: bytes) -> bool:
+    """True if the first bytes of a file look like a plain SiiNunit document"""
+    if head.startswith(_UTF8_BOM):
+        head = head[len(_UTF8_BOM):]
+    return head.lstrip().startswith(TEXT_SIGNATURE)
+
+
+def detect_sii_format(head: bytes) -> str:
+    """Classify SII data from its first bytes"""
+    if head.startswith(SCSC_SIGNATURE):
+        return FORMAT_ENCRYPTED
+    if head.startswith(BSII_SIGNATURE):
+        return FORMAT_BINARY
+    if head.startswith(SCRAMBLED_SIGNATURE):
+        return FORMAT_SCRAMBLED
+    if is_text_sii(head):
+        return FORMAT_TEXT
+    return FORMAT_UNKNOWN
+
+
+def unwrap_sii(data: bytes) -> bytes:
+    """Strip ScsC encryption and 3nK scrambling, leaving text or BSII bytes"""
+    while True:
+        sii_format = detect_sii_format(data[:HEAD_SIZE])
+        if sii_format == FORMAT_ENCRYPTED:
+            data = decrypt_scsc(data)
+        elif sii_format == FORMAT_SCRAMBLED:
+            data = unscramble_3nk(data)
+        else:
+            return data
+
+
+def quote_sii_string(value: str) -> str:
+    """Quote a string the way the game writes it: non-ASCII as \\xNN bytes"""
+    if value.isascii() and '"' not in value and '\\' not in value:
+        return f'"{value}"'
+    out = []
+    for char in value:
+        if char in '"\\':
+            out.append('\\' + char)
+        elif ' ' <= char <= '~':
+            out.append(char)
+        else:
+            out.extend(f'\\x{byte:02x}' for byte in char.encode('utf-8'))
+    return '"' + ''.join(out) + '"'
+
+
+def _format_value(value: Any, quote: bool = True) -> str:
+    """Render one decoded BSII value as SII text"""
+    if isinstance(value, SiiToken):
+        return str(value)
+    if isinstance(value, str):
+        return quote_sii_string(value) if quote else value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e7:
+            return str(int(value))
+        return "&" + struct.pack('>f', value).hex()
+    if isinstance(value, tuple):
+        return "(" + ", ".join(_format_value(v) for v in value) + ")"
+    if value is None:
+        return "null"
+    return str(value)
+
+
+def iter_unit_fields(units: Iterable[SiiUnit]) -> Iterator[Tuple[str, str]]:
+    """Yield (key, value) pairs from decoded units, shaped like iter_sii_fields"""
+    for unit in units:
+        for key, value in unit.fields.items():
+            if isinstance(value, list):
+                yield key, str(len(value))
+                for i, item in enumerate(value):
+                    yield f"{key}[{i}]", _format_value(item, quote=False)
+            else:
+                yield key, _format_value(value, quote=False)
+
+
+def text_safe(units: Iterable[SiiUnit]) -> bool:
+    """False if a value has no faithful text form in format_sii_text
+
+    Quaternions and placements are written as plain tuples, which the game
+    does not read back as the same values.
+    """
+    for unit in units:
+        for value in unit.fields.values():
+            for item in value if isinstance(value, list) else (value,):
+                if isinstance(item, tuple) and len(item) not in (2, 3):
+                    return False
+    return True
+
+
+def format_sii_text(units: Iterable[SiiUnit]) -> str:
+    """Render decoded units as a SiiNunit text document"""
+    lines = ["SiiNunit", "{"]
+    for unit in units:
+        lines.append(f"{unit.type} : {unit.name} {{")
+        for key, value in unit.fields.items():
+            if isinstance(value, list):
+                lines.append(f" {key}: {len(value)}")
+                for i, item in enumerate(value):
+                    lines.append(f" {key}[{i}]: {_format_value(item)}")
+            else:
+                lines.append(f" {key}: {_format_value(value)}")
+        lines.append("}")
+        lines.append("")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def read_sii_units(path: str) -> List[SiiUnit]:
+    """Decode a binary, encrypted or scrambled-binary SII file into units"""
+    with open(path, 'rb') as f:
+        data = unwrap_sii(f.read())
+    return decode_bsii(data)
+
+
+def extract_printable_text(data) -> str:
+    """Pull printable ASCII runs out of binary SII data, one run per line
+
+    Works on any buffer (bytes, memoryview, mmap); the scan happens inside
+    the regex engine so there is no per-byte Python loop.
+    """
+    return b'\n'.join(_PRINTABLE_RUN_RE.findall(data)).decode('ascii')
+
+
+def decode_sii_text(path: str) -> str:
+    """Text for any SII file
+
+    Text is returned as-is, ScsC/BSII/3nK files are decoded and rendered as
+    SiiNunit text, and anything unrecognised falls back to printable runs.
+    """
+    with open(path, 'rb') as f:
+        sii_format = detect_sii_format(f.read(HEAD_SIZE))
+        if sii_format == FORMAT_UNKNOWN:
+            if not os.fstat(f.fileno()).st_size:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return extract_printable_text(data)
+        f.seek(0)
+        data = f.read()
+    if sii_format != FORMAT_TEXT:
+        data = unwrap_sii(data)
+        if data.startswith(BSII_SIGNATURE):
+            return format_sii_text(decode_bsii(data))
+    return data.decode('utf-8', errors='ignore')
+
+
+def iter_file_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Yield decoded text chunks from a file without loading it whole"""
+    with open(path, 'rb') as f:
+        yield from iter_stream_chunks(f, chunk_size)
+
+
+def iter_stream_chunks(f: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """iter_file_chunks() over an open binary file, from its current position"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    while True:
+        block = f.read(chunk_size)
+        if not block:
+            break
+        text = decoder.decode(block)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+_key_patterns = {}
+
+
+def _field_pattern(keys: Optional[Tuple[str, ...]]):
+    """Compiled attribute regex, optionally restricted to a set of keys"""
+    if keys is None:
+        return _FIELD_RE
+    pattern = _key_patterns.get(keys)
+    if pattern is None:
+        alternation = '|'.join(re.escape(key) for key in keys)
+        pattern = re.compile(_FIELD_TEMPLATE.format(keys=f'(?:{alternation})'))
+        _key_patterns[keys] = pattern
+    return pattern
+
+
+def iter_sii_fields(chunks: Iterable[str],
+                    keys: Optional[Tuple[str, ...]] = None) -> Iterator[Tuple[str, str]]:
+    """Walk SiiNunit text once and yield (key, value) attributes
+
+    With `keys`, only those attributes (and their `[n]` array items) are
+    matched, which keeps the whole scan inside the regex engine. Quoted
+    values are unquoted; unit headers (`type : name {`) are skipped. Only
+    complete lines are matched, the partial last line of each chunk is
+    carried over to the next one.
+    """
+    finditer = _field_pattern(keys).finditer
+    tail = "\n"
+    for chunk in chunks:
+        buf = tail + chunk
+        cut = buf.rfind('\n')
+        if not cut:
+            tail = buf
+            continue
+        for match in finditer(buf, 0, cut):
+            key, value = match.groups()
+            value = value.rstrip()
+            if value.startswith('"'):
+                value = _unquote(value)
+            elif value.endswith('{'):
+                continue
+            yield key, value
+        tail = buf[cut:]
+
+    for match in finditer(tail + "\n"):
+        key, value = match.groups()
+        value = value.rstrip()
+        if value.startswith('"'):
+            value = _unquote(value)
+        elif value.endswith('{'):
+            continue
+        yield key, value
+
+
+def collect_profile_fields(pairs: Iterable[Tuple[str, str]]) -> SiiProfileFields:
+    """Pick the profile values out of a (key, value) stream, first match wins"""
+    fields = SiiProfileFields()
+    for key, value in pairs:
+        if key.startswith('active_mods'):
+            if key == 'active_mods':
+                if fields.active_mods_count is None and value.isdigit():
+                    fields.active_mods_count = int(value)
+            elif key[11] == '[':
+                fields.active_mods.append(value)
+        elif key == 'profile_name':
+            if not fields.profile_name:
+                fields.profile_name = value.strip()
+        elif key == 'company_name':
+            if not fields.company_name:
+                fields.company_name = value.strip()
+        elif key.endswith('experience'):
+            if fields.experience is None and value.isdigit():
+                fields.experience = int(value)
+        elif key == 'money_account':
+            if fields.money_account is None and value.isdigit():
+                fields.money_account = int(value)
+    return fields
+
+
+def read_profile_fields(path: str, chunk_size: int = CHUNK_SIZE) -> SiiProfileFields:
+    """Extract profile values from a profile.sii in a single pass
+
+    Text files are streamed from disk, binary and encrypted files are
+    decoded into units, and anything else goes through `decode_sii_text`.
+    """
+    with open(path, 'rb') as f:
+        sii_format = detect_sii_format(f.read(HEAD_SIZE))
+        if sii_format in (FORMAT_BINARY, FORMAT_ENCRYPTED, FORMAT_SCRAMBLED):
+            f.seek(0)
+            data = unwrap_sii(f.read())
+            if data.startswith(BSII_SIGNATURE):
+                return collect_profile_fields(iter_unit_fields(decode_bsii(data)))
+            text = data.decode('utf-8', errors='ignore')
+            return collect_profile_fields(iter_sii_fields([text], PROFILE_KEYS))
+    if sii_format == FORMAT_TEXT:
+        chunks = iter_file_chunks(path, chunk_size)
+    else:
+        chunks = [decode_sii_text(path)]
+    return collect_profile_fields(iter_sii_fields(chunks, PROFILE_KEYS))
+
+
+def format_active_mods(mods: List[str], indent: bytes = b' ', newline: bytes = b'\n') -> bytes:
+    """Encoded `active_mods` block for a mod list"""
+    lines = [b'%sactive_mods: %d%s' % (indent, len(mods), newline)]
+    for i, mod in enumerate(mods):
+        lines.append(b'%sactive_mods[%d]: %s%s' % (indent, i, quote_sii_string(mod).encode('utf-8'), newline))
+    return b''.join(lines)
+
+
+def find_active_mods_block(data) -> Tuple[int, int, bytes, bytes]:
+    """(start, end, indent, newline) of the active_mods block in SII text
+
+    If the profile has no block yet, the range is empty and sits just after
+    the first unit header.
+    """
+    match = _ACTIVE_MODS_BLOCK_RE.search(data)
+    if match:
+        return match.start(), match.end(), match.group(1), match.group(2)
+    match = _UNIT_OPEN_RE.search(data)
+    if match:
+        return match.end(), match.end(), b' ', match.group(1)
+    raise SiiPatchError("no active_mods block or unit to insert one into")
+
+
+def patch_active_mods(path: str, mods: List[str]) -> Tuple[int, int]:
+    """Replace only the active_mods block of a profile.sii, atomically
+
+    Text profiles are mmapped and everything outside the block is copied
+    unchanged with a single gathered write; the mapping is closed before
+    the new file is renamed over the old one, which Windows requires.
+    Binary and encrypted profiles are decoded to text first (the game
+    reads text SII), unless they hold values with no faithful text form
+    here; those raise SiiPatchError. Returns (old block size, new block
+    size) in bytes.
+    """
+    with open(path, 'rb') as f:
+        sii_format = detect_sii_format(f.read(HEAD_SIZE))
+        if sii_format == FORMAT_TEXT:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        elif sii_format in (FORMAT_BINARY, FORMAT_ENCRYPTED, FORMAT_SCRAMBLED):
+            f.seek(0)
+            data = unwrap_sii(f.read())
+            if data.startswith(BSII_SIGNATURE):
+                units = decode_bsii(data)
+                if not text_safe(units):
+                    raise SiiPatchError("profile has quaternion or placement values that "
+                                        "would not survive conversion to text")
+                data = format_sii_text(units).encode('utf-8')
+        else:
+            raise SiiPatchError(f"cannot patch a {sii_format} SII file")
+
+    try:
+        start, end, indent, newline = find_active_mods_block(data)
+        block = format_active_mods(mods, indent, newline)
+        with atomic_writer(path, binary=True) as out:
+            with memoryview(data) as view:
+                write_all(out.fileno(), [view[:start], block, view[end:]])
+            if isinstance(data, mmap.mmap):
+                data.close()
+        return end - start, len(block)
+    finally:
+        if isinstance(data, mmap.mmap) and not data.closed:
+            data.close()
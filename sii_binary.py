@@ -0,0 +1,605 @@
+#!/usr/bin/env python3
+"""
+Binary SII support for ETS2 Mod Manager
+Decodes encrypted ("ScsC"), binary ("BSII") and scrambled ("3nK") SII files
+into structured units, and encodes BSII/ScsC for test fixtures.
+
+Pure standard library; uses the `cryptography` package for AES when it is
+installed, otherwise a table-driven AES-256 implementation below.
+"""
+
+import os
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Container, Dict, Iterator, List, Optional, Tuple
+
+SCSC_SIGNATURE = b'ScsC'
+BSII_SIGNATURE = b'BSII'
+# BSII format versions whose layout this decoder was checked against
+BSII_VERSIONS = (2,)
+SCRAMBLED_SIGNATURE = b'3nK'
+
+# Published SII key used by the game for ScsC containers
+SII_KEY = bytes([
+    0x2a, 0x5f, 0xcb, 0x17, 0x91, 0xd2, 0x2f, 0xb6, 0x02, 0x45, 0xb3, 0xd8, 0x36, 0x9e, 0xd0, 0xb2,
+    0xc2, 0x73, 0x71, 0x56, 0x3f, 0xbf, 0x1f, 0x3c, 0x9e, 0xdf, 0x6b, 0x11, 0x82, 0x5a, 0x5d, 0x0a,
+])
+
+# ScsC header: signature, HMAC-SHA256, AES IV, decompressed size
+_SCSC_HEADER = struct.Struct('<4s32s16sI')
+
+
+class SiiDecodeError(ValueError):
+    """Raised when a binary SII file is malformed or unsupported"""
+
+
+class SiiToken(str):
+    """Unquoted SII value: encoded-string tokens and unit references"""
+
+
+@dataclass
+class SiiUnit:
+    """One `type : name { ... }` block"""
+    type: str
+    name: str
+    fields: Dict[str, Any] = field(default_factory=dict)
+
+
+# ---------------------------------------------------------------------------
+# AES-256 (CBC decrypt for ScsC, encrypt for fixtures)
+# ---------------------------------------------------------------------------
+
+def _build_aes_tables():
+    def mul(a, b):
+        result = 0
+        while b:
+            if b & 1:
+                result ^= a
+            a <<= 1
+            if a & 0x100:
+                a ^= 0x11b
+            b >>= 1
+        return result
+
+    sbox = [0] * 256
+    for x in range(256):
+        inverse = 0
+        if x:
+            inverse = next(y for y in range(1, 256) if mul(x, y) == 1)
+        s = inverse
+        for shift in range(1, 5):
+            s ^= ((inverse << shift) | (inverse >> (8 - shift))) & 0xff
+        sbox[x] = s ^ 0x63
+    inv_sbox = [0] * 256
+    for x, s in enumerate(sbox):
+        inv_sbox[s] = x
+
+    te = [[0] * 256 for _ in range(4)]
+    td = [[0] * 256 for _ in range(4)]
+    for x in range(256):
+        s = sbox[x]
+        word = (mul(s, 2) << 24) | (s << 16) | (s << 8) | mul(s, 3)
+        si = inv_sbox[x]
+        inv_word = (mul(si, 14) << 24) | (mul(si, 9) << 16) | (mul(si, 13) << 8) | mul(si, 11)
+        for i in range(4):
+            te[i][x] = word
+            td[i][x] = inv_word
+            word = (word >> 8) | ((word & 0xff) << 24)
+            inv_word = (inv_word >> 8) | ((inv_word & 0xff) << 24)
+    return sbox, inv_sbox, te, td
+
+
+_SBOX, _INV_SBOX, _TE, _TD = _build_aes_tables()
+
+
+def _expand_key(key: bytes) -> List[int]:
+    """AES-256 key schedule: 60 round-key words"""
+    if len(key) != 32:
+        raise ValueError("AES-256 needs a 32-byte key")
+    words = list(struct.unpack('>8I', key))
+    rcon = 1
+    sbox = _SBOX
+    for i in range(8, 60):
+        temp = words[i - 1]
+        if i % 8 == 0:
+            temp = ((temp << 8) | (temp >> 24)) & 0xffffffff
+            temp = ((sbox[temp >> 24] << 24) | (sbox[(temp >> 16) & 0xff] << 16)
+                    | (sbox[(temp >> 8) & 0xff] << 8) | sbox[temp & 0xff]) ^ (rcon << 24)
+            rcon = (rcon << 1) ^ (0x11b if rcon & 0x80 else 0)
+        elif i % 8 == 4:
+            temp = ((sbox[temp >> 24] << 24) | (sbox[(temp >> 16) & 0xff] << 16)
+                    | (sbox[(temp >> 8) & 0xff] << 8) | sbox[temp & 0xff])
+        words.append(words[i - 8] ^ temp)
+    return words
+
+
+def _decrypt_schedule(words: List[int]) -> List[int]:
+    """Round keys for the equivalent inverse cipher"""
+    rounds = [words[i:i + 4] for i in range(0, 60, 4)][::-1]
+    td0, td1, td2, td3 = _TD
+    sbox = _SBOX
+    for r in range(1, 14):
+        rounds[r] = [td0[sbox[w >> 24]] ^ td1[sbox[(w >> 16) & 0xff]]
+                     ^ td2[sbox[(w >> 8) & 0xff]] ^ td3[sbox[w & 0xff]] for w in rounds[r]]
+    return [w for r in rounds for w in r]
+
+
+def _aes_cbc_decrypt_py(key: bytes, iv: bytes, data: bytes) -> bytes:
+    rk = _decrypt_schedule(_expand_key(key))
+    td0, td1, td2, td3 = _TD
+    si = _INV_SBOX
+    unpack = struct.Struct('>4I')
+    out = bytearray()
+    p0, p1, p2, p3 = unpack.unpack(iv)
+    for offset in range(0, len(data) - len(data) % 16, 16):
+        c0, c1, c2, c3 = unpack.unpack_from(data, offset)
+        s0, s1, s2, s3 = c0 ^ rk[0], c1 ^ rk[1], c2 ^ rk[2], c3 ^ rk[3]
+        k = 4
+        for _ in range(13):
+            t0 = td0[s0 >> 24] ^ td1[(s3 >> 16) & 0xff] ^ td2[(s2 >> 8) & 0xff] ^ td3[s1 & 0xff] ^ rk[k]
+            t1 = td0[s1 >> 24] ^ td1[(s0 >> 16) & 0xff] ^ td2[(s3 >> 8) & 0xff] ^ td3[s2 & 0xff] ^ rk[k + 1]
+            t2 = td0[s2 >> 24] ^ td1[(s1 >> 16) & 0xff] ^ td2[(s0 >> 8) & 0xff] ^ td3[s3 & 0xff] ^ rk[k + 2]
+            t3 = td0[s3 >> 24] ^ td1[(s2 >> 16) & 0xff] ^ td2[(s1 >> 8) & 0xff] ^ td3[s0 & 0xff] ^ rk[k + 3]
+            s0, s1, s2, s3 = t0, t1, t2, t3
+            k += 4
+        o0 = ((si[s0 >> 24] << 24) | (si[(s3 >> 16) & 0xff] << 16)
+              | (si[(s2 >> 8) & 0xff] << 8) | si[s1 & 0xff]) ^ rk[k]
+        o1 = ((si[s1 >> 24] << 24) | (si[(s0 >> 16) & 0xff] << 16)
+              | (si[(s3 >> 8) & 0xff] << 8) | si[s2 & 0xff]) ^ rk[k + 1]
+        o2 = ((si[s2 >> 24] << 24) | (si[(s1 >> 16) & 0xff] << 16)
+              | (si[(s0 >> 8) & 0xff] << 8) | si[s3 & 0xff]) ^ rk[k + 2]
+        o3 = ((si[s3 >> 24] << 24) | (si[(s2 >> 16) & 0xff] << 16)
+              | (si[(s1 >> 8) & 0xff] << 8) | si[s0 & 0xff]) ^ rk[k + 3]
+        out += unpack.pack(o0 ^ p0, o1 ^ p1, o2 ^ p2, o3 ^ p3)
+        p0, p1, p2, p3 = c0, c1, c2, c3
+    return bytes(out)
+
+
+def _aes_cbc_encrypt_py(key: bytes, iv: bytes, data: bytes) -> bytes:
+    rk = _expand_key(key)
+    te0, te1, te2, te3 = _TE
+    sb = _SBOX
+    unpack = struct.Struct('>4I')
+    out = bytearray()
+    p0, p1, p2, p3 = unpack.unpack(iv)
+    for offset in range(0, len(data), 16):
+        b0, b1, b2, b3 = unpack.unpack_from(data, offset)
+        s0, s1, s2, s3 = b0 ^ p0 ^ rk[0], b1 ^ p1 ^ rk[1], b2 ^ p2 ^ rk[2], b3 ^ p3 ^ rk[3]
+        k = 4
+        for _ in range(13):
+            t0 = te0[s0 >> 24] ^ te1[(s1 >> 16) & 0xff] ^ te2[(s2 >> 8) & 0xff] ^ te3[s3 & 0xff] ^ rk[k]
+            t1 = te0[s1 >> 24] ^ te1[(s2 >> 16) & 0xff] ^ te2[(s3 >> 8) & 0xff] ^ te3[s0 & 0xff] ^ rk[k + 1]
+            t2 = te0[s2 >> 24] ^ te1[(s3 >> 16) & 0xff] ^ te2[(s0 >> 8) & 0xff] ^ te3[s1 & 0xff] ^ rk[k + 2]
+            t3 = te0[s3 >> 24] ^ te1[(s0 >> 16) & 0xff] ^ te2[(s1 >> 8) & 0xff] ^ te3[s2 & 0xff] ^ rk[k + 3]
+            s0, s1, s2, s3 = t0, t1, t2, t3
+            k += 4
+        p0 = ((sb[s0 >> 24] << 24) | (sb[(s1 >> 16) & 0xff] << 16)
+              | (sb[(s2 >> 8) & 0xff] << 8) | sb[s3 & 0xff]) ^ rk[k]
+        p1 = ((sb[s1 >> 24] << 24) | (sb[(s2 >> 16) & 0xff] << 16)
+              | (sb[(s3 >> 8) & 0xff] << 8) | sb[s0 & 0xff]) ^ rk[k + 1]
+        p2 = ((sb[s2 >> 24] << 24) | (sb[(s3 >> 16) & 0xff] << 16)
+              | (sb[(s0 >> 8) & 0xff] << 8) | sb[s1 & 0xff]) ^ rk[k + 2]
+        p3 = ((sb[s3 >> 24] << 24) | (sb[(s0 >> 16) & 0xff] << 16)
+              | (sb[(s1 >> 8) & 0xff] << 8) | sb[s2 & 0xff]) ^ rk[k + 3]
+        out += unpack.pack(p0, p1, p2, p3)
+    return bytes(out)
+
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+    def aes_cbc_decrypt(key: bytes, iv: bytes, data: bytes) -> bytes:
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+        return decryptor.update(data[:len(data) - len(data) % 16]) + decryptor.finalize()
+
+    def aes_cbc_decryptor(key: bytes, iv: bytes) -> Callable[[bytes], bytes]:
+        return Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor().update
+except ImportError:
+    aes_cbc_decrypt = _aes_cbc_decrypt_py
+
+    def aes_cbc_decryptor(key: bytes, iv: bytes) -> Callable[[bytes], bytes]:
+        """Decrypt successive whole-block chunks of one CBC stream"""
+        state = [iv]
+
+        def update(data: bytes) -> bytes:
+            if not data:
+                return b''
+            plain = _aes_cbc_decrypt_py(key, state[0], data)
+            state[0] = data[-16:]
+            return plain
+        return update
+
+
+# ---------------------------------------------------------------------------
+# Container formats
+# ---------------------------------------------------------------------------
+
+def decrypt_scsc(data: bytes) -> bytes:
+    """Unwrap an ScsC container: AES-256-CBC, then zlib"""
+    if len(data) < _SCSC_HEADER.size or not data.startswith(SCSC_SIGNATURE):
+        raise SiiDecodeError("not an ScsC file")
+    _, _, iv, size = _SCSC_HEADER.unpack_from(data)
+    plain = aes_cbc_decrypt(SII_KEY, iv, data[_SCSC_HEADER.size:])
+    try:
+        # decompressobj ignores the trailing CBC padding
+        result = zlib.decompressobj().decompress(plain)
+    except zlib.error as e:
+        raise SiiDecodeError(f"ScsC payload did not decompress: {e}")
+    if len(result) != size:
+        raise SiiDecodeError(f"ScsC size mismatch: header {size}, got {len(result)}")
+    return result
+
+
+def decrypt_scsc_stream(src: BinaryIO, dst: BinaryIO, chunk_size: int = 1024 * 1024) -> int:
+    """decrypt_scsc() from one file object to another, `chunk_size` bytes at a time
+
+    Returns the number of bytes written; memory use stays around a chunk
+    whatever the file size.
+    """
+    header = src.read(_SCSC_HEADER.size)
+    if len(header) < _SCSC_HEADER.size or not header.startswith(SCSC_SIGNATURE):
+        raise SiiDecodeError("not an ScsC file")
+    _, _, iv, size = _SCSC_HEADER.unpack(header)
+    decrypt = aes_cbc_decryptor(SII_KEY, iv)
+    decompressor = zlib.decompressobj()
+    written = 0
+    pending = b''
+    try:
+        while not decompressor.eof:
+            block = src.read(chunk_size)
+            if not block:
+                break
+            data = pending + block
+            whole = len(data) - len(data) % 16
+            data, pending = data[:whole], data[whole:]
+            out = decompressor.decompress(decrypt(data), chunk_size)
+            while True:
+                dst.write(out)
+                written += len(out)
+                if decompressor.eof or not decompressor.unconsumed_tail:
+                    break
+                out = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+        out = decompressor.flush()
+    except zlib.error as e:
+        raise SiiDecodeError(f"ScsC payload did not decompress: {e}")
+    dst.write(out)
+    written += len(out)
+    if written != size:
+        raise SiiDecodeError(f"ScsC size mismatch: header {size}, got {written}")
+    return written
+
+
+def encrypt_scsc(payload: bytes, iv: Optional[bytes] = None) -> bytes:
+    """Wrap data in an ScsC container (used to build fixtures)
+
+    The HMAC field is left zeroed; the decoder does not check it.
+    """
+    iv = iv if iv is not None else os.urandom(16)
+    compressed = zlib.compress(payload)
+    padding = 16 - len(compressed) % 16
+    compressed += bytes([padding]) * padding
+    body = _aes_cbc_encrypt_py(SII_KEY, iv, compressed)
+    return _SCSC_HEADER.pack(SCSC_SIGNATURE, bytes(32), iv, len(payload)) + body
+
+
+def unscramble_3nk(data: bytes) -> bytes:
+    """Undo the 3nK byte scrambling used for some text SII files"""
+    if len(data) < 6 or not data.startswith(SCRAMBLED_SIGNATURE):
+        raise SiiDecodeError("not a 3nK file")
+    key = data[5]
+    table = bytes(((((k << 2) ^ (k ^ 0xff)) << 3) ^ k) & 0xff for k in range(256))
+    out = bytearray(data[6:])
+    for i in range(len(out)):
+        out[i] ^= table[(key + i) & 0xff]
+    return bytes(out)
+
+
+# ---------------------------------------------------------------------------
+# BSII
+# ---------------------------------------------------------------------------
+
+_TOKEN_CHARS = "0123456789abcdefghijklmnopqrstuvwxyz_"
+
+# Fixed-size value types: struct format per item
+_FIXED_TYPES = {
+    0x05: struct.Struct('<f'),   # float
+    0x07: struct.Struct('<2f'),  # float2
+    0x09: struct.Struct('<3f'),  # float3
+    0x11: struct.Struct('<3i'),  # int3
+    0x17: struct.Struct('<4f'),  # quaternion
+    0x19: struct.Struct('<8f'),  # placement (raw floats)
+    0x25: struct.Struct('<i'),   # int32
+    0x27: struct.Struct('<I'),   # uint32
+    0x2B: struct.Struct('<H'),   # uint16
+    0x2F: struct.Struct('<I'),   # uint32 (alt)
+    0x31: struct.Struct('<q'),   # int64
+    0x33: struct.Struct('<Q'),   # uint64
+    0x35: struct.Struct('<?'),   # bool
+}
+_STRING = 0x01
+_TOKEN = 0x03
+_ORDINAL = 0x37
+_ID_TYPES = (0x39, 0x3B, 0x3D)
+_SCALAR_TYPES = set(_FIXED_TYPES) | {_STRING, _TOKEN, _ORDINAL} | set(_ID_TYPES)
+_ARRAY_TYPES = {base + 1 for base in _SCALAR_TYPES if base != _ORDINAL}
+
+_U8 = struct.Struct('<B')
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+
+
+def decode_token(value: int) -> SiiToken:
+    """Decode a base-38 packed SII token"""
+    chars = []
+    while value:
+        value, index = divmod(value, 38)
+        if index:
+            chars.append(_TOKEN_CHARS[index - 1])
+    return SiiToken(''.join(chars))
+
+
+def encode_token(text: str) -> int:
+    """Pack a short identifier (max 12 chars) into a base-38 token"""
+    value = 0
+    for char in reversed(text):
+        value = value * 38 + _TOKEN_CHARS.index(char) + 1
+    return value
+
+
+class _BsiiReader:
+    """Cursor over BSII bytes"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+        self.structs: Dict[int, Tuple[str, List[Tuple[str, int, Optional[dict]]]]] = {}
+
+    def u8(self) -> int:
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def u32(self) -> int:
+        value = _U32.unpack_from(self.data, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def u64(self) -> int:
+        value = _U64.unpack_from(self.data, self.pos)[0]
+        self.pos += 8
+        return value
+
+    def string(self) -> str:
+        length = self.u32()
+        end = self.pos + length
+        if end > len(self.data):
+            raise SiiDecodeError(f"string runs past end of data at offset {self.pos}")
+        value = self.data[self.pos:end].decode('utf-8', errors='replace')
+        self.pos = end
+        return value
+
+    def unit_id(self) -> SiiToken:
+        length = self.u8()
+        if length == 0xFF:
+            value = self.u64()
+            words = [(value >> shift) & 0xffff for shift in (48, 32, 16, 0)]
+            while len(words) > 1 and not words[0]:
+                words.pop(0)
+            parts = [f"{words[0]:x}"] + [f"{w:04x}" for w in words[1:]]
+            return SiiToken("_nameless." + ".".join(parts))
+        if length == 0:
+            return SiiToken("null")
+        return SiiToken(".".join(decode_token(self.u64()) for _ in range(length)))
+
+    def value(self, value_type: int, ordinals: Optional[dict]) -> Any:
+        fixed = _FIXED_TYPES.get(value_type)
+        if fixed is not None:
+            values = fixed.unpack_from(self.data, self.pos)
+            self.pos += fixed.size
+            return values[0] if len(values) == 1 else values
+        if value_type == _STRING:
+            return self.string()
+        if value_type == _TOKEN:
+            return decode_token(self.u64())
+        if value_type == _ORDINAL:
+            index = self.u32()
+            return SiiToken(ordinals.get(index, str(index)))
+        if value_type in _ID_TYPES:
+            return self.unit_id()
+        if value_type in _ARRAY_TYPES:
+            item_type = value_type - 1
+            return [self.value(item_type, ordinals) for _ in range(self.u32())]
+        raise SiiDecodeError(f"unknown value type 0x{value_type:02x} at offset {self.pos}")
+
+    def skip_unit_id(self):
+        length = self.u8()
+        self.pos += 8 if length == 0xFF else 8 * length
+
+    def skip(self, value_type: int):
+        """Move past a value without building it"""
+        fixed = _FIXED_TYPES.get(value_type)
+        if fixed is not None:
+            self.pos += fixed.size
+        elif value_type == _STRING:
+            length = self.u32()
+            self.pos += length
+        elif value_type == _TOKEN:
+            self.pos += 8
+        elif value_type == _ORDINAL:
+            self.pos += 4
+        elif value_type in _ID_TYPES:
+            self.skip_unit_id()
+        elif value_type in _ARRAY_TYPES:
+            item_type = value_type - 1
+            count = self.u32()
+            fixed = _FIXED_TYPES.get(item_type)
+            if fixed is not None:
+                self.pos += count * fixed.size
+            elif item_type == _TOKEN:
+                self.pos += count * 8
+            else:
+                for _ in range(count):
+                    self.skip(item_type)
+        else:
+            raise SiiDecodeError(f"unknown value type 0x{value_type:02x} at offset {self.pos}")
+        if self.pos > len(self.data):
+            raise SiiDecodeError(f"value runs past end of data at offset {self.pos}")
+
+    def blocks(self) -> Iterator[Tuple[str, List[Tuple[str, int, Optional[dict]]]]]:
+        """(structure name, fields) of each data block, the cursor on its unit id
+
+        Structure definitions are read along the way.
+        """
+        end = len(self.data)
+        while self.pos + 4 <= end:
+            block_type = self.u32()
+            if block_type == 0:
+                if self.u8():
+                    self.structure()
+                continue
+            if block_type not in self.structs:
+                raise SiiDecodeError(f"data block for undefined structure {block_type} at offset {self.pos}")
+            yield self.structs[block_type]
+
+    def structure(self):
+        struct_id = self.u32()
+        name = self.string()
+        fields = []
+        while True:
+            value_type = self.u32()
+            if value_type == 0:
+                break
+            field_name = self.string()
+            ordinals = None
+            if value_type == _ORDINAL:
+                ordinals = {}
+                for _ in range(self.u32()):
+                    index = self.u32()
+                    ordinals[index] = self.string()
+            elif value_type not in _SCALAR_TYPES and value_type not in _ARRAY_TYPES:
+                raise SiiDecodeError(f"unknown value type 0x{value_type:02x} for {name}.{field_name}")
+            fields.append((field_name, value_type, ordinals))
+        self.structs[struct_id] = (name, fields)
+
+
+def _bsii_reader(data) -> _BsiiReader:
+    if data[:len(BSII_SIGNATURE)] != BSII_SIGNATURE:
+        raise SiiDecodeError("not a BSII file")
+    if len(data) < 8:
+        raise SiiDecodeError("truncated BSII header")
+    version = _U32.unpack_from(data, 4)[0]
+    if version not in BSII_VERSIONS:
+        # Value layouts differ between versions; guessing would corrupt the profile on write
+        raise SiiDecodeError(f"unsupported BSII format version {version}")
+    reader = _BsiiReader(data)
+    reader.pos = 8  # signature + format version
+    return reader
+
+
+def decode_bsii(data: bytes) -> List[SiiUnit]:
+    """Parse BSII bytes into units, in file order"""
+    reader = _bsii_reader(data)
+    units = []
+    try:
+        for struct_name, fields in reader.blocks():
+            unit = SiiUnit(struct_name, reader.unit_id())
+            for field_name, value_type, ordinals in fields:
+                unit.fields[field_name] = reader.value(value_type, ordinals)
+            units.append(unit)
+    except (struct.error, IndexError) as e:
+        raise SiiDecodeError(f"truncated BSII data at offset {reader.pos}: {e}")
+    return units
+
+
+def iter_bsii_fields(data, keys: Optional[Container[str]] = None) -> Iterator[Tuple[str, str, Any]]:
+    """(unit type, field, value) for each field of each unit, in file order
+
+    Nothing is kept between units, so `data` can be an mmap of a file far
+    larger than memory would comfortably hold. With `keys`, other fields
+    are stepped over without being decoded.
+    """
+    reader = _bsii_reader(data)
+    try:
+        for struct_name, fields in reader.blocks():
+            reader.skip_unit_id()
+            for field_name, value_type, ordinals in fields:
+                if keys is None or field_name in keys:
+                    yield struct_name, field_name, reader.value(value_type, ordinals)
+                else:
+                    reader.skip(value_type)
+    except (struct.error, IndexError) as e:
+        raise SiiDecodeError(f"truncated BSII data at offset {reader.pos}: {e}")
+
+
+def _value_type(value: Any) -> int:
+    """BSII type for a Python value (fixture encoder)"""
+    if isinstance(value, SiiToken):
+        return 0x39 if '.' in value or value == "null" else _TOKEN
+    if isinstance(value, bool):
+        return 0x35
+    if isinstance(value, int):
+        return 0x25 if -2 ** 31 <= value < 2 ** 31 else 0x31
+    if isinstance(value, float):
+        return 0x05
+    if isinstance(value, str):
+        return _STRING
+    if isinstance(value, tuple):
+        if len(value) == 3 and all(isinstance(v, int) for v in value):
+            return 0x11
+        return {2: 0x07, 3: 0x09, 4: 0x17, 8: 0x19}[len(value)]
+    if isinstance(value, list):
+        return (_value_type(value[0]) if value else _STRING) + 1
+    raise TypeError(f"cannot encode {type(value).__name__} in BSII")
+
+
+def _encode_string(text: str) -> bytes:
+    raw = text.encode('utf-8')
+    return _U32.pack(len(raw)) + raw
+
+
+def _encode_id(name: str) -> bytes:
+    if name == "null":
+        return _U8.pack(0)
+    if name.startswith("_nameless."):
+        return _U8.pack(0xFF) + _U64.pack(int(name[10:].replace('.', ''), 16))
+    parts = name.split('.')
+    return _U8.pack(len(parts)) + b''.join(_U64.pack(encode_token(p)) for p in parts)
+
+
+def _encode_value(value_type: int, value: Any) -> bytes:
+    if value_type in _ARRAY_TYPES:
+        return _U32.pack(len(value)) + b''.join(_encode_value(value_type - 1, v) for v in value)
+    if value_type == _STRING:
+        return _encode_string(value)
+    if value_type == _TOKEN:
+        return _U64.pack(encode_token(value))
+    if value_type in _ID_TYPES:
+        return _encode_id(value)
+    if isinstance(value, tuple):
+        return _FIXED_TYPES[value_type].pack(*value)
+    return _FIXED_TYPES[value_type].pack(value)
+
+
+def encode_bsii(units: List[SiiUnit]) -> bytes:
+    """Serialize units as BSII (used to build fixtures)
+
+    Value types are inferred from the Python values; each distinct
+    (unit type, field layout) gets its own structure definition.
+    """
+    out = bytearray(BSII_SIGNATURE + _U32.pack(BSII_VERSIONS[-1]))
+    layouts: Dict[Tuple, int] = {}
+    for unit in units:
+        layout = (unit.type,) + tuple((k, _value_type(v)) for k, v in unit.fields.items())
+        struct_id = layouts.get(layout)
+        if struct_id is None:
+            struct_id = layouts[layout] = len(layouts) + 1
+            out += _U32.pack(0) + _U8.pack(1) + _U32.pack(struct_id) + _encode_string(unit.type)
+            for field_name, value_type in layout[1:]:
+                out += _U32.pack(value_type) + _encode_string(field_name)
+            out += _U32.pack(0)
+        out += _U32.pack(struct_id) + _encode_id(unit.name)
+        for (_, value_type), value in zip(layout[1:], unit.fields.values()):
+            out += _encode_value(value_type, value)
+    out += _U32.pack(0) + _U8.pack(0)
+    return bytes(out)
@@ -4,7 +4,6 @@ Simple test script to debug the JSON loading issue
 """
 
 import os
-import json
 import sys
 
 print("Python version:", sys.version)
@@ -19,11 +18,16 @@ try:
     print("File exists:", os.path.exists(load_order_file))
     
     if os.path.exists(load_order_file):
-        with open(load_order_file, 'r', encoding='utf-8') as f:
-            mod_list = json.load(f)
-        print("✅ Successfully loaded", len(mod_list), "mods")
-        print("First mod:", mod_list[0] if mod_list else "None")
-        print("Last mod:", mod_list[-1] if mod_list else "None")
+        from load_order import LoadOrder, LoadOrderError
+        try:
+            load_order = LoadOrder.load(load_order_file)
+        except LoadOrderError as e:
+            print("❌", e)
+            sys.exit(1)
+        print("✅ Successfully loaded", len(load_order), "mods",
+              f"({len(load_order.workshop)} Workshop + {len(load_order.local)} Local)")
+        print("First mod:", load_order[0].entry if len(load_order) else "None")
+        print("Last mod:", load_order[-1].entry if len(load_order) else "None")
     else:
         print("❌ File not found!")
         
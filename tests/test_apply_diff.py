@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+
+import pytest
+
+import ETS2_Mod_Manager as app
+from sii import read_profile_fields
+
+COLLECTION = ["mod_a|A", "mod_b|B", "mod_c|C"]
+
+
+def write_profile(path: str, mods):
+    lines = ["SiiNunit", "{", "profile_data : _nameless.1 {", " face: 3", f" active_mods: {len(mods)}"]
+    lines += [f" active_mods[{i}]: \"{mod}\"" for i, mod in enumerate(mods)]
+    lines += [" cached_experience: 10", "}", "}", ""]
+    with open(os.path.join(path, "profile.sii"), 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+@pytest.fixture
+def manager(tmp_path):
+    load_order = tmp_path / "load_order.json"
+    load_order.write_text(json.dumps(COLLECTION), encoding='utf-8')
+    manager = app.ETS2ModManager(use_cache=False, verbosity=0, load_order_file=str(load_order),
+                                 game_dirs=[], steam_path=str(tmp_path))
+    manager.snapshot_dir = str(tmp_path / "snapshots")
+    return manager
+
+
+@pytest.fixture
+def profile(tmp_path):
+    path = tmp_path / "profile"
+    path.mkdir()
+    return str(path)
+
+
+def read_bytes(profile: str) -> bytes:
+    with open(os.path.join(profile, "profile.sii"), 'rb') as f:
+        return f.read()
+
+
+def test_keep_removed_with_only_removals_writes_nothing(manager, profile):
+    write_profile(profile, COLLECTION + ["mod_extra|Extra"])
+    before = read_bytes(profile)
+
+    diff, applied = manager.apply_profile_diff(profile, keep_removed=True)
+
+    assert diff.removed and not applied
+    assert read_bytes(profile) == before
+    assert not manager.snapshot_store(profile).snapshots
+
+
+def test_apply_writes_and_snapshots(manager, profile):
+    write_profile(profile, ["mod_c|C", "mod_a|A", "mod_extra|Extra"])
+
+    diff, applied = manager.apply_profile_diff(profile)
+
+    assert applied
+    assert read_profile_fields(os.path.join(profile, "profile.sii")).active_mods == COLLECTION
+    assert len(manager.snapshot_store(profile).snapshots) == 1
+
+
+def test_cli_reports_what_was_written(manager, profile, capsys):
+    write_profile(profile, COLLECTION + ["mod_extra|Extra"])
+    args = argparse.Namespace(profiles=[profile], apply=True, keep_removed=True, format="ndjson")
+
+    assert app._cmd_diff(manager, args) == 0
+
+    record = json.loads(capsys.readouterr().out)
+    assert record["removed"] and record["applied"] is False
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+import benchmark
+
+
+@pytest.fixture(autouse=True)
+def fresh_run(monkeypatch):
+    monkeypatch.setattr(benchmark, "FAILURES", [])
+    monkeypatch.setattr(benchmark, "RESULTS", {})
+    monkeypatch.setattr(benchmark, "_current", [])
+
+
+def register(monkeypatch, name, ok):
+    def bench():
+        """Test benchmark"""
+        benchmark.measure("stage", lambda: None, repeat=1, items=10)
+        benchmark.check(ok, "result matches")
+    monkeypatch.setitem(benchmark.BENCHMARKS, name, bench)
+
+
+def test_failed_check_fails_the_run(monkeypatch, capsys, tmp_path):
+    register(monkeypatch, "good", True)
+    register(monkeypatch, "bad", False)
+    assert benchmark.main(["good"]) == 0
+    path = tmp_path / "results.json"
+    assert benchmark.main(["good", "bad", "--json", str(path)]) == 1
+    assert benchmark.FAILURES == ["bad: result matches"]
+    assert "check failed: result matches" in capsys.readouterr().out
+    # Results are still saved so the failing run can be inspected
+    results = json.loads(path.read_text())["results"]
+    assert [record["stage"] for record in results["bad"]] == ["stage"]
+
+
+def test_unknown_benchmark_is_an_error(capsys):
+    assert benchmark.main(["no-such-benchmark"]) == 1
+    assert "Unknown benchmark" in capsys.readouterr().out
@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+
+import ETS2_Mod_Manager as app
+from sii import read_profile_fields
+
+COLLECTION = ["mod_a|A", "mod_b|B"]
+
+
+def write_profile(folder, mods):
+    os.makedirs(folder, exist_ok=True)
+    lines = ["SiiNunit", "{", "profile_data : _nameless.1 {",
+             f" profile_name: \"{os.path.basename(folder)}\"", f" active_mods: {len(mods)}"]
+    lines += [f" active_mods[{i}]: \"{mod}\"" for i, mod in enumerate(mods)]
+    lines += ["}", "}", ""]
+    with open(os.path.join(folder, "profile.sii"), 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    # Caches, snapshots and indexes live next to the script; keep them in tmp_path
+    monkeypatch.setattr(app, "__file__", str(tmp_path / "ETS2_Mod_Manager.py"))
+    (tmp_path / "load_order.json").write_text(json.dumps(COLLECTION), encoding='utf-8')
+    root = tmp_path / "profiles"
+    write_profile(str(root / "4A6F65"), ["mod_b|B", "mod_old|Old"])
+    write_profile(str(root / "416E6E61"), COLLECTION)
+    return tmp_path
+
+
+def run(capsys, tree, *argv):
+    code = app.main(["--no-cache", "--steam-path", str(tree), "--game-dir", str(tree), *argv])
+    out = capsys.readouterr().out
+    return code, out
+
+
+def ndjson(out):
+    lines = out.splitlines()
+    assert all(lines)
+    return [json.loads(line) for line in lines]
+
+
+def test_scan_formats_hold_the_same_records(capsys, tree):
+    root = str(tree / "profiles")
+    code, out = run(capsys, tree, "scan", root)
+    assert code == 0
+    records = ndjson(out)
+    assert sorted(r["name"] for r in records) == ["416E6E61", "4A6F65"]
+    assert all(r["storage_type"] == "Local" and "last_save" in r for r in records)
+
+    code, out = run(capsys, tree, "--format", "json", "scan", root)
+    assert code == 0
+    assert json.loads(out) == records
+
+
+def test_diff_and_install_records(capsys, tree):
+    profile = str(tree / "profiles" / "4A6F65")
+    code, out = run(capsys, tree, "diff", profile)
+    [record] = ndjson(out)
+    assert code == 0 and record["profile"] == profile and not record["applied"]
+    assert record["added"] == [{"index": 0, "mod": "mod_a|A"}]
+    assert record["removed"] == [{"index": 1, "mod": "mod_old|Old"}]
+
+    code, out = run(capsys, tree, "--format", "json", "install", "--profile", profile)
+    [result] = json.loads(out)
+    assert code == 0 and result["path"] == profile and result["success"]
+    assert read_profile_fields(os.path.join(profile, "profile.sii")).active_mods == COLLECTION
+
+
+def test_load_order_records(capsys, tree):
+    code, out = run(capsys, tree, "load-order")
+    assert code == 0
+    assert ndjson(out) == [
+        {"priority": 0, "package_id": "mod_a", "name": "A", "workshop": False},
+        {"priority": 1, "package_id": "mod_b", "name": "B", "workshop": False},
+    ]
+
+
+def test_show_reports_an_unreadable_profile_in_its_record(capsys, tree):
+    good = str(tree / "profiles" / "416E6E61")
+    code, out = run(capsys, tree, "--format", "json", "show", good, str(tree / "missing"))
+    assert code == 0
+    ok, missing = json.loads(out)
+    assert ok["format"] == "text" and ok["active_mods"] == COLLECTION
+    assert missing["format"] is None and missing["error"]
+
+
+def test_trace_file_is_written(capsys, tree):
+    trace = tree / "trace.json"
+    code, _ = run(capsys, tree, "--trace", str(trace), "scan", str(tree / "profiles"))
+    assert code == 0
+    events = json.loads(trace.read_text())["traceEvents"]
+    assert any(event["ph"] == "X" for event in events)
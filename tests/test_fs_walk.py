@@ -0,0 +1,73 @@
+import os
+import stat
+
+import pytest
+
+import fs_walk
+from fs_walk import atomic_writer, link_or_copy
+from mod_store import ModStore
+from profile_snapshots import SnapshotStore
+from sii import patch_active_mods
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason="POSIX permission bits")
+
+PROFILE = (b'SiiNunit\n{\nprofile_data : _nameless.1 {\n active_mods: 1\n'
+           b' active_mods[0]: "promods|ProMods"\n}\n}\n')
+
+
+def mode(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@pytest.mark.parametrize("original", [0o644, 0o640, 0o600])
+def test_replaced_file_keeps_its_mode(tmp_path, original):
+    path = tmp_path / "profile.sii"
+    path.write_bytes(PROFILE)
+    os.chmod(path, original)
+    with atomic_writer(str(path), binary=True) as f:
+        f.write(b"new")
+    assert path.read_bytes() == b"new"
+    assert mode(path) == original
+
+
+def test_new_file_gets_the_umask_default(tmp_path):
+    umask = os.umask(0o022)
+    os.umask(umask)
+    path = tmp_path / "new.json"
+    with atomic_writer(str(path)) as f:
+        f.write("{}")
+    assert mode(path) == 0o666 & ~umask
+
+
+def test_profile_writers_keep_the_mode(tmp_path):
+    path = tmp_path / "profile.sii"
+    path.write_bytes(PROFILE)
+    os.chmod(path, 0o644)
+    patch_active_mods(str(path), ["a|A", "b|B"])
+    assert mode(path) == 0o644
+
+    store = SnapshotStore(str(tmp_path / "snapshots")).load()
+    snapshot, _ = store.add_file(str(path))
+    os.chmod(path, 0o664)
+    store.restore(snapshot.id, str(path))
+    assert mode(path) == 0o664
+
+
+def test_store_objects_are_not_private(tmp_path):
+    source = tmp_path / "mod.scs"
+    source.write_bytes(b"PK" * 100)
+    store = ModStore(str(tmp_path / "store")).load()
+    obj = store.add(str(source))
+    assert mode(store.object_path(obj.sha256)) == 0o666 & ~fs_walk._UMASK
+
+
+def test_rename_is_fsynced_on_the_directory(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(fs_walk, "fsync_directory", synced.append)
+    with atomic_writer(str(tmp_path / "a.json")) as f:
+        f.write("{}")
+    link_or_copy(str(tmp_path / "a.json"), str(tmp_path / "b.json"))
+    assert synced == [str(tmp_path), str(tmp_path)]
+    with atomic_writer(str(tmp_path / "c.json"), fsync=False) as f:
+        f.write("{}")
+    assert len(synced) == 2
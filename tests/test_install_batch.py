@@ -0,0 +1,68 @@
+import json
+import os
+
+import pytest
+
+import ETS2_Mod_Manager as app
+from instrumentation import Tracer
+from sii import read_profile_fields
+
+COLLECTION = ["mod_a|A", "mod_b|B", "mod_c|C"]
+
+
+def write_profile(folder, mods):
+    os.makedirs(folder, exist_ok=True)
+    lines = ["SiiNunit", "{", "profile_data : _nameless.1 {",
+             f" profile_name: \"{os.path.basename(folder)}\"", f" active_mods: {len(mods)}"]
+    lines += [f" active_mods[{i}]: \"{mod}\"" for i, mod in enumerate(mods)]
+    lines += ["}", "}", ""]
+    with open(os.path.join(folder, "profile.sii"), 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+@pytest.fixture
+def manager(tmp_path):
+    load_order = tmp_path / "load_order.json"
+    load_order.write_text(json.dumps(COLLECTION), encoding='utf-8')
+    root = tmp_path / "profiles"
+    for i in range(6):
+        write_profile(str(root / f"44726976{i:02X}"), ["mod_old|Old"] * (i % 3))
+    manager = app.ETS2ModManager(use_cache=False, verbosity=0, load_order_file=str(load_order),
+                                 game_dirs=[], steam_path=str(tmp_path), tracer=Tracer(enabled=True))
+    manager.snapshot_dir = str(tmp_path / "snapshots")
+    manager.scan_profiles([str(root)])
+    return manager
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_every_profile_gets_a_result_in_order(manager, workers):
+    profiles = manager.profiles
+    results, elapsed = manager.install_batch(profiles, workers=workers)
+    assert [r.path for r in results] == [p.path for p in profiles]
+    assert all(r.success and r.method == "patched" and not r.error for r in results)
+    assert elapsed >= max(r.seconds for r in results)
+    for profile in profiles:
+        assert read_profile_fields(os.path.join(profile.path, "profile.sii")).active_mods == COLLECTION
+    assert manager.tracer.counters["install.patched"] == len(profiles)
+
+    again, _ = manager.install_batch(profiles, workers=workers)
+    assert [r.method for r in again] == ["unchanged"] * len(profiles)
+
+
+def test_one_failure_does_not_stop_the_batch(manager, monkeypatch):
+    profiles = manager.profiles
+    broken = profiles[2].path
+    install = manager._install_to_profile
+
+    def flaky(profile, incremental=True, log=print):
+        if profile.path == broken:
+            raise PermissionError(13, "profile.sii is in use")
+        return install(profile, incremental, log)
+
+    monkeypatch.setattr(manager, "_install_to_profile", flaky)
+    results, _ = manager.install_batch(profiles, workers=3)
+    failed = [r for r in results if not r.success]
+    assert [r.path for r in failed] == [broken]
+    assert failed[0].method == "failed" and "in use" in failed[0].error
+    assert sum(r.success for r in results) == len(profiles) - 1
+    assert manager.tracer.counters["install.failed.PermissionError"] == 1
@@ -0,0 +1,59 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+import ETS2_Mod_Manager as app
+from sii import read_profile_fields
+
+COLLECTION = ["mod_a|A", "mod_b|B"]
+ORIGINAL = b"SiiNunit\n{\nprofile_data : _nameless.1 {\n active_mods: 1\n active_mods[0]: \"mod_old|Old\"\n}\n}\n"
+
+
+@pytest.fixture
+def manager(tmp_path):
+    load_order = tmp_path / "load_order.json"
+    load_order.write_text(json.dumps(COLLECTION), encoding='utf-8')
+    manager = app.ETS2ModManager(use_cache=False, verbosity=0, load_order_file=str(load_order),
+                                 game_dirs=[], steam_path=str(tmp_path))
+    manager.snapshot_dir = str(tmp_path / "snapshots")
+    profile_dir = tmp_path / "profile"
+    profile_dir.mkdir()
+    (profile_dir / "profile.sii").write_bytes(ORIGINAL)
+    manager.selected_profile = app.ETS2Profile("Driver", str(profile_dir), 1, 0, 1, 0, 1,
+                                               datetime.now(), "Local")
+    return manager
+
+
+def profile_bytes(manager) -> bytes:
+    with open(os.path.join(manager.selected_profile.path, "profile.sii"), 'rb') as f:
+        return f.read()
+
+
+def test_install_succeeds(manager, capsys):
+    assert manager.install_mods()
+    assert read_profile_fields(os.path.join(manager.selected_profile.path, "profile.sii")).active_mods \
+        == COLLECTION
+    assert "Verified" in capsys.readouterr().out
+
+
+def test_write_failure_leaves_profile_untouched(manager, monkeypatch, capsys):
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(manager, "_write_profile", fail)
+    assert not manager.install_mods()
+    out = capsys.readouterr().out
+    assert "disk full" in out and "left untouched" in out
+    assert profile_bytes(manager) == ORIGINAL
+
+
+def test_verify_failure_points_to_the_snapshot(manager, monkeypatch, capsys):
+    # Never up to date: the write happens, then verification fails
+    monkeypatch.setattr(manager, "profile_up_to_date", lambda path: False)
+    assert not manager.install_mods()
+    out = capsys.readouterr().out
+    assert "left untouched" not in out
+    assert "snapshot #1" in out and "--restore 1" in out
+    assert manager.snapshot_store(manager.selected_profile.path).read(1) == ORIGINAL
@@ -0,0 +1,93 @@
+import json
+import threading
+
+import pytest
+
+from instrumentation import NULL_TRACER, Tracer, traced
+
+
+class Worker:
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    @traced(detail=True)
+    def read(self, path):
+        return path.upper()
+
+    @traced("custom_name")
+    def fail(self):
+        raise ValueError("bad")
+
+
+def test_spans_and_counters():
+    tracer = Tracer(enabled=True)
+    worker = Worker(tracer)
+    assert worker.read("profile.sii") == "PROFILE.SII"
+    with pytest.raises(ValueError):
+        worker.fail()
+    with tracer.span("block", size=3):
+        tracer.count("files", 2)
+    tracer.count("files")
+
+    names = [span[0] for span in tracer.spans]
+    assert names == ["read", "custom_name", "block"]
+    args = {span[0]: span[4] for span in tracer.spans}
+    assert args == {"read": {"arg": "profile.sii"}, "custom_name": {"error": "ValueError"},
+                    "block": {"size": 3}}
+    assert all(span[2] >= 0 for span in tracer.spans)
+    assert tracer.counters == {"files": 3}
+
+    summary = tracer.summary()
+    assert summary["read"]["calls"] == 1
+    assert summary["read"]["mean_ms"] == summary["read"]["total_ms"] == summary["read"]["max_ms"]
+    text = tracer.format_summary()
+    assert "custom_name" in text and "files" in text
+
+
+def test_disabled_tracer_records_nothing():
+    worker = Worker(NULL_TRACER)
+    worker.read("x")
+    with NULL_TRACER.span("block"):
+        NULL_TRACER.count("files")
+    assert NULL_TRACER.spans == [] and not NULL_TRACER.counters
+    assert NULL_TRACER.span("a") is NULL_TRACER.span("b")
+
+
+def test_counters_from_threads_add_up():
+    tracer = Tracer(enabled=True)
+    # Keep every thread alive until all have run so no thread id is reused
+    barrier = threading.Barrier(4)
+
+    def work():
+        barrier.wait()
+        for _ in range(1000):
+            tracer.count("n")
+            with tracer.span("s"):
+                pass
+        barrier.wait()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tracer.counters["n"] == 4000
+    assert tracer.summary()["s"]["calls"] == 4000
+    assert len({span[3] for span in tracer.spans}) == 4
+
+
+def test_chrome_trace_file(tmp_path):
+    tracer = Tracer(enabled=True)
+    with tracer.span("scan", root="/profiles"):
+        pass
+    tracer.count("profiles", 5)
+    path = tmp_path / "trace.json"
+    tracer.write_json(str(path))
+    data = json.loads(path.read_text())
+    assert data["displayTimeUnit"] == "ms"
+    complete, counter = data["traceEvents"]
+    assert complete["name"] == "scan" and complete["ph"] == "X"
+    assert complete["args"] == {"root": "/profiles"}
+    assert complete["ts"] >= 0 and complete["dur"] >= 0
+    assert counter == {"name": "profiles", "ph": "C", "pid": complete["pid"], "tid": 0,
+                       "ts": counter["ts"], "args": {"value": 5}}
@@ -0,0 +1,40 @@
+import pytest
+
+from fs_walk import load_json_index, save_json_index
+from mod_index import INDEX_VERSION, ModIndex
+
+
+def parse(data):
+    return {record["path"]: record["size"] for record in data["records"]}
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "index.json")
+    save_json_index(path, 3, records=[{"path": "a", "size": 1}])
+    assert load_json_index(path, 3, parse, {}) == {"a": 1}
+
+
+@pytest.mark.parametrize("content", [
+    b"",
+    b"not json",
+    b"[1, 2]",
+    b'{"version": 2, "records": [{"path": "a", "size": 1}]}',
+    b'{"version": 3}',
+    b'{"version": 3, "records": [{"path": "a"}]}',
+    b'{"version": 3, "records": [7]}',
+    b'{"version": 3, "records": [{"path": "a", "size": 1}], "x": "\xff"}',
+])
+def test_unreadable_index_gives_default(tmp_path, content):
+    path = tmp_path / "index.json"
+    path.write_bytes(content)
+    assert load_json_index(str(path), 3, parse, {}) == {}
+
+
+def test_missing_index_gives_default(tmp_path):
+    assert load_json_index(str(tmp_path / "missing.json"), 3, parse, None) is None
+
+
+def test_index_with_unknown_fields_starts_empty(tmp_path):
+    path = str(tmp_path / "mod_index.json")
+    save_json_index(path, INDEX_VERSION, archives=[{"path": "x.scs", "unknown": 1}])
+    assert ModIndex(path).load().archives == {}
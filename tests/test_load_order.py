@@ -0,0 +1,74 @@
+import gc
+import itertools
+import json
+
+import pytest
+
+from load_order import LoadOrder, LoadOrderError
+
+IDS = ["promods", "", " a", "a ", "\xa0a", "a ", "a|b", "a\"b", "a\nb", "a\rb", 7, ["a"]]
+NAMES = ["ProMods", "", " x ", "x\ny", "x\"y", "x|y", "x\ry", None]
+
+
+def build_ok(ids, names) -> bool:
+    try:
+        LoadOrder._build(zip(ids, names), "test", [] if len(ids) == len(names) else ["lengths"])
+        return True
+    except LoadOrderError:
+        return False
+
+
+@pytest.mark.parametrize("ids,names", [
+    *(([package_id], [name]) for package_id, name in itertools.product(IDS, NAMES)),
+    (["a", "a"], ["x", "y"]),
+    (["a", "b"], ["x"]),
+    ([], []),
+])
+def test_bulk_check_never_accepts_what_the_item_check_rejects(ids, names):
+    if LoadOrder._valid_in_bulk(ids, names):
+        assert build_ok(ids, names)
+    # Either way the public constructor agrees with the per-item check
+    if build_ok(ids, names):
+        assert len(LoadOrder.from_pairs(ids, names)) == len(ids)
+    else:
+        with pytest.raises(LoadOrderError):
+            LoadOrder.from_pairs(ids, names)
+
+
+def test_valid_list_takes_the_bulk_path():
+    ids = [f"mod_workshop_package.{i:016X}" for i in range(100)]
+    assert LoadOrder._valid_in_bulk(ids, [f"Mod {i}" for i in range(100)])
+
+
+def test_load_leaves_gc_alone(tmp_path, monkeypatch):
+    path = tmp_path / "load_order.json"
+    path.write_text(json.dumps(["promods|ProMods"]))
+    calls = []
+    monkeypatch.setattr(gc, "disable", lambda: calls.append("disable"))
+    assert LoadOrder.load(str(path)).entries() == ["promods|ProMods"]
+    assert calls == []
+
+
+@pytest.mark.parametrize("legacy", [True, False])
+def test_empty_display_name_survives_a_round_trip(tmp_path, legacy):
+    entries = ["abc|", "mod_workshop_package.00000000000000A1|Workshop", "local|"]
+    order = LoadOrder.from_entries(entries)
+    assert order.entries() == entries
+    assert [mod.display_name for mod in order] == ["abc", "Workshop", "local"]
+    path = str(tmp_path / "load_order.json")
+    order.save(path, legacy=legacy)
+    assert LoadOrder.load(path).entries() == entries
+
+
+def test_slow_path_keeps_empty_names():
+    # A non-string entry sends the whole list through the per-item pass
+    with pytest.raises(LoadOrderError):
+        LoadOrder.from_entries(["abc|", 7])
+    assert LoadOrder._build([("abc", "")], "test", []).entries() == ["abc|"]
+
+
+def test_workshop_and_local_are_classified_once():
+    order = LoadOrder.from_entries(["mod_workshop_package.00000000000000A1|W", "local|L", "other|O"])
+    assert order.workshop is order.workshop
+    assert [mod.package_id for mod in order.workshop] == ["mod_workshop_package.00000000000000A1"]
+    assert [mod.package_id for mod in order.local] == ["local", "other"]
@@ -0,0 +1,77 @@
+import os
+import zipfile
+
+from mod_conflicts import analyze_conflicts
+from mod_index import ModIndex
+
+
+def make_mod(path, files):
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr("manifest.sii", 'SiiNunit\n{\nmod_package : .pkg {\n display_name: "Mod"\n}\n}\n')
+        for name in files:
+            zf.writestr(name, b"x")
+    return str(path)
+
+
+def make_tree(tmp_path):
+    root = tmp_path / "mod"
+    root.mkdir()
+    make_mod(root / "a.scs", ["def/a.sii", "def/shared.sii"])
+    make_mod(root / "b.scs", ["def/b.sii", "def/shared.sii"])
+    return str(root)
+
+
+def stored_lists(index):
+    return sorted(os.listdir(index.files_dir))
+
+
+def test_member_lists_live_on_disk(tmp_path):
+    root = make_tree(tmp_path)
+    index = ModIndex(str(tmp_path / "mod_index.json")).update([root])
+    index.save()
+    assert all(not archive.files for archive in index.archives.values())
+    assert len(stored_lists(index)) == 2
+
+    reloaded = ModIndex(index.path).load().update([root])
+    assert reloaded.reused == 2 and reloaded.indexed == 0
+    archive = reloaded.archives[os.path.join(root, "a.scs")]
+    assert archive.file_count == 3
+    assert sorted(reloaded.iter_files(archive)) == ["def/a.sii", "def/shared.sii", "manifest.sii"]
+
+    report = analyze_conflicts(["a|A", "b|B"], reloaded)
+    assert [(c.winner, c.shadowed, c.sample) for c in report.conflicts] == [("a", "b", ["def/shared.sii"])]
+
+
+def test_in_memory_index_keeps_lists(tmp_path):
+    index = ModIndex().update([make_tree(tmp_path)])
+    report = analyze_conflicts(["b|B", "a|A"], index)
+    assert [(c.winner, c.shadowed) for c in report.conflicts] == [("b", "a")]
+    assert all(archive.files for archive in index.archives.values())
+
+
+def test_changed_archive_replaces_its_list(tmp_path):
+    root = make_tree(tmp_path)
+    index = ModIndex(str(tmp_path / "mod_index.json")).update([root])
+    index.save()
+    before = stored_lists(index)
+    path = make_mod(os.path.join(root, "a.scs"), ["def/other.sii"])
+    os.utime(path, ns=(1, 1))
+    index.update([root])
+    index.save()
+    assert index.indexed == 1
+    assert len(stored_lists(index)) == 2 and stored_lists(index) != before
+    assert sorted(index.iter_files(index.archives[path])) == ["def/other.sii", "manifest.sii"]
+
+
+def test_lost_list_is_read_again(tmp_path):
+    root = make_tree(tmp_path)
+    index = ModIndex(str(tmp_path / "mod_index.json")).update([root])
+    index.save()
+    archive = index.archives[os.path.join(root, "a.scs")]
+    with open(os.path.join(index.files_dir, archive.files_name), 'w') as f:
+        f.write("")
+    assert list(index.iter_files(archive)) == []
+
+    index = ModIndex(index.path).load().update([root])
+    assert index.indexed == 1 and index.reused == 1
+    assert len(list(index.iter_files(index.archives[archive.path]))) == 3
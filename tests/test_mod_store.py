@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from mod_store import ModStore, ModStoreError, build_manifest_mods, hash_file, sync_mods
+
+
+def write(path, data: bytes) -> str:
+    os.makedirs(os.path.dirname(str(path)), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def overwrite_in_place(path: str, data: bytes):
+    with open(path, 'r+b') as f:
+        f.write(data)
+    st = os.stat(path)
+    # Make sure the edit is visible even on coarse timestamp filesystems
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def remote(tmp_path):
+    folder = tmp_path / "remote"
+    write(folder / "alpha.scs", b"alpha archive " * 1000)
+    write(folder / "beta.zip", b"beta archive " * 1000)
+    return str(folder)
+
+
+def test_add_copies_into_the_store(tmp_path):
+    mod = write(tmp_path / "mods" / "alpha.scs", b"original contents")
+    store = ModStore(str(tmp_path / "store")).load()
+    obj = store.add(mod)
+    assert not os.path.samefile(mod, store.object_path(obj.sha256))
+
+    overwrite_in_place(mod, b"EDITED   contents")
+
+    assert store.has(obj.sha256, obj.size)
+    assert hash_file(store.object_path(obj.sha256))[0] == obj.sha256
+
+
+def test_add_verifies_a_claimed_hash(tmp_path):
+    mod = write(tmp_path / "mods" / "alpha.scs", b"contents")
+    store = ModStore(str(tmp_path / "store")).load()
+    with pytest.raises(ModStoreError):
+        store.add(mod, "0" * 64, 8)
+    assert not store.objects
+
+
+def test_changed_object_is_dropped(tmp_path):
+    store = ModStore(str(tmp_path / "store")).load()
+    obj = store.add(write(tmp_path / "alpha.scs", b"contents"))
+    overwrite_in_place(store.object_path(obj.sha256), b"CONTENTS")
+    assert not store.has(obj.sha256, obj.size)
+    assert obj.sha256 not in store.objects
+    assert not os.path.exists(store.object_path(obj.sha256))
+
+
+def test_sync_skips_verified_archives(tmp_path, remote):
+    manifest = build_manifest_mods(remote, ["alpha", "beta"])
+    store = ModStore(str(tmp_path / "store")).load()
+    mod_dir = str(tmp_path / "mods")
+    first = sync_mods(store, manifest, remote, mod_dir)
+    assert [r.action for r in first] == ["fetched", "fetched"]
+    second = sync_mods(store, manifest, remote, mod_dir)
+    assert [r.action for r in second] == ["present", "present"]
+
+
+def test_sync_repairs_an_archive_edited_in_place(tmp_path, remote):
+    manifest = build_manifest_mods(remote, ["alpha"])
+    store = ModStore(str(tmp_path / "store")).load()
+    mod_dir = str(tmp_path / "mods")
+    sync_mods(store, manifest, remote, mod_dir)
+    dest = os.path.join(mod_dir, "alpha.scs")
+    # Same size, different bytes; the mod file may share the object's inode
+    overwrite_in_place(dest, b"x" * 14)
+
+    results = sync_mods(store, manifest, remote, mod_dir)
+
+    assert [r.action for r in results] == ["fetched"]
+    assert hash_file(dest)[0] == manifest["alpha"]["sha256"]
+    assert store.has(manifest["alpha"]["sha256"], manifest["alpha"]["size"])
+
+
+def test_sync_without_a_mod_folder(tmp_path):
+    import ETS2_Mod_Manager as app
+
+    manager = app.ETS2ModManager(use_cache=False, verbosity=0,
+                                 load_order_file=str(tmp_path / "load_order.json"),
+                                 game_dirs=[], steam_path=str(tmp_path))
+    manager._default_mod_roots = lambda: []
+    with pytest.raises(FileNotFoundError):
+        manager.sync_mods(str(tmp_path / "remote"))
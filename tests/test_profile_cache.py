@@ -0,0 +1,44 @@
+import threading
+
+from profile_cache import ProfileCache
+
+
+def test_save_while_putting(tmp_path):
+    cache = ProfileCache(str(tmp_path / "profile_cache.json"))
+    for n in range(5000):
+        cache.put(f"/profiles/{n:06X}", (n, n), {"name": str(n)})
+    stop = threading.Event()
+
+    def churn():
+        # Profiles parsed in the background keep adding and dropping entries
+        n = 5000
+        while not stop.is_set():
+            cache.put(f"/profiles/{n:06X}", (n, n), {"name": str(n)})
+            cache.discard(f"/profiles/{n - 5000:06X}")
+            n += 1
+
+    writer = threading.Thread(target=churn)
+    writer.start()
+    try:
+        for _ in range(5):
+            cache.save()
+            cache.prune(["/elsewhere"], [])
+    finally:
+        stop.set()
+        writer.join()
+    cache.save()
+    reloaded = ProfileCache(cache.path).load()
+    assert reloaded.entries == cache.entries
+
+
+def test_round_trip_and_prune(tmp_path):
+    cache = ProfileCache(str(tmp_path / "profile_cache.json"))
+    cache.put("/profiles/A", (1, 2), {"name": "A"})
+    cache.put("/profiles/B", (3, 4), None)
+    cache.put("/elsewhere/C", (5, 6), {"name": "C"})
+    cache.prune(["/profiles"], ["/profiles/A"])
+    cache.save()
+    reloaded = ProfileCache(cache.path).load()
+    assert reloaded.get("/profiles/A", (1, 2)) == (True, {"name": "A"})
+    assert reloaded.get("/profiles/A", (1, 3)) == (False, None)
+    assert "/profiles/B" not in reloaded.entries and "/elsewhere/C" in reloaded.entries
@@ -0,0 +1,56 @@
+import os
+from dataclasses import asdict
+
+import pytest
+
+import ETS2_Mod_Manager as app
+import fs_walk
+from instrumentation import Tracer
+
+PROFILES = 24
+
+
+def write_profile(folder, mods):
+    os.makedirs(os.path.join(folder, "save", "autosave"), exist_ok=True)
+    lines = ["SiiNunit", "{", "profile_data : _nameless.1 {",
+             f" profile_name: \"{os.path.basename(folder)}\"", f" active_mods: {len(mods)}"]
+    lines += [f" active_mods[{i}]: \"{mod}\"" for i, mod in enumerate(mods)]
+    lines += ["}", "}", ""]
+    with open(os.path.join(folder, "profile.sii"), 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "profiles"
+    for i in range(PROFILES):
+        write_profile(str(root / f"50{i:04X}"), [f"mod_{n}|Mod {n}" for n in range(i % 5 + 1)])
+    (root / "500000 (1).bak").mkdir()
+    return str(root)
+
+
+def scan(tmp_path, root, workers):
+    manager = app.ETS2ModManager(scan_workers=workers, use_cache=False, verbosity=0,
+                                 load_order_file=str(tmp_path / "load_order.json"), game_dirs=[],
+                                 steam_path=str(tmp_path), tracer=Tracer(enabled=True))
+    manager.scan_profiles([root])
+    return manager
+
+
+def test_parallel_scan_matches_the_serial_one(tmp_path, root):
+    serial = scan(tmp_path, root, 1).profiles
+    parallel = scan(tmp_path, root, 8).profiles
+    assert len(serial) == PROFILES
+    assert [asdict(p) for p in parallel] == [asdict(p) for p in serial]
+    assert all(p.mods == int(p.name[2:], 16) % 5 + 1 for p in serial)
+
+
+def test_scan_counts_one_listing_per_folder(tmp_path, root):
+    manager = scan(tmp_path, root, 4)
+    calls = manager.last_scan_syscalls
+    # Only the root is listed: every profile has active_mods, so save/ is never counted,
+    # and folder types come from the listing itself
+    assert calls["scandir"] == 1
+    assert calls["open"] == PROFILES
+    assert calls.get("stat", 0) == (0 if fs_walk.ENTRY_STAT_IS_FREE else PROFILES)
+    assert {kind: manager.tracer.counters[f"fs.{kind}"] for kind in calls} == calls
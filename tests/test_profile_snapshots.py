@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from profile_snapshots import MIN_KEEP, SnapshotError, SnapshotStore
+
+
+def profile_version(n: int) -> bytes:
+    return (b"SiiNunit\n{\nprofile_data : profile.data {\n"
+            b" active_mods: 1\n active_mods[0]: \"mod_%d|Mod %d\"\n}\n}\n" % (n, n))
+
+
+@pytest.fixture
+def profile_file(tmp_path):
+    path = tmp_path / "profile" / "profile.sii"
+    path.parent.mkdir()
+    return str(path)
+
+
+def test_identical_contents_share_one_blob(tmp_path):
+    store = SnapshotStore(str(tmp_path / "store")).load()
+    first, written_first = store.add(profile_version(1))
+    second, written_second = store.add(profile_version(1))
+    assert (written_first, written_second) == (True, False)
+    assert first.sha256 == second.sha256
+    assert len(store.blobs) == 1
+    assert os.listdir(os.path.join(store.root, "objects")) == [first.sha256]
+
+
+def test_history_survives_reload(tmp_path):
+    store = SnapshotStore(str(tmp_path / "store")).load()
+    for n in range(3):
+        store.add(profile_version(n), reason="install")
+    reloaded = SnapshotStore(store.root).load()
+    assert [s.id for s in reloaded.history()] == [3, 2, 1]
+    assert reloaded.read(1) == profile_version(0)
+    assert reloaded.get(1).pinned and not reloaded.get(2).pinned
+
+
+def test_retention_keeps_pinned_original_and_newest(tmp_path):
+    store = SnapshotStore(str(tmp_path / "store"), keep=4).load()
+    for n in range(10):
+        store.add(profile_version(n))
+    assert [s.id for s in store.history()] == [10, 9, 8, 1]
+    assert len(store.blobs) == 4
+    assert len(os.listdir(os.path.join(store.root, "objects"))) == 4
+
+
+def test_budget_never_drops_below_min_keep(tmp_path):
+    store = SnapshotStore(str(tmp_path / "store"), budget=1).load()
+    for n in range(10):
+        store.add(profile_version(n))
+    assert len(store.snapshots) == MIN_KEEP
+    assert 1 in store.snapshots
+
+
+def test_restore_oldest_unpinned_snapshot_at_keep(tmp_path, profile_file):
+    store = SnapshotStore(str(tmp_path / "store"), keep=5).load()
+    for n in range(5):
+        store.add(profile_version(n))
+    with open(profile_file, 'wb') as f:
+        f.write(profile_version(99))
+
+    restored = store.restore(2, profile_file)
+
+    assert restored.id == 2
+    with open(profile_file, 'rb') as f:
+        assert f.read() == profile_version(1)
+    # The replaced profile was snapshotted, and the restored one kept
+    latest = store.latest()
+    assert latest.reason == "before restoring #2"
+    assert store.read(latest.id) == profile_version(99)
+    assert 2 in store.snapshots and len(store.snapshots) == 5
+
+
+def test_restore_unknown_snapshot_changes_nothing(tmp_path, profile_file):
+    store = SnapshotStore(str(tmp_path / "store")).load()
+    store.add(profile_version(1))
+    with open(profile_file, 'wb') as f:
+        f.write(profile_version(2))
+    with pytest.raises(SnapshotError):
+        store.restore(7, profile_file)
+    assert len(store.snapshots) == 1
+    with open(profile_file, 'rb') as f:
+        assert f.read() == profile_version(2)
+
+
+def test_corrupt_blob_is_reported(tmp_path):
+    store = SnapshotStore(str(tmp_path / "store")).load()
+    snapshot, _ = store.add(profile_version(1))
+    with open(store.object_path(snapshot.sha256), 'wb') as f:
+        f.write(b"not zlib")
+    with pytest.raises(SnapshotError):
+        store.read(snapshot.id)
@@ -0,0 +1,195 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+import ETS2_Mod_Manager as app
+from instrumentation import Tracer
+from profile_watch import PollingSource, debounced, inotify_available, open_change_source
+
+BACKENDS = ["polling"] + (["inotify"] if inotify_available() else [])
+
+
+def write_profile(folder: str, mods: int):
+    os.makedirs(folder, exist_ok=True)
+    lines = ["SiiNunit", "{", "profile_data : _nameless.1 {",
+             f" profile_name: \"{os.path.basename(folder)}\"", f" active_mods: {mods}"]
+    lines += [f" active_mods[{i}]: \"mod_{i}|Mod {i}\"" for i in range(mods)]
+    lines += ["}", "}", ""]
+    tmp = os.path.join(folder, ".profile.sii.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+    os.replace(tmp, os.path.join(folder, "profile.sii"))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "profiles"
+    for i, mods in enumerate((10, 5, 1)):
+        write_profile(str(root / f"4472697665{i:02X}"), mods)
+    return str(root)
+
+
+@pytest.fixture
+def manager(tmp_path, tree):
+    manager = app.ETS2ModManager(use_cache=False, verbosity=0,
+                                 load_order_file=str(tmp_path / "load_order.json"),
+                                 game_dirs=[], steam_path=str(tmp_path), tracer=Tracer(enabled=True))
+    manager.scan_profiles([tree])
+    manager.tracer.spans.clear()
+    return manager
+
+
+def reads(manager) -> int:
+    return sum(1 for span in manager.tracer.spans if span[0] == "_read_profile")
+
+
+def next_refresh(manager, source, timeout: float = 5.0):
+    """First non-empty refresh from the source, or None after `timeout`"""
+    stop = threading.Event()
+    timer = threading.Timer(timeout, stop.set)
+    timer.start()
+    try:
+        for changed in debounced(source, debounce=0.05, stop=stop):
+            refresh = manager.refresh_profiles(changed)
+            if not refresh.is_empty:
+                return refresh
+    finally:
+        timer.cancel()
+    return None
+
+
+def next_batch(source, timeout: float = 5.0):
+    """First batch of changed paths from the source, or None after `timeout`"""
+    stop = threading.Event()
+    timer = threading.Timer(timeout, stop.set)
+    timer.start()
+    try:
+        return next(iter(debounced(source, debounce=0.05, stop=stop)), None)
+    finally:
+        timer.cancel()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_edit_rereads_only_that_profile(manager, tree, backend):
+    target = os.path.join(tree, "447269766501")
+    with open_change_source([tree], backend, interval=0.05) as source:
+        started = time.monotonic()
+        write_profile(target, 40)
+        refresh = next_refresh(manager, source)
+        elapsed = time.monotonic() - started
+    assert refresh is not None
+    assert [p.path for p in refresh.updated] == [target]
+    assert not refresh.added and not refresh.removed
+    assert reads(manager) == 1
+    assert elapsed < 2.0
+    # Re-sorted by mod count, the edited profile now comes first
+    assert manager.profiles[0].path == target and manager.profiles[0].mods == 40
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_new_and_removed_profiles(manager, tree, backend):
+    added = os.path.join(tree, "447269766509")
+    removed = os.path.join(tree, "447269766502")
+    with open_change_source([tree], backend, interval=0.05) as source:
+        write_profile(added, 3)
+        refresh = next_refresh(manager, source)
+        assert [p.path for p in refresh.added] == [added]
+        for name in os.listdir(removed):
+            os.unlink(os.path.join(removed, name))
+        os.rmdir(removed)
+        refresh = next_refresh(manager, source)
+    assert refresh.removed == [removed]
+    assert sorted(p.path for p in manager.profiles) == sorted(
+        os.path.join(tree, name) for name in ("447269766500", "447269766501", "447269766509"))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_save_slots_are_seen_by_every_backend(tree, backend):
+    target = os.path.join(tree, "447269766500")
+    os.makedirs(os.path.join(target, "save", "1"))
+    with open_change_source([tree], backend, interval=0.05) as source:
+        time.sleep(0.05)
+        os.mkdir(os.path.join(target, "save", "2"))
+        assert next_batch(source) == {target}
+        os.rmdir(os.path.join(target, "save", "1"))
+        assert next_batch(source) == {target}
+
+
+@pytest.mark.skipif(not inotify_available(), reason="needs inotify")
+def test_failed_registration_closes_the_fds(tree, monkeypatch):
+    import profile_watch
+
+    def broken_scandir(path):
+        raise PermissionError(13, "denied", path)
+
+    before = len(os.listdir("/proc/self/fd"))
+    monkeypatch.setattr(profile_watch.os, "scandir", broken_scandir)
+    for _ in range(5):
+        with pytest.raises(PermissionError):
+            profile_watch.InotifySource([tree])
+    monkeypatch.undo()
+    assert len(os.listdir("/proc/self/fd")) == before
+
+
+def test_unrelated_files_are_ignored(manager, tree):
+    with open_change_source([tree], "auto", interval=0.05) as source:
+        with open(os.path.join(tree, "447269766500", "notes.txt"), 'w') as f:
+            f.write("not a profile file")
+        assert next_refresh(manager, source, timeout=0.5) is None
+    assert reads(manager) == 0
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_close_wakes_a_blocked_wait(tree, backend):
+    source = open_change_source([tree], backend, interval=10.0)
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(source.wait(10.0)))
+    waiter.start()
+    time.sleep(0.1)
+    source.close()
+    waiter.join(2.0)
+    assert not waiter.is_alive()
+    assert result == [set()]
+    source.close()
+
+
+def test_polling_snapshot_diffs_by_stat(tree):
+    source = PollingSource([tree], interval=0.01)
+    target = os.path.join(tree, "447269766500")
+    write_profile(target, 11)
+    changed = set()
+    deadline = time.monotonic() + 2.0
+    while not changed and time.monotonic() < deadline:
+        changed = source.wait(0.05)
+    assert changed == {target}
+
+
+def test_selection_uses_the_list_as_shown(manager, monkeypatch):
+    shown_first = manager.profiles[0]
+    answers = iter(["1", "y"])
+
+    def answer(prompt=""):
+        # A refresh re-sorts the list while the menu waits for input
+        manager.profiles = list(reversed(manager.profiles))
+        return next(answers)
+
+    monkeypatch.setattr("builtins.input", answer)
+    assert manager.select_profile()
+    assert manager.selected_profile.path == shown_first.path
+
+
+def test_selection_picks_up_refreshed_details(manager, monkeypatch):
+    first = manager.profiles[0]
+    fresher = app.ETS2Profile(first.name, first.path, 5, 0, 99, 0, 99, datetime.now(), "Local")
+    answers = iter(["1", "y"])
+
+    def answer(prompt=""):
+        manager.profiles = [p for p in manager.profiles if p.path != first.path] + [fresher]
+        return next(answers)
+
+    monkeypatch.setattr("builtins.input", answer)
+    assert manager.select_profile()
+    assert manager.selected_profile is fresher
@@ -0,0 +1,46 @@
+import struct
+
+import pytest
+
+from sii import patch_active_mods, read_profile_fields
+from sii_binary import SiiDecodeError, SiiUnit, decode_bsii, encode_bsii, iter_bsii_fields
+
+MODS = ["mod_workshop_package.00000000000000A1|Old One", "promods|ProMods"]
+
+
+def make_bsii(version: int = 2) -> bytes:
+    unit = SiiUnit("profile_data", "_nameless.1f2.3a4b",
+                   {"brand": "scania", "active_mods": MODS, "cached_experience": 99999})
+    data = encode_bsii([unit])
+    return data[:4] + struct.pack('<I', version) + data[8:]
+
+
+def test_supported_version_round_trips():
+    units = decode_bsii(make_bsii())
+    assert units[0].fields["active_mods"] == MODS
+    assert [field[1:] for field in iter_bsii_fields(make_bsii(), {"brand"})] == [("brand", "scania")]
+
+
+@pytest.mark.parametrize("version", [0, 1, 3, 0xFFFFFFFF])
+def test_unverified_version_is_refused(version):
+    data = make_bsii(version)
+    with pytest.raises(SiiDecodeError, match=f"version {version}"):
+        decode_bsii(data)
+    with pytest.raises(SiiDecodeError):
+        list(iter_bsii_fields(data))
+
+
+def test_truncated_header_is_refused():
+    with pytest.raises(SiiDecodeError):
+        decode_bsii(b"BSII\x02")
+
+
+def test_patch_leaves_unverified_version_untouched(tmp_path):
+    path = tmp_path / "profile.sii"
+    data = make_bsii(3)
+    path.write_bytes(data)
+    with pytest.raises(SiiDecodeError):
+        read_profile_fields(str(path))
+    with pytest.raises(SiiDecodeError):
+        patch_active_mods(str(path), ["promods|ProMods"])
+    assert path.read_bytes() == data
@@ -0,0 +1,168 @@
+import mmap
+import os
+import struct
+import tracemalloc
+from datetime import datetime
+
+import pytest
+
+import sii
+from sii_binary import SiiUnit, encode_bsii
+from sii import find_active_mods_block, patch_active_mods, read_profile_fields
+
+OLD_MODS = ["mod_workshop_package.00000000000000A1|Old One", "promods|ProMods"]
+NEW_MODS = [f"mod_workshop_package.{i:016X}|New Mod {i}" for i in range(5)]
+
+
+def make_profile(newline: bytes = b"\n", padding: int = 0, mods=OLD_MODS) -> bytes:
+    lines = [b"SiiNunit", b"{", b"profile_data : _nameless.1f2.3a4b {",
+             b" face: 3", b" brand: \"scania\"", b" money_account: 123456",
+             b" active_mods: %d" % len(mods)]
+    lines += [b" active_mods[%d]: \"%s\"" % (i, mod.encode()) for i, mod in enumerate(mods)]
+    lines += [b" customization: 1234", b" cached_experience: 99999"]
+    lines += [b" user_data[%d]: \"%08d\"" % (i, i) for i in range(padding)]
+    lines += [b"}", b"", b"}", b""]
+    return newline.join(lines)
+
+
+def write(path, data: bytes) -> str:
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def read(path) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("newline", [b"\n", b"\r\n"])
+def test_unrelated_bytes_survive(tmp_path, newline):
+    original = make_profile(newline, padding=50)
+    path = write(tmp_path / "profile.sii", original)
+
+    patch_active_mods(path, NEW_MODS)
+
+    patched = read(path)
+    old_start, old_end, _, _ = find_active_mods_block(original)
+    new_start, new_end, _, _ = find_active_mods_block(patched)
+    assert patched[:new_start] == original[:old_start]
+    assert patched[new_end:] == original[old_end:]
+    assert patched[new_start:new_end].count(newline) == len(NEW_MODS) + 1
+    assert read_profile_fields(path).active_mods == NEW_MODS
+
+
+def test_patch_is_idempotent(tmp_path):
+    path = write(tmp_path / "profile.sii", make_profile())
+    patch_active_mods(path, NEW_MODS)
+    once = read(path)
+    patch_active_mods(path, NEW_MODS)
+    assert read(path) == once
+
+
+def test_mapping_closed_before_rename(tmp_path, monkeypatch):
+    mappings = []
+
+    class TrackedMmap(mmap.mmap):
+        def __new__(cls, *args, **kwargs):
+            mapping = super().__new__(cls, *args, **kwargs)
+            mappings.append(mapping)
+            return mapping
+
+    real_replace = os.replace
+
+    def replace(src, dst):
+        # Windows refuses to replace a file that is still mapped
+        assert all(m.closed for m in mappings)
+        real_replace(src, dst)
+
+    monkeypatch.setattr(sii.mmap, "mmap", TrackedMmap)
+    monkeypatch.setattr(os, "replace", replace)
+    path = write(tmp_path / "profile.sii", make_profile())
+    patch_active_mods(path, NEW_MODS)
+    assert mappings and read_profile_fields(path).active_mods == NEW_MODS
+
+
+def _patch_peak(tmp_path, padding: int, mods: int) -> int:
+    path = write(tmp_path / f"profile-{padding}-{mods}.sii", make_profile(padding=padding))
+    new_mods = [f"mod_workshop_package.{i:016X}|Patched Mod {i}" for i in range(mods)]
+    tracemalloc.start()
+    try:
+        patch_active_mods(path, new_mods)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_cost_scales_with_block_not_file(tmp_path):
+    # The unchanged prefix and suffix go from the mapping straight to the
+    # kernel; only the new block is built in Python
+    small_file = _patch_peak(tmp_path, padding=10, mods=100)
+    big_file = _patch_peak(tmp_path, padding=200000, mods=100)
+    big_block = _patch_peak(tmp_path, padding=10, mods=20000)
+    file_size = os.path.getsize(tmp_path / "profile-200000-100.sii")
+    assert file_size > 5 * 1024 * 1024
+    assert big_file < small_file + 64 * 1024
+    assert big_block > 10 * big_file
+
+
+def write_profile(tmp_path, data: bytes, log):
+    import ETS2_Mod_Manager as app
+
+    load_order = write(tmp_path / "load_order.json",
+                       ("[" + ",".join(f'"{m}"' for m in NEW_MODS) + "]").encode())
+    profile_dir = tmp_path / "profile"
+    profile_dir.mkdir()
+    write(profile_dir / "profile.sii", data)
+    manager = app.ETS2ModManager(use_cache=False, verbosity=0, load_order_file=load_order,
+                                 game_dirs=[], steam_path=str(tmp_path))
+    profile = app.ETS2Profile("Driver", str(profile_dir), 1, 0, 2, 1, 1, datetime.now(), "Local")
+    return manager._write_profile(profile, True, log=log), str(profile_dir / "profile.sii")
+
+
+def make_bsii_profile(version: int = 2, **fields) -> bytes:
+    fields = {"brand": "scania", "active_mods": OLD_MODS, "cached_experience": 99999, **fields}
+    data = encode_bsii([SiiUnit("profile_data", "_nameless.1f2.3a4b", fields)])
+    return data[:4] + struct.pack('<I', version) + data[8:]
+
+
+def test_failed_patch_falls_back_to_rewrite(tmp_path, monkeypatch):
+    import ETS2_Mod_Manager as app
+
+    def locked(path, mods):
+        raise PermissionError(13, "file is in use", path)
+
+    monkeypatch.setattr(app, "patch_active_mods", locked)
+    messages = []
+    method, path = write_profile(tmp_path, make_profile(), messages.append)
+    assert method == "rewritten"
+    assert any("file is in use" in message for message in messages)
+    assert read_profile_fields(path).active_mods == NEW_MODS
+
+
+def test_binary_profile_is_patched_as_text(tmp_path):
+    method, path = write_profile(tmp_path, make_bsii_profile(), [].append)
+    assert method == "patched"
+    fields = read_profile_fields(path)
+    assert fields.active_mods == NEW_MODS
+    assert b' brand: "scania"' in read(path) and b" cached_experience: 99999" in read(path)
+
+
+def test_unverified_bsii_version_falls_back_to_rewrite(tmp_path):
+    messages = []
+    method, path = write_profile(tmp_path, make_bsii_profile(version=3), messages.append)
+    assert method == "rewritten"
+    assert any("BSII format version 3" in message for message in messages)
+    assert read_profile_fields(path).active_mods == NEW_MODS
+
+
+@pytest.mark.parametrize("value", [(1.5, 2.5, 3.5, 0.0, 1.0, 0.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0)])
+def test_binary_profile_with_lossy_values_is_not_converted(tmp_path, value):
+    path = write(tmp_path / "profile.sii", make_bsii_profile(truck_placement=value))
+    with pytest.raises(sii.SiiPatchError, match="placement"):
+        patch_active_mods(path, NEW_MODS)
+    assert read(path) == make_bsii_profile(truck_placement=value)
+
+    messages = []
+    method, _ = write_profile(tmp_path, make_bsii_profile(truck_placement=value), messages.append)
+    assert method == "rewritten"